@@ -1,18 +1,40 @@
 # diversity_summary.py
 # -----------------------------------------------------------------------------
-# Analyze generated ODRL policies for diversity, semantic issues, and export to TTL
+# Analyze generated ODRL policies for diversity, semantic issues, and export to RDF
+# All metrics come from one policy_analytics walk over the policies. The RDF
+# export streams every policy as N-Quads, one named graph per policy uid, into
+# a single (optionally .gz/.zst compressed) file or a few shards, parsing in a
+# process pool; per-policy Turtle files remain available for inspection.
 # -----------------------------------------------------------------------------
 
+import argparse
 import json
-from collections import Counter, defaultdict
-from rdflib import Graph
+import os
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
 
+# Context resolution is shared with the template pipeline
+sys.path.append(str(Path(__file__).resolve().parent.parent / "templates"))
+from jsonld_loader import parse_jsonld
+from policy_analytics import ContradictionCollector, DuplicateUidCollector, PolicyVisitor, TermCounter, term, walk
+from utils import open_text
+
+try:
+    from rdflib import Dataset, URIRef
+except ImportError:
+    Dataset = None
+
 INPUT_FILE = "outputs/generated_and_described.json"
 TTL_DIR = "outputs/reports/ttl_exports"
+NQUADS_FILE = "outputs/reports/policies.nq.gz"
+EXPORT_CHUNK_SIZE = 256  # Policies per export task
+EXPORT_FORMATS = ("nquads", "turtle", "none")
 PLOTS_DIR = "outputs/plots/llm_analysis"
 
 
@@ -21,84 +43,173 @@ def load_policies():
         return json.load(f)
 
 
-def extract_fields(policies):
-    actions = Counter()
-    left_operands = Counter()
-    operators = Counter()
-    assignees = Counter()
-    assigners = Counter()
-    targets = Counter()
-    uids = set()
-    uid_duplicates = []
-
-    for entry in policies:
-        policy = entry["odrl"]
-        uid = policy.get("uid")
-        if uid in uids:
-            uid_duplicates.append(uid)
-        else:
-            uids.add(uid)
+class ConflictCollector(PolicyVisitor):
+    """Permissions and prohibitions on the same (target, assignee) within a policy."""
 
-        for rule_type in ["permission", "prohibition", "obligation"]:
-            for rule in policy.get(rule_type, []):
-                actions[rule.get("action")] += 1
-                targets[rule.get("target")] += 1
-                assignees[rule.get("assignee", "public")] += 1
-                assigners[rule.get("assigner", "none")] += 1
-                for constraint in rule.get("constraint") or []:
-                    left_operands[constraint.get("leftOperand")] += 1
-                    operators[constraint.get("operator")] += 1
+    def __init__(self):
+        self.conflicts = []
+        self._seen = defaultdict(set)
 
-    return actions, left_operands, operators, assignees, assigners, targets, uid_duplicates
+    def start_policy(self, index, policy):
+        self._seen = defaultdict(set)
 
+    def visit_rule(self, rule):
+        if rule.section in ("permission", "prohibition"):
+            self._seen[(rule.target, rule.assignee)].add(rule.section)
 
-def flag_conflicts(policies):
-    conflicts = []
-    for i, entry in enumerate(policies):
-        seen = defaultdict(set)
-        policy = entry["odrl"]
-        for rule_type in ["permission", "prohibition"]:
-            for rule in policy.get(rule_type, []):
-                key = (rule.get("target"), rule.get("assignee", "public"))
-                seen[key].add(rule_type)
-        for key, types in seen.items():
+    def end_policy(self, index, policy):
+        for key, types in self._seen.items():
             if "permission" in types and "prohibition" in types:
-                conflicts.append({"policy_index": i + 1, "target": key[0], "assignee": key[1]})
-    return conflicts
+                self.conflicts.append({"policy_index": index + 1, "target": key[0], "assignee": key[1]})
+
+
+def _fields(terms, uids):
+    return (terms.actions, terms.left_operands, terms.operators, terms.assignees, terms.assigners,
+            terms.targets, uids.duplicates)
+
+
+def _contradictions(collector):
+    return [{"policy_index": index + 1, "rule": rule, "operand": operand, "constraints": constraints}
+            for index, rule, operand, constraints in collector.findings]
+
+
+def extract_fields(policies):
+    return _fields(*walk(policies, TermCounter(), DuplicateUidCollector()))
+
+
+def flag_conflicts(policies):
+    return walk(policies, ConflictCollector())[0].conflicts
 
 
 def find_constraint_contradictions(policies):
-    contradictory = []
-    for i, entry in enumerate(policies):
-        policy = entry["odrl"]
-        all_constraints = defaultdict(list)
-        for rule_type in ["permission", "prohibition", "obligation"]:
-            for rule in policy.get(rule_type, []):
-                for c in rule.get("constraint") or []:
-                    key = c.get("leftOperand")
-                    op = c.get("operator")
-                    val = str(c.get("rightOperand"))
-                    if key and op:
-                        all_constraints[key].append((op, val))
+    return _contradictions(walk(policies, ContradictionCollector())[0])
 
-        for operand, constraints in all_constraints.items():
-            ops = [c[0] for c in constraints]
-            if any(o in ops for o in ["lt", "lessThan", "lteq"]) and any(o in ops for o in ["gt", "greaterThan", "gteq"]):
-                contradictory.append({"policy_index": i + 1, "operand": operand, "constraints": constraints})
 
-    return contradictory
+def analyze(policies):
+    """Fields, conflicts and contradictions from a single pass over the policies."""
+    terms, uids, conflicts, contradictions = walk(
+        policies, TermCounter(), DuplicateUidCollector(), ConflictCollector(), ContradictionCollector())
+    return _fields(terms, uids), conflicts.conflicts, _contradictions(contradictions)
 
 
 def export_turtle(policies):
+    """One Turtle file per policy, for inspection."""
     Path(TTL_DIR).mkdir(parents=True, exist_ok=True)
     for i, entry in enumerate(policies):
-        g = Graph()
-        policy_jsonld = entry["odrl"]
-        g.parse(data=json.dumps(policy_jsonld), format="json-ld")
+        g = parse_jsonld(entry["odrl"])
         ttl_path = Path(TTL_DIR) / f"policy_{i + 1}.ttl"
         g.serialize(destination=ttl_path, format="turtle")
 
 
+def _graph_names(policies):
+    """(graph name, policy) pairs: the policy uid, suffixed with the policy number when missing or repeated."""
+    seen = set()
+    for i, entry in enumerate(policies):
+        policy = entry["odrl"]
+        uid = term(policy.get("uid"))
+        uid = uid if isinstance(uid, str) and uid else "urn:policy"
+        yield (uid if uid not in seen and uid != "urn:policy" else f"{uid}#{i + 1}"), policy
+        seen.add(uid)
+
+
+def _batchable(name, policy):
+    """Whether a policy can share a JSON-LD document with others: an absolute graph name, no graph of its
+    own and no blank node labels (they are scoped to the document)."""
+    return (name.startswith(("http://", "https://", "urn:")) and isinstance(policy, dict)
+            and "@graph" not in policy and '"_:' not in json.dumps(policy))
+
+
+def _parse_into(dataset, chunk, failed):
+    for name, policy in chunk:
+        try:
+            parse_jsonld(policy, dataset.graph(URIRef(name)))
+        except Exception:
+            dataset.remove_graph(URIRef(name))
+            failed.append(name)
+
+
+# Worker task: N-Quads text of a chunk of (graph name, policy) pairs, and the names that failed to parse.
+# Policies sharing a context are parsed as one document of named graphs, so the context is processed once
+def _nquads_chunk(chunk):
+    dataset, failed, groups, single = Dataset(), [], defaultdict(list), []
+    for name, policy in chunk:
+        if _batchable(name, policy):
+            groups[json.dumps(policy.get("@context"), sort_keys=True)].append((name, policy))
+        else:
+            single.append((name, policy))
+    for group in groups.values():
+        document = {"@graph": [{"@id": name, "@graph": {k: v for k, v in policy.items() if k != "@context"}}
+                               for name, policy in group]}
+        if "@context" in group[0][1]:
+            document = {"@context": group[0][1]["@context"], **document}
+        try:
+            parse_jsonld(document, dataset)
+        except Exception:
+            for name, _ in group:
+                dataset.remove_graph(URIRef(name))
+            _parse_into(dataset, group, failed)
+    _parse_into(dataset, single, failed)
+    return dataset.serialize(format="nquads"), failed
+
+
+def shard_paths(path, shards):
+    """Output files of an export: `path` itself, or path-00000.nq.gz, path-00001.nq.gz, ..."""
+    if shards <= 1:
+        return [path]
+    base = Path(path)
+    suffix = "".join(base.suffixes)
+    stem = base.name[:len(base.name) - len(suffix)] if suffix else base.name
+    return [str(base.with_name(f"{stem}-{i:05d}{suffix}")) for i in range(shards)]
+
+
+def export_nquads(policies, path=NQUADS_FILE, shards=1, workers=1, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream policies into N-Quads, one named graph per policy uid; returns (paths, policies, failures).
+
+    Chunks of policies are parsed in a process pool (`workers` > 1) with a
+    bounded number in flight, and written in corpus order; with `shards` > 1
+    they are spread round-robin over that many files. Each file is written
+    under a temporary name and renamed when complete. Policies that fail to
+    parse are skipped and their graph names returned.
+    """
+    if Dataset is None:
+        raise RuntimeError("RDF export requires the 'rdflib' package")
+    paths = shard_paths(path, shards)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    partial = [str(Path(p).with_name("partial-" + Path(p).name)) for p in paths]  # Keeps the compression suffix
+    files = [open_text(p, "w") for p in partial]
+    items = _graph_names(policies)
+    chunks = iter(lambda: list(islice(items, chunk_size)), [])
+    count, failures = 0, []
+
+    def results():
+        if workers <= 1:
+            for chunk in chunks:
+                yield len(chunk), _nquads_chunk(chunk)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((len(chunk), pool.submit(_nquads_chunk, chunk)))
+                if len(pending) >= 2 * workers:
+                    size, future = pending.popleft()
+                    yield size, future.result()
+            while pending:
+                size, future = pending.popleft()
+                yield size, future.result()
+
+    try:
+        for index, (size, (text, failed)) in enumerate(results()):
+            files[index % len(files)].write(text)
+            count += size
+            failures.extend(failed)
+    finally:
+        for f in files:
+            f.close()
+    for temp, p in zip(partial, paths):
+        os.replace(temp, p)
+    return paths, count - len(failures), failures
+
+
 def plot_bar_chart(counter, title, filename):
     Path(PLOTS_DIR).mkdir(parents=True, exist_ok=True)
     items = counter.most_common()
@@ -114,9 +225,10 @@ def plot_bar_chart(counter, title, filename):
     plt.close()
 
 
-def main():
+def main(export="nquads", output=NQUADS_FILE, shards=1, workers=1):
     policies = load_policies()
-    actions, operands, ops, assignees, assigners, targets, uid_dupes = extract_fields(policies)
+    fields, conflicts, contradictions = analyze(policies)
+    actions, operands, ops, assignees, assigners, targets, uid_dupes = fields
 
     print("\n📊 Action Frequency:")
     print(actions.most_common())
@@ -137,7 +249,6 @@ def main():
         print("\n✅ All UIDs are unique.")
 
     print("\n📌 Checking for permission/prohibition conflicts...")
-    conflicts = flag_conflicts(policies)
     if conflicts:
         for c in conflicts:
             print(f"⚠️ Policy {c['policy_index']} has conflict on target {c['target']} for assignee {c['assignee']}")
@@ -145,10 +256,10 @@ def main():
         print("✅ No semantic conflicts found.")
 
     print("\n🧠 Checking for contradictory constraints...")
-    contradictions = find_constraint_contradictions(policies)
     if contradictions:
         for c in contradictions:
-            print(f"⚠️ Policy {c['policy_index']} has conflicting constraints on '{c['operand']}': {c['constraints']}")
+            print(f"⚠️ Policy {c['policy_index']} {c['rule']} has conflicting constraints on '{c['operand']}': "
+                  f"{c['constraints']}")
     else:
         print("✅ No logical contradictions found.")
 
@@ -157,11 +268,25 @@ def main():
     plot_bar_chart(operands, "Constraint Operands", "operands.png")
     plot_bar_chart(ops, "Operators", "operators.png")
 
-    print("\n🔄 Exporting all policies to Turtle format...")
-    export_turtle(policies)
-    print(f"✅ Turtle files saved to: {TTL_DIR}")
+    if export == "nquads":
+        print("\n🔄 Exporting all policies to N-Quads...")
+        paths, exported, failed = export_nquads(policies, output, shards=shards, workers=workers)
+        for name in failed:
+            print(f"⚠️ Could not parse policy {name}")
+        print(f"✅ {exported} policy graphs saved to: {', '.join(paths)}")
+    elif export == "turtle":
+        print("\n🔄 Exporting all policies to Turtle format...")
+        export_turtle(policies)
+        print(f"✅ Turtle files saved to: {TTL_DIR}")
     print(f"✅ Plots saved to: {PLOTS_DIR}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Analyze generated ODRL policies and export them to RDF.")
+    parser.add_argument("--export", choices=EXPORT_FORMATS, default="nquads",
+                        help="nquads: one file (or shards) of named graphs; turtle: one file per policy")
+    parser.add_argument("--output", type=str, default=NQUADS_FILE, help="N-Quads file (.nq, .nq.gz or .nq.zst)")
+    parser.add_argument("--shards", type=int, default=1, help="Number of N-Quads files to spread the graphs over")
+    parser.add_argument("--workers", type=int, default=1, help="Number of export processes")
+    args = parser.parse_args()
+    main(export=args.export, output=args.output, shards=args.shards, workers=args.workers)
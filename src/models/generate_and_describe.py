@@ -8,7 +8,7 @@ import json
 import random
 import logging
 import argparse
-import uuid
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 from dotenv import load_dotenv
@@ -19,9 +19,13 @@ from policy_generator import (
 )
 from policy_describer import build_description_prompt
 from prompt_tuner import tune_policy
-from validator import validate_policy
+from validator import validate_policy, validate_policies_batch, inject_context_and_flatten, TIER_STATS
 import time
 
+# ID allocation is shared with the template pipeline
+sys.path.append(str(Path(__file__).resolve().parent.parent / "templates"))
+from utils import ID_STRATEGIES, make_id_allocator, set_id_allocator, generate_policy_id
+
 # Setup logging
 Path("outputs/logs").mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
@@ -157,6 +161,21 @@ def generate_policies(dry_run=False, uid_prefix="policy", describe=False):
             time.sleep(delay)  # <-- Wait to reduce risk of hitting TPM
 
 
+        # Parse every response up front so all first attempts share one SHACL run
+        parsed = []
+        for raw in responses:
+            try:
+                parsed.append(extract_json_objects(raw))
+            except ValueError as e:
+                parsed.append(e)
+        first_attempts = {i: p[0] for i, p in enumerate(parsed) if isinstance(p, list) and p}
+        for policy in first_attempts.values():
+            policy["uid"] = f"http://example.com/{uid_prefix}:{generate_policy_id()}"
+        try:
+            first_results = dict(zip(first_attempts, validate_policies_batch(list(first_attempts.values()))))
+        except Exception:
+            first_results = {}  # Validated one by one below, where errors are reported per policy
+
         for i, raw in enumerate(responses):
             index = total_generated + i + 1
             audit_entry = {
@@ -168,7 +187,9 @@ def generate_policies(dry_run=False, uid_prefix="policy", describe=False):
                 "violations": []
             }
             try:
-                policies = extract_json_objects(raw)
+                policies = parsed[i]
+                if isinstance(policies, Exception):
+                    raise policies
                 if not policies:
                     audit_entry["violations"].append("❌ No valid JSON object found in response.")
                     logging.error(f"❌ No valid JSON extracted from response:\n{raw}")
@@ -176,13 +197,15 @@ def generate_policies(dry_run=False, uid_prefix="policy", describe=False):
                     continue  # Skip to the next response
 
                 policy = policies[0]
-                policy["uid"] = f"http://example.com/{uid_prefix}:{uuid.uuid4().hex}"
                 audit_entry["uid"] = policy["uid"]
 
                 max_attempts = 3
                 while audit_entry["attempts"] < max_attempts:
                     audit_entry["attempts"] += 1
-                    conforms, report_text = validate_policy(policy)
+                    if audit_entry["attempts"] == 1 and i in first_results:
+                        conforms, report_text = first_results[i]
+                    else:
+                        conforms, report_text = validate_policy(policy)
                     if conforms:
                         audit_entry["success"] = True
                         break
@@ -202,7 +225,7 @@ Return corrected JSON-LD only:
                         retry_response = client.generate(correction_prompt)
                         retry_policies = extract_json_objects(retry_response)
                         policy = retry_policies[0] if retry_policies else policy
-                        policy["uid"] = f"http://example.com/{uid_prefix}:{uuid.uuid4().hex}"
+                        policy["uid"] = f"http://example.com/{uid_prefix}:{generate_policy_id()}"
                         audit_entry["uid"] = policy["uid"]
 
                 if not audit_entry["success"]:
@@ -210,7 +233,7 @@ Return corrected JSON-LD only:
                     audit_log.append(audit_entry)
                     continue
 
-                policy = tune_policy(policy)
+                policy = tune_policy(inject_context_and_flatten(policy))
                 description = ""
                 #if describe:
                 #    description = describe_policy(client, policy, style_examples)
@@ -243,6 +266,8 @@ Return corrected JSON-LD only:
 
     logging.info(f"\n🎉 Done! {len(results)} valid policies saved to {COMBINED_OUTPUT_PATH}")
     logging.info(f"📝 Audit log saved to {AUDIT_LOG_PATH}")
+    for line in TIER_STATS.summary_lines():
+        logging.info(f"Validation tier {line}")
 
     subprocess.run(["python", "src/models/postprocess_policy.py"], check=True)
     subprocess.run(["python", "src/models/quality_report.py"], check=True)
@@ -256,7 +281,16 @@ if __name__ == "__main__":
     parser.add_argument('--no-describe', action='store_true', help="Skip natural language description generation")
     parser.add_argument('--clean-only', action='store_true', help="Only run postprocessing/cleanup.")
     parser.add_argument('--report-only', action='store_true', help="Only run reporting modules.")
+    parser.add_argument('--id-strategy', choices=ID_STRATEGIES, default="uuid4",
+                        help="How policy UIDs are allocated; seeded and counter UIDs are only unique within a run, "
+                             "so runs writing into the same output set need distinct --seed values")
+    parser.add_argument('--seed', type=int, default=None, help="Run seed, required by the seeded and counter ID strategies")
     args = parser.parse_args()
+    if args.id_strategy != "uuid4" and args.seed is None:
+        parser.error(f"--id-strategy {args.id_strategy} requires an explicit --seed")
+    # UIDs keep the 32-character hex form; counter UIDs carry the seed so runs with distinct seeds never collide
+    shard = f"{args.uid_prefix}-{args.seed}" if args.id_strategy == "counter" else args.uid_prefix
+    set_id_allocator(make_id_allocator(args.id_strategy, args.seed or 0, shard, hex=True))
 
     if args.clean_only:
         subprocess.run(["python", "src/models/postprocess_policy.py"], check=True)
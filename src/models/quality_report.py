@@ -4,50 +4,31 @@
 # -----------------------------------------------------------------------------
 
 import json
-from collections import Counter, defaultdict
+import sys
 from pathlib import Path
 
+# Policy analytics are shared with the template pipeline
+sys.path.append(str(Path(__file__).resolve().parent.parent / "templates"))
+from policy_analytics import ContradictionCollector, DuplicateUidCollector, TermCounter, walk
+
 INPUT_FILE = "outputs/cleaned_and_described.json"
 REPORT_FILE = "outputs/reports/quality_report.json"
 
 
 def evaluate(policies):
-    stats = {
+    """Quality statistics from a single policy_analytics walk over the policies."""
+    terms, uids, contradictions = walk(policies, TermCounter(), DuplicateUidCollector(), ContradictionCollector())
+    return {
         "total": len(policies),
-        "invalid_constraints": [],
-        "duplicate_uids": set(),
-        "action_frequency": Counter(),
-        "left_operands": Counter(),
-        "operators": Counter(),
-        "targets": Counter(),
+        "invalid_constraints": [{"policy_index": index + 1, "rule": rule, "field": field,
+                                 "ops": [op for op, _ in constraints]}
+                                for index, rule, field, constraints in contradictions.findings],
+        "duplicate_uids": list(dict.fromkeys(uids.duplicates)),
+        "action_frequency": terms.actions,
+        "left_operands": terms.left_operands,
+        "operators": terms.operators,
+        "targets": terms.targets,
     }
-    seen_uids = set()
-
-    for i, entry in enumerate(policies):
-        policy = entry["odrl"]
-        uid = policy.get("uid")
-        if uid in seen_uids:
-            stats["duplicate_uids"].add(uid)
-        seen_uids.add(uid)
-
-        for rule_type in ["permission", "prohibition", "obligation"]:
-            for rule in policy.get(rule_type, []):
-                stats["action_frequency"][rule.get("action")] += 1
-                stats["targets"][rule.get("target")] += 1
-                for c in rule.get("constraint", []):
-                    stats["left_operands"][c.get("leftOperand")] += 1
-                    stats["operators"][c.get("operator")] += 1
-
-                # Check for logically contradictory constraints
-                ops = defaultdict(list)
-                for c in rule.get("constraint", []):
-                    ops[c["leftOperand"]].append(c["operator"])
-                for key, op_list in ops.items():
-                    if "lt" in op_list and "gt" in op_list:
-                        stats["invalid_constraints"].append({"policy_index": i + 1, "field": key, "ops": op_list})
-
-    stats["duplicate_uids"] = list(stats["duplicate_uids"])
-    return stats
 
 
 def main():
@@ -5,11 +5,21 @@
 # -----------------------------------------------------------------------------
 
 import os
+import sys
 import json
 import logging
-from pyshacl import validate
-from rdflib import Graph
-from copy import deepcopy
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# The shapes registry is shared with the template pipeline
+sys.path.append(str(Path(__file__).resolve().parent.parent / "templates"))
+from shapes_registry import DEFAULT_CHUNK_SIZE, INFERENCE_MODES, resolve_inference, set_default_inference
+from validation_cache import CACHE_PATH, ValidationCache
+from validation_engine import (
+    TierStats, ValidationEngine, init_shacl_worker, shacl_cache_key, shacl_tier, structure_tier, validate_chunk,
+    vocabulary_tier
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
@@ -19,6 +29,7 @@ INPUT_FILE = "outputs/generated_and_described.json"
 OUTPUT_FILE = "outputs/valid_policies.json"
 SHACL_PATH = "config/shacl_shapes.ttl"
 ODRL_BASE = "http://www.w3.org/ns/odrl/2/"
+CHUNK_SIZE = DEFAULT_CHUNK_SIZE  # Policies per batched SHACL run
 
 
 def inject_context_and_flatten(policy):
@@ -40,52 +51,80 @@ def inject_context_and_flatten(policy):
     return policy
 
 
+def _expand_term(term):
+    if isinstance(term, str) and not term.startswith("http") and ":" not in term:
+        return "odrl:" + term
+    return term
+
+
+def _expand_rule(rule):
+    expanded = {**rule, "action": _expand_term(rule.get("action"))}
+    if "constraint" in rule:
+        expanded["constraint"] = [
+            {**c, "@type": "odrl:Constraint",
+             "leftOperand": _expand_term(c.get("leftOperand")), "operator": _expand_term(c.get("operator"))}
+            for c in rule["constraint"]
+        ]
+    return expanded
+
+
+# The document SHACL runs on, built in one pass as a new structure (the policy is not modified)
 def _expand_for_validation(policy):
-    policy_copy = deepcopy(policy)
-    policy_copy["@context"] = {
+    document = {**policy, "@context": {
         "odrl": ODRL_BASE,
         "xsd": "http://www.w3.org/2001/XMLSchema#"
-    }
+    }}
+    document["@type"] = _expand_term(policy.get("@type", "Policy"))
+    for section in ["permission", "prohibition", "obligation"]:
+        if section in policy:
+            document[section] = [_expand_rule(r) for r in policy[section]]
+    return document
 
-    def expand(term):
-        if isinstance(term, str) and not term.startswith("http") and ":" not in term:
-            return "odrl:" + term
-        return term
 
-    def process_rule(rule):
-        rule["action"] = expand(rule.get("action"))
-        for c in rule.get("constraint", []):
-            c["@type"] = "odrl:Constraint"
-            c["leftOperand"] = expand(c.get("leftOperand"))
-            c["operator"] = expand(c.get("operator"))
-        return rule
+ENGINE = ValidationEngine([structure_tier(), vocabulary_tier(),
+                           shacl_tier(lambda c: _expand_for_validation(c.policy), SHACL_PATH)])
+TIER_STATS = TierStats()  # Per-tier counts and timings of validations run in this process
 
-    policy_copy["@type"] = expand(policy_copy.get("@type", "Policy"))
-    for section in ["permission", "prohibition", "obligation"]:
-        if section in policy_copy:
-            policy_copy[section] = [process_rule(r) for r in policy_copy[section]]
 
-    return policy_copy
+# (conforms, report text); policies rejected before SHACL report their early-tier errors
+def _outcome(candidate):
+    return candidate.valid, candidate.detail if candidate.detail is not None else "\n".join(candidate.errors)
 
 
-def validate_policy(policy_json):
-    expanded_policy = _expand_for_validation(policy_json)
-    g = Graph()
-    g.parse(data=json.dumps(expanded_policy), format='json-ld')
+def validate_policy(policy_json, stats=TIER_STATS):
+    return _outcome(ENGINE.run([policy_json], stats)[0])
 
-    conforms, report_graph, report_text = validate(
-        data_graph=g,
-        shacl_graph=SHACL_PATH,
-        data_graph_format='json-ld',
-        shacl_graph_format='turtle',
-        inference='rdfs',
-        debug=False
-    )
-    return conforms, report_text
+
+def validate_policies_batch(policies, chunk_size=DEFAULT_CHUNK_SIZE, stats=TIER_STATS):
+    """validate_policy for many policies, each tier run once per chunk."""
+    results = []
+    for start in range(0, len(policies), chunk_size):
+        results.extend(_outcome(c) for c in ENGINE.run(policies[start:start + chunk_size], stats))
+    return results
+
+
+# Worker task: one (conforms, report) tuple or error message per prepared policy (None = skipped),
+# and the tier counts they took
+def _validate_chunk(policies):
+    outcomes = [None] * len(policies)
+    present = [i for i, p in enumerate(policies) if p is not None]
+    validated, counts = validate_chunk(ENGINE, [policies[i] for i in present], _outcome, isolate_errors=True)
+    for i, outcome in zip(present, validated):
+        outcomes[i] = outcome
+    return outcomes, counts
+
+
+# Cache key of a prepared policy's outcome (None if it cannot be expanded)
+def _cache_key(policy):
+    try:
+        document = _expand_for_validation(policy)
+    except Exception:
+        return None
+    return shacl_cache_key("models.filter", document, SHACL_PATH)
 
 
 # Main validation loop
-def main():
+def main(workers=1, cache_path=CACHE_PATH):
     if not os.path.exists(SHACL_PATH):
         logging.error(f"SHACL file not found at {SHACL_PATH}")
         return
@@ -100,11 +139,55 @@ def main():
     valid_entries = []
     logging.info(f"Validating {len(data)} policies...")
 
+    prepared, errors = [], {}
     for i, entry in enumerate(data):
+        try:
+            prepared.append(inject_context_and_flatten(entry["odrl"]))
+        except Exception as e:
+            prepared.append(None)
+            errors[i] = e
+
+    # Outcomes cached by earlier runs are reused; only the rest is validated
+    cache = ValidationCache(cache_path) if cache_path else None
+    keys, cached = {}, {}
+    if cache:
+        keys = {i: _cache_key(p) for i, p in enumerate(prepared) if p is not None}
+        keys = {i: key for i, key in keys.items() if key is not None}
+        cached = cache.get_many(keys.values())
+    pending = [None if keys.get(i) in cached else p for i, p in enumerate(prepared)]
+    chunks = [pending[start:start + CHUNK_SIZE] for start in range(0, len(pending), CHUNK_SIZE)]
+
+    # Chunks come back in submission order, so results do not depend on the worker count
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_shacl_worker, initargs=(SHACL_PATH,)) as pool:
+            validated = list(pool.map(_validate_chunk, chunks))
+    else:
+        validated = [_validate_chunk(chunk) for chunk in chunks]
+    outcomes = [o for chunk, _ in validated for o in chunk]
+    tier_stats = TierStats()
+    for _, counts in validated:
+        tier_stats.merge(counts)
+    for line in tier_stats.summary_lines():
+        logging.info(f"Validation tier {line}")
+
+    if cache:
+        for i, key in keys.items():
+            if key in cached:
+                outcomes[i] = tuple(cached[key])
+        cache.put_many((key, outcomes[i]) for i, key in keys.items()
+                       if key not in cached and isinstance(outcomes[i], tuple))
+        stats = cache.stats()
+        logging.info(f"Validation cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+        cache.close()
+
+    for i, (entry, outcome) in enumerate(zip(data, outcomes)):
         logging.info(f"\n🔍 Policy {i + 1}...")
         try:
-            policy = inject_context_and_flatten(entry["odrl"])
-            conforms, report = validate_policy(policy)
+            if i in errors:
+                raise errors[i]
+            if isinstance(outcome, str):
+                raise RuntimeError(outcome)
+            conforms, report = outcome
             if conforms:
                 valid_entries.append(entry)
                 logging.info("✅ Valid")
@@ -121,4 +204,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Validate described ODRL policies and keep the valid ones.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of validation processes")
+    parser.add_argument("--cache", type=str, default=CACHE_PATH, help="SQLite file caching validation results")
+    parser.add_argument("--no-cache", action="store_true", help="Validate every policy afresh")
+    parser.add_argument("--inference", choices=INFERENCE_MODES, default=resolve_inference(),
+                        help="Inference before SHACL validation (closure: precomputed, same results as rdfs)")
+    args = parser.parse_args()
+    set_default_inference(args.inference)
+    main(workers=args.workers, cache_path=None if args.no_cache else args.cache)
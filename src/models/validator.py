@@ -3,11 +3,14 @@
 # Utility module for validating ODRL policies against SHACL shapes
 # ----------------------------------------------------------------------------
 
-import json
 import os
-from copy import deepcopy
-from rdflib import Graph
-from pyshacl import validate
+import sys
+from pathlib import Path
+
+# The shapes registry is shared with the template pipeline
+sys.path.append(str(Path(__file__).resolve().parent.parent / "templates"))
+from shapes_registry import DEFAULT_CHUNK_SIZE
+from validation_engine import TierStats, ValidationEngine, shacl_tier, structure_tier, vocabulary_tier
 
 ODRL_CONTEXT_URI = "http://www.w3.org/ns/odrl.jsonld"
 ODRL_BASE = "http://www.w3.org/ns/odrl/2/"
@@ -36,57 +39,68 @@ def inject_context_and_flatten(policy):
 
     return policy
 
-# Prepares the policy with expanded URIs for SHACL validation
-def _expand_for_validation(policy):
-    policy_copy = deepcopy(policy)
-
-    policy_copy["@context"] = {
+def _expand_term(term):
+    if isinstance(term, str) and not term.startswith("http") and ":" not in term:
+        return "odrl:" + term
+    return term
+
+# A flattened, typed constraint with expanded operand and operator
+def _expand_constraint(c):
+    expanded = {**c, "@type": "odrl:Constraint",
+                "leftOperand": _expand_term(c.get("leftOperand")), "operator": _expand_term(c.get("operator"))}
+    if isinstance(c.get("rightOperand"), dict):
+        val = c["rightOperand"].get("@value")
+        if val:
+            expanded["rightOperand"] = val
+    return expanded
+
+def _expand_rule(rule):
+    constraints = rule.get("constraint")
+    if isinstance(constraints, dict):
+        constraints = [constraints]
+    expanded = {**rule, "constraint": None, "action": _expand_term(rule.get("action"))}
+    expanded["constraint"] = [_expand_constraint(c) for c in constraints] if constraints else constraints
+    return expanded
+
+# The JSON-LD document SHACL validation runs on: inject_context_and_flatten plus
+# URI expansion, built in one pass as a new structure (the policy is not modified)
+def _policy_document(policy_json):
+    document = {**policy_json, "@context": {
         "odrl": ODRL_BASE,
         "xsd": "http://www.w3.org/2001/XMLSchema#"
-    }
-
-    def expand(term):
-        if isinstance(term, str) and not term.startswith("http") and ":" not in term:
-            return "odrl:" + term
-        return term
-
-    def process_rule(rule):
-        rule["action"] = expand(rule.get("action"))
-        constraints = rule.get("constraint")
-        if isinstance(constraints, dict):
-            constraints = [constraints]
-        for c in constraints or []:
-            c["@type"] = "odrl:Constraint"
-            c["leftOperand"] = expand(c.get("leftOperand"))
-            c["operator"] = expand(c.get("operator"))
-        rule["constraint"] = constraints
-        return rule
+    }}
+    document["@type"] = _expand_term(policy_json.get("@type", "Policy"))
+    for section in ["permission", "prohibition", "obligation"]:
+        if section in policy_json:
+            document[section] = [_expand_rule(r) for r in policy_json[section]]
+    return document
 
-    policy_copy["@type"] = expand(policy_copy.get("@type", "Policy"))
+TIER_STATS = TierStats()  # Per-tier counts and timings of every validation in this process
 
-    for section in ["permission", "prohibition", "obligation"]:
-        if section in policy_copy:
-            policy_copy[section] = [process_rule(r) for r in policy_copy[section]]
+# Structural and vocabulary checks reject malformed policies before any RDF is parsed; the SHACL
+# tier keeps the turtle report. With a ValidationCache, policies whose expanded document was
+# validated before are not re-run.
+def _engine(cache=None):
+    return ValidationEngine([structure_tier(), vocabulary_tier(),
+                             shacl_tier(lambda c: _policy_document(c.policy), SHACL_PATH, report_format="turtle",
+                                        cache=cache, cache_name="models.validator")])
 
-    return policy_copy
+# (conforms, report): the turtle SHACL report, or the early-tier errors for rejected policies
+def _outcome(candidate):
+    return candidate.valid, candidate.detail if candidate.detail is not None else "\n".join(candidate.errors)
 
-# Uses pySHACL to validate against the SHACL shapes
 def validate_policy(policy_json):
+    if not os.path.exists(SHACL_PATH):
+        raise FileNotFoundError(f"SHACL file not found at {SHACL_PATH}")
+    return _outcome(_engine().run([policy_json], TIER_STATS)[0])
+
+# Validates many policies, one tier run per chunk; same output as validate_policy
+def validate_policies_batch(policies, chunk_size=DEFAULT_CHUNK_SIZE, cache=None):
     if not os.path.exists(SHACL_PATH):
         raise FileNotFoundError(f"SHACL file not found at {SHACL_PATH}")
 
-    expanded_policy = _expand_for_validation(inject_context_and_flatten(policy_json))
-    g = Graph()
-    g.parse(data=json.dumps(expanded_policy), format='json-ld')
-
-    conforms, report_graph, report_text = validate(
-        data_graph=g,
-        shacl_graph=SHACL_PATH,
-        data_graph_format='json-ld',
-        shacl_graph_format='turtle',
-        inference='rdfs',
-        debug=False
-    )
-
-    report_detailed = report_graph.serialize(format="turtle")
-    return conforms, report_detailed
+    engine = _engine(cache)
+    results = []
+    for start in range(0, len(policies), chunk_size):
+        results.extend(_outcome(c) for c in engine.run(policies[start:start + chunk_size], TIER_STATS))
+    return results
@@ -0,0 +1,339 @@
+# constraint_table.py
+# ----------------------------------------------------------------------------
+# Explodes a policy corpus into columnar tables - policies, rules, rule
+# actions and constraints - for vectorized analytics at scale.
+# Terms (policy types, actions, targets, parties, operands, operators and
+# right-operand values) are dictionary-encoded into integer codes, so every
+# column is a flat NumPy array. The tables are built by one policy_analytics
+# walk and read the policy structure exactly as the reports do (logical
+# constraints and refinements included); the diversity, conflict,
+# contradiction and duplicate-uid reports are then group-bys over codes.
+# Tables are stored as a compressed .npz, or as Parquet when pyarrow is
+# installed, and load back for cross-run comparisons.
+#
+# Usage: python src/templates/constraint_table.py corpus.json [...] -o outputs/tables/corpus.npz [--report]
+# ----------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from policy_analytics import (LOWER_BOUNDS, RULE_SECTIONS, UPPER_BOUNDS, Constraint, PolicyVisitor, Rule,
+                              bound_value, local_name, term, walk)
+from utils import iter_policies
+
+# Optional Parquet storage
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DICTIONARIES = ("uids", "types", "actions", "targets", "parties", "operands", "operators", "values")
+
+# Table -> column -> (NumPy dtype, dictionary the codes refer to or None)
+SCHEMA: Dict[str, Dict[str, Tuple[str, Any]]] = {
+    "policies": {"uid": ("i4", "uids"), "type": ("i4", "types")},
+    "rules": {"policy": ("i4", None), "section": ("i1", None), "index": ("i4", None),
+              "target": ("i4", "targets"), "assignee": ("i4", "parties"), "assigner": ("i4", "parties")},
+    "actions": {"rule": ("i4", None), "action": ("i4", "actions")},
+    "constraints": {"rule": ("i4", None), "left": ("i4", "operands"), "operator": ("i4", "operators"),
+                    "value": ("i4", "values"),
+                    "bound": ("f8", None),        # Numeric / timestamp form of the value, NaN if none
+                    "kind": ("i1", None),         # 0 number, 1 date/time, -1 neither
+                    "refinement": ("?", None),
+                    "conjunctive": ("?", None),   # Not under an or / xone
+                    "depth": ("i1", None)},       # Number of enclosing logical constraints
+}
+ARRAY_TYPES = {"i4": "i", "i1": "b", "f8": "d", "?": "b"}
+
+# ----------------------------------------------------------------------------
+# Dictionary Encoding
+# ----------------------------------------------------------------------------
+
+def key(value: Any) -> str:
+    """String key of a term: its canonical JSON, so "5" and 5 (or "null" and None) stay distinct."""
+    return json.dumps(value, sort_keys=True)
+
+class Dictionary:
+    """Term -> integer code, assigned in order of first appearance."""
+
+    def __init__(self, values: List[str] = ()):
+        self.values: List[str] = list(values)
+        self.codes: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, value: Any) -> int:
+        k = key(value)
+        code = self.codes.get(k)
+        if code is None:
+            code = self.codes[k] = len(self.values)
+            self.values.append(k)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+# ----------------------------------------------------------------------------
+# Tables
+# ----------------------------------------------------------------------------
+
+class CorpusTables:
+    """Columnar policies / rules / actions / constraints tables with their dictionaries.
+
+    `tables[name][column]` is a NumPy array; `dictionaries[name]` is a list of
+    term keys (see `key`), indexed by the codes stored in the columns.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, np.ndarray]], dictionaries: Dict[str, List[str]]):
+        self.tables = tables
+        self.dictionaries = dictionaries
+
+    def __getitem__(self, table: str) -> Dict[str, np.ndarray]:
+        return self.tables[table]
+
+    def terms(self, dictionary: str) -> List[Any]:
+        """The decoded terms of a dictionary, indexed by code."""
+        return [json.loads(k) for k in self.dictionaries[dictionary]]
+
+    def decode(self, dictionary: str, codes) -> List[Any]:
+        keys = self.dictionaries[dictionary]
+        return [json.loads(keys[c]) for c in np.asarray(codes).tolist()]
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: len(next(iter(columns.values()))) for name, columns in self.tables.items()}
+
+    def save(self, path: str) -> None:
+        """Write .npz (compressed), or .parquet (a directory of one file per table plus the dictionaries)."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if path.endswith(".parquet"):
+            if pa is None:
+                raise RuntimeError("Parquet storage requires the 'pyarrow' package")
+            Path(path).mkdir(exist_ok=True)
+            for name, columns in self.tables.items():
+                pq.write_table(pa.table(columns), str(Path(path) / f"{name}.parquet"))
+            rows = [(name, code, value) for name, values in self.dictionaries.items()
+                    for code, value in enumerate(values)]
+            pq.write_table(pa.table({"dictionary": [r[0] for r in rows], "code": [r[1] for r in rows],
+                                     "value": [r[2] for r in rows]}),
+                           str(Path(path) / "dictionaries.parquet"))
+            return
+        arrays = {f"{name}/{column}": values for name, columns in self.tables.items()
+                  for column, values in columns.items()}
+        arrays.update({f"dict/{name}": np.array(values, dtype=str) for name, values in self.dictionaries.items()})
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "CorpusTables":
+        if path.endswith(".parquet"):
+            if pa is None:
+                raise RuntimeError("Parquet storage requires the 'pyarrow' package")
+            tables = {name: {column: pq.read_table(str(Path(path) / f"{name}.parquet"), columns=[column])
+                             .column(0).to_numpy().astype(dtype)
+                             for column, (dtype, _) in columns.items()}
+                      for name, columns in SCHEMA.items()}
+            rows = pq.read_table(str(Path(path) / "dictionaries.parquet")).to_pydict()
+            dictionaries = {name: [] for name in DICTIONARIES}
+            for name, value in zip(rows["dictionary"], rows["value"]):  # Written in code order
+                dictionaries[name].append(value)
+            return cls(tables, dictionaries)
+        with np.load(path) as data:
+            tables = {name: {column: data[f"{name}/{column}"] for column in columns}
+                      for name, columns in SCHEMA.items()}
+            dictionaries = {name: data[f"dict/{name}"].tolist() for name in DICTIONARIES}
+        return cls(tables, dictionaries)
+
+class TableBuilder(PolicyVisitor):
+    """Collector appending every visited policy, rule, action and constraint as table rows."""
+
+    def __init__(self):
+        self.dictionaries = {name: Dictionary() for name in DICTIONARIES}
+        self.columns = {name: {column: array(ARRAY_TYPES[dtype]) for column, (dtype, _) in columns.items()}
+                        for name, columns in SCHEMA.items()}
+        self._policy = -1
+        self._rule = -1
+
+    def _encode(self, name: str, value: Any) -> int:
+        return self.dictionaries[name].encode(value)
+
+    def start_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        self._policy += 1
+        row = self.columns["policies"]
+        row["uid"].append(self._encode("uids", term(policy.get("uid"))))
+        row["type"].append(self._encode("types", term(policy.get("@type", "Unknown"))))
+
+    def visit_rule(self, rule: Rule) -> None:
+        self._rule += 1
+        row = self.columns["rules"]
+        row["policy"].append(self._policy)
+        row["section"].append(RULE_SECTIONS.index(rule.section))
+        row["index"].append(rule.index)
+        row["target"].append(self._encode("targets", rule.target))
+        row["assignee"].append(self._encode("parties", rule.assignee))
+        row["assigner"].append(self._encode("parties", rule.assigner))
+        for action in rule.actions:
+            self.columns["actions"]["rule"].append(self._rule)
+            self.columns["actions"]["action"].append(self._encode("actions", action))
+
+    def visit_constraint(self, rule: Rule, constraint: Constraint) -> None:
+        row = self.columns["constraints"]
+        bound = bound_value(constraint.right)
+        row["rule"].append(self._rule)
+        row["left"].append(self._encode("operands", constraint.left))
+        row["operator"].append(self._encode("operators", constraint.operator))
+        row["value"].append(self._encode("values", constraint.right))
+        row["bound"].append(float("nan") if bound is None else bound[1])
+        row["kind"].append(-1 if bound is None else bound[0])
+        row["refinement"].append(constraint.scope == "refinement")
+        row["conjunctive"].append(constraint.conjunctive)
+        row["depth"].append(len(constraint.logical))
+
+    def tables(self) -> CorpusTables:
+        tables = {name: {column: np.frombuffer(values, dtype=ARRAY_TYPES[SCHEMA[name][column][0]])
+                         .astype(SCHEMA[name][column][0])
+                         for column, values in columns.items()}
+                  for name, columns in self.columns.items()}
+        return CorpusTables(tables, {name: d.values for name, d in self.dictionaries.items()})
+
+def build_tables(source) -> CorpusTables:
+    """Tables for a policy file (JSON/JSONL), shard manifest or iterable of policies."""
+    builder = TableBuilder()
+    walk(iter_policies(source), builder)
+    return builder.tables()
+
+# ----------------------------------------------------------------------------
+# Vectorized Reports
+# ----------------------------------------------------------------------------
+
+def value_counts(tables: CorpusTables, table: str, column: str) -> List[Tuple[Any, int]]:
+    """(term, count) pairs of a dictionary-encoded column, most common first (ties in first-seen order)."""
+    counts = np.bincount(tables[table][column], minlength=len(tables.dictionaries[SCHEMA[table][column][1]]))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    return list(zip(tables.decode(SCHEMA[table][column][1], order), counts[order].tolist()))
+
+def diversity(tables: CorpusTables) -> Dict:
+    """The DiversityAccumulator summary, from the tables."""
+    types = np.bincount(tables["policies"]["type"], minlength=len(tables.dictionaries["types"]))
+    sections = np.bincount(tables["rules"]["section"], minlength=len(RULE_SECTIONS))
+    used = lambda table, column: len(np.unique(tables[table][column]))
+    return {
+        "policy_types": dict(zip(tables.terms("types"), types.tolist())),
+        "unique_actions": used("actions", "action"),
+        "unique_operands": used("constraints", "left"),
+        "unique_operators": used("constraints", "operator"),
+        "rule_type_distribution": (dict(zip(RULE_SECTIONS, sections.tolist()))
+                                   if len(tables["policies"]["uid"]) else {}),
+    }
+
+def duplicate_uids(tables: CorpusTables) -> List[Any]:
+    """Every repeated occurrence of a policy uid, in corpus order."""
+    uids = tables["policies"]["uid"]
+    _, first = np.unique(uids, return_index=True)
+    repeated = np.ones(len(uids), dtype=bool)
+    repeated[first] = False
+    return tables.decode("uids", uids[repeated])
+
+def _groups(*columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Group id of each row over the given key columns, and each group's first row; groups in first-seen order."""
+    if not len(columns[0]):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    _, first, inverse = np.unique(np.stack(columns, axis=1), axis=0, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+    return rank[inverse.reshape(-1)], np.sort(first)
+
+def conflicts(tables: CorpusTables) -> List[Dict[str, Any]]:
+    """Permissions and prohibitions on the same (target, assignee) within a policy."""
+    rules = tables["rules"]
+    rows = np.flatnonzero(rules["section"] <= RULE_SECTIONS.index("prohibition"))
+    group, first = _groups(rules["policy"][rows], rules["target"][rows], rules["assignee"][rows])
+    has = np.zeros((len(first), 2), dtype=bool)
+    has[group, rules["section"][rows]] = True
+    hits = rows[first[has.all(axis=1)]]
+    return [{"policy_index": int(p) + 1, "target": t, "assignee": a}
+            for p, t, a in zip(rules["policy"][hits].tolist(), tables.decode("targets", rules["target"][hits]),
+                               tables.decode("parties", rules["assignee"][hits]))]
+
+def contradictions(tables: CorpusTables) -> List[Tuple[int, str, Any, List[Tuple[Any, str]]]]:
+    """ContradictionCollector findings (policy index, rule label, operand, constraints), from the tables."""
+    c, rules = tables["constraints"], tables["rules"]
+    operators = [local_name(op) for op in tables.terms("operators")]
+
+    def blank(column: str) -> np.ndarray:
+        terms = tables.terms(SCHEMA["constraints"][column][1])
+        return np.isin(c[column], [i for i, t in enumerate(terms) if not t])
+
+    rows = np.flatnonzero(c["conjunctive"] & ~blank("left") & ~blank("operator"))
+    group, first = _groups(c["rule"][rows], c["left"][rows])
+    n = len(first)
+
+    op = c["operator"][rows]
+    lower = np.array([o in LOWER_BOUNDS for o in operators] or [False])[op]
+    upper = np.array([o in UPPER_BOUNDS for o in operators] or [False])[op]
+    strict = np.array([LOWER_BOUNDS.get(o, UPPER_BOUNDS.get(o, False)) for o in operators] or [False])[op]
+    kind, value = c["kind"][rows], c["bound"][rows]
+
+    def any_of(mask: np.ndarray) -> np.ndarray:
+        out = np.zeros(n, dtype=bool)
+        out[group[mask]] = True
+        return out
+
+    flagged = np.zeros(n, dtype=bool)  # Only bounds of the same kind are compared
+    for k in (0, 1):
+        lo, up = lower & (kind == k), upper & (kind == k)
+        highest = np.full(n, -np.inf)
+        np.maximum.at(highest, group[lo], value[lo])
+        lowest = np.full(n, np.inf)
+        np.minimum.at(lowest, group[up], value[up])
+        strict_lo = any_of(lo & strict & (value == highest[group]))
+        strict_up = any_of(up & strict & (value == lowest[group]))
+        flagged |= (highest > lowest) | ((highest == lowest) & (strict_lo | strict_up))
+
+    findings = []
+    members = np.argsort(group, kind="stable")
+    starts = np.searchsorted(group[members], np.arange(n + 1))
+    for g in np.flatnonzero(flagged).tolist():
+        picked = rows[members[starts[g]:starts[g + 1]]]
+        rule = int(c["rule"][picked[0]])
+        label = f"{RULE_SECTIONS[rules['section'][rule]]}[{rules['index'][rule]}]"
+        findings.append((int(rules["policy"][rule]), label, tables.decode("operands", c["left"][picked[:1]])[0],
+                         [(operators[o], str(v)) for o, v in zip(c["operator"][picked].tolist(),
+                                                                 tables.decode("values", c["value"][picked]))]))
+    return findings
+
+# ----------------------------------------------------------------------------
+# Script Entry
+# ----------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export a policy corpus as columnar constraint tables.")
+    parser.add_argument("paths", nargs="+", help="Policy files (JSON/JSONL) or shard manifests")
+    parser.add_argument("-o", "--output", help="Tables file: .npz, or .parquet (requires pyarrow)")
+    parser.add_argument("--report", action="store_true", help="Print the vectorized reports")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables = build_tables(policy for path in args.paths for policy in iter_policies(path))
+    print(f"Built {tables.sizes()} in {time.perf_counter() - start:.2f}s")
+    if args.output:
+        tables.save(args.output)
+        print(f"Tables saved to: {args.output}")
+    if args.report:
+        start = time.perf_counter()
+        summary, dupes = diversity(tables), duplicate_uids(tables)
+        found, contradictory = conflicts(tables), contradictions(tables)
+        print(json.dumps(summary, indent=2))
+        print("Top actions:", value_counts(tables, "actions", "action")[:10])
+        print("Top operands:", value_counts(tables, "constraints", "left")[:10])
+        print(f"Duplicate uids: {len(dupes)}, conflicts: {len(found)}, contradictions: {len(contradictory)} "
+              f"({time.perf_counter() - start:.3f}s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
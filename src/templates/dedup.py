@@ -0,0 +1,129 @@
+# dedup.py
+# ----------------------------------------------------------------------------
+# Structural de-duplication for generated ODRL policies.
+# Policies are reduced to a canonical fingerprint of their structure (type,
+# rules, actions, targets, parties and constraint shape), ignoring uids and
+# concrete rightOperand values, and repeats are rejected at generation time.
+# ----------------------------------------------------------------------------
+
+import hashlib
+import json
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+RULE_SECTIONS = ["permission", "prohibition", "obligation"]
+LOGICAL_KEYS = ["and", "or", "xone"]
+
+# ----------------------------------------------------------------------------
+# Canonical Fingerprints
+# ----------------------------------------------------------------------------
+
+def constraint_shape(constraint: Dict[str, Any]) -> Any:
+    """Reduce a (possibly logical) constraint to its operand/operator shape."""
+    for key in LOGICAL_KEYS:
+        if key in constraint:
+            members = constraint[key]
+            members = members.get("@list", []) if isinstance(members, dict) else members
+            return [key, [constraint_shape(c) for c in members]]
+    return [constraint.get("leftOperand"), constraint.get("operator")]
+
+def structural_key(policy: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical structure of a policy (or envelope), without uid or values."""
+    odrl = policy.get("odrl", policy)
+    key = {"type": odrl.get("@type")}
+    for section in RULE_SECTIONS:
+        rules = [
+            [rule.get("action"), rule.get("target"), rule.get("assigner"), rule.get("assignee"),
+             [constraint_shape(c) for c in rule.get("constraint") or []]]
+            for rule in odrl.get(section, [])
+        ]
+        if rules:
+            key[section] = sorted(rules, key=lambda r: json.dumps(r, sort_keys=True))
+    return key
+
+def structural_fingerprint(policy: Dict[str, Any]) -> bytes:
+    """128-bit digest of a policy's canonical structure."""
+    canonical = json.dumps(structural_key(policy), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+# ----------------------------------------------------------------------------
+# Duplicate Filters
+# ----------------------------------------------------------------------------
+
+class Deduplicator(ABC):
+    """Base filter: counts accepted/rejected policies; subclasses decide what was seen."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+
+    @abstractmethod
+    def _check_and_add(self, fingerprint: bytes) -> bool:
+        """Record a fingerprint; return False if it was (probably) seen before."""
+
+    def add(self, policy: Dict[str, Any]) -> bool:
+        """Record a policy; return False if its structure was already seen."""
+        is_new = self._check_and_add(structural_fingerprint(policy))
+        if is_new:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        return is_new
+
+class ExactDeduplicator(Deduplicator):
+    """Remembers every fingerprint; exact, memory grows with unique policies."""
+
+    def __init__(self):
+        super().__init__()
+        self._seen = set()
+
+    def _check_and_add(self, fingerprint: bytes) -> bool:
+        if fingerprint in self._seen:
+            return False
+        self._seen.add(fingerprint)
+        return True
+
+class BloomDeduplicator(Deduplicator):
+    """Fixed-memory Bloom filter over fingerprints for very large runs.
+
+    A false positive rejects a unique policy with probability ~error_rate;
+    duplicates are never accepted.
+    """
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        super().__init__()
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _check_and_add(self, fingerprint: bytes) -> bool:
+        # Double hashing: derive all probe positions from the two digest halves
+        h1 = int.from_bytes(fingerprint[:8], "big")
+        h2 = int.from_bytes(fingerprint[8:], "big") | 1
+        is_new = False
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                is_new = True
+        return is_new
+
+DEDUP_MODES = ["none", "exact", "bloom"]
+
+def make_deduplicator(mode: str, capacity: int = 10_000_000, error_rate: float = 0.001) -> Optional[Deduplicator]:
+    """Build the filter for a --dedup mode, or None when disabled."""
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return ExactDeduplicator()
+    if mode == "bloom":
+        return BloomDeduplicator(capacity, error_rate)
+    raise ValueError(f"Unknown dedup mode: {mode}")
+
+def dedup_stream(policies: Iterable[Dict[str, Any]], deduplicator: Optional[Deduplicator]) -> Iterator[Dict[str, Any]]:
+    """Yield only structurally new policies (everything if no filter is given)."""
+    for policy in policies:
+        if deduplicator is None or deduplicator.add(policy):
+            yield policy
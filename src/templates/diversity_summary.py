@@ -5,91 +5,105 @@
 # ----------------------------------------------------------------------------
 
 from collections import Counter
-from typing import Dict, List
+from typing import Dict, Iterable, Union
 import matplotlib.pyplot as plt
 import os
 import json
+from utils import iter_policies
+from policy_analytics import RULE_SECTIONS, Constraint, PolicyVisitor, Rule, term, walk_policy
+
+# Policies may be given as a list, any iterable/stream, or a path to a
+# JSON/JSONL file or shard manifest; each is walked exactly once.
+PolicySource = Union[str, Iterable[Dict]]
+
+# ----------------------------------------------------------------------------
+# Diversity Counters
+# ----------------------------------------------------------------------------
+
+class DiversityAccumulator(PolicyVisitor):
+    """Running diversity counters, fed one policy at a time.
+
+    A policy_analytics collector: `add` walks a policy once, counting actions
+    by name and the operands and operators of every atomic constraint,
+    refinements and members of logical constraints included. Partial states
+    are mergeable and JSON-serializable, so a generation checkpoint (or a
+    shard) can carry them and resume or combine later.
+    """
+
+    FIELDS = ["policy_types", "actions", "operands", "operators", "rule_types"]
+
+    def __init__(self):
+        self.policy_types = Counter()
+        self.actions = Counter()
+        self.operands = Counter()
+        self.operators = Counter()
+        self.rule_types = Counter()
+
+    def add(self, policy: Dict) -> None:
+        walk_policy(0, policy, [self])
+
+    def start_policy(self, index: int, policy: Dict) -> None:
+        self.policy_types[term(policy.get("@type", "Unknown"))] += 1
+        for section in RULE_SECTIONS:
+            self.rule_types[section] += 0  # Every section is listed, even when unused
+
+    def visit_rule(self, rule: Rule) -> None:
+        self.rule_types[rule.section] += 1
+        self.actions.update(rule.actions)
+
+    def visit_constraint(self, rule: Rule, constraint: Constraint) -> None:
+        self.operands[constraint.left] += 1
+        self.operators[constraint.operator] += 1
+
+    def update(self, policies: PolicySource) -> "DiversityAccumulator":
+        for policy in iter_policies(policies):
+            self.add(policy)
+        return self
+
+    def merge(self, other: "DiversityAccumulator") -> "DiversityAccumulator":
+        for field in self.FIELDS:
+            getattr(self, field).update(getattr(other, field))
+        return self
+
+    def to_dict(self) -> Dict:
+        # [key, count] pairs keep non-string keys (e.g. None for a constraint without leftOperand) intact
+        return {field: [[k, v] for k, v in getattr(self, field).items()] for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "DiversityAccumulator":
+        acc = cls()
+        for field in cls.FIELDS:
+            getattr(acc, field).update({k: v for k, v in state.get(field, [])})
+        return acc
+
+    def summary(self) -> Dict:
+        return {
+            "policy_types": dict(self.policy_types),
+            "unique_actions": len(self.actions),
+            "unique_operands": len(self.operands),
+            "unique_operators": len(self.operators),
+            "rule_type_distribution": dict(self.rule_types)
+        }
+
+def _accumulate(policies: Union[PolicySource, DiversityAccumulator]) -> DiversityAccumulator:
+    if isinstance(policies, DiversityAccumulator):
+        return policies
+    return DiversityAccumulator().update(policies)
 
 # ----------------------------------------------------------------------------
 # Compute Diversity Metrics
 # ----------------------------------------------------------------------------
 
-def compute_diversity(policies: List[Dict]) -> Dict:
-    policy_types = Counter()
-    actions = set()
-    operands = set()
-    operators = set()
-    rule_type_counts = Counter()
-
-    for policy in policies:
-        odrl = policy.get("odrl", {})
-        policy_types[odrl.get("@type", "Unknown")] += 1
-
-        for section in ["permission", "prohibition", "obligation"]:
-            rule_type_counts[section] += len(odrl.get(section, []))
-            for rule in odrl.get(section, []):
-                act = rule.get("action")
-                if isinstance(act, dict):
-                    actions.add(act.get("rdf:value"))
-                    for r in act.get("refinement", []):
-                        operands.add(r.get("leftOperand"))
-                        operators.add(r.get("operator"))
-                else:
-                    actions.add(act)
-
-                for c in rule.get("constraint", []):
-                    if any(k in c for k in ["xone", "and", "or"]):
-                        for group in [c.get(k, {}).get("@list", []) for k in ["xone", "and", "or"] if k in c]:
-                            for sub in group:
-                                operands.add(sub.get("leftOperand"))
-                                operators.add(sub.get("operator"))
-                    else:
-                        operands.add(c.get("leftOperand"))
-                        operators.add(c.get("operator"))
-
-    return {
-        "policy_types": dict(policy_types),
-        "unique_actions": len(actions),
-        "unique_operands": len(operands),
-        "unique_operators": len(operators),
-        "rule_type_distribution": dict(rule_type_counts)
-    }
+def compute_diversity(policies: Union[PolicySource, DiversityAccumulator]) -> Dict:
+    return _accumulate(policies).summary()
 
 # ----------------------------------------------------------------------------
 # Generate Diversity Visualizations
 # ----------------------------------------------------------------------------
 
-def plot_diversity(policies: List[Dict], save_dir: str = "outputs/plots") -> None:
+def plot_diversity(policies: Union[PolicySource, DiversityAccumulator], save_dir: str = "outputs/plots") -> None:
     os.makedirs(save_dir, exist_ok=True)
-
-    action_counter = Counter()
-    operand_counter = Counter()
-    operator_counter = Counter()
-    rule_type_counter = Counter()
-
-    for policy in policies:
-        odrl = policy.get("odrl", {})
-        for section in ["permission", "prohibition", "obligation"]:
-            rule_type_counter[section] += len(odrl.get(section, []))
-            for rule in odrl.get(section, []):
-                act = rule.get("action")
-                if isinstance(act, dict):
-                    action_counter[act.get("rdf:value")] += 1
-                    for r in act.get("refinement", []):
-                        operand_counter[r.get("leftOperand")] += 1
-                        operator_counter[r.get("operator")] += 1
-                else:
-                    action_counter[act] += 1
-
-                for c in rule.get("constraint", []):
-                    if any(k in c for k in ["xone", "and", "or"]):
-                        for group in [c.get(k, {}).get("@list", []) for k in ["xone", "and", "or"] if k in c]:
-                            for sub in group:
-                                operand_counter[sub.get("leftOperand")] += 1
-                                operator_counter[sub.get("operator")] += 1
-                    else:
-                        operand_counter[c.get("leftOperand")] += 1
-                        operator_counter[c.get("operator")] += 1
+    acc = _accumulate(policies)
 
     def plot_counter(counter: Counter, title: str, filename: str, top_n: int = 10):
         items = counter.most_common(top_n)
@@ -102,16 +116,16 @@ def plot_diversity(policies: List[Dict], save_dir: str = "outputs/plots") -> Non
         plt.savefig(os.path.join(save_dir, filename))
         plt.close()
 
-    plot_counter(action_counter, "Top Actions", "actions.png")
-    plot_counter(operand_counter, "Top Constraint Operands", "operands.png")
-    plot_counter(operator_counter, "Top Constraint Operators", "operators.png")
-    plot_counter(rule_type_counter, "Rule Type Distribution", "rule_types.png")
+    plot_counter(acc.actions, "Top Actions", "actions.png")
+    plot_counter(acc.operands, "Top Constraint Operands", "operands.png")
+    plot_counter(acc.operators, "Top Constraint Operators", "operators.png")
+    plot_counter(acc.rule_types, "Rule Type Distribution", "rule_types.png")
 
 # ----------------------------------------------------------------------------
 # Markdown Summary
 # ----------------------------------------------------------------------------
 
-def save_diversity_summary(policies: List[Dict], path: str = "outputs/reports/diversity_summary.md") -> None:
+def save_diversity_summary(policies: Union[PolicySource, DiversityAccumulator], path: str = "outputs/reports/diversity_summary.md") -> None:
     stats = compute_diversity(policies)
 
     with open(path, "w", encoding="utf-8") as f:
@@ -3,33 +3,67 @@
 # Main script for generating synthetic ODRL policies from templates.
 # Includes enhancement to natural language, validation report,
 # diversity summary, and visualizations.
+#
+# Generation is split into fixed-size shards, each seeded from the base seed
+# and its shard index, so a fixed --seed yields the same corpus regardless
+# of how many --workers are used. Policies are streamed to disk one at a
+# time (JSON or JSONL, optionally compressed), so memory stays constant.
+# A single-process run appends to a JSONL journal with a checkpoint record
+# after every shard; --resume continues from the last checkpoint and yields
+# exactly the corpus an uninterrupted run would have written.
+# With --coverage-target, a single coverage-directed stream replaces the
+# shards and stops as soon as the target cell coverage is reached.
+# In-process generation hands each policy straight to the report pipeline,
+# which validates it once and feeds the same pass to the diversity summary
+# and plots; only the merged corpus of a pooled run is read back, once.
 # ----------------------------------------------------------------------------
 
-from template_builder import template_json_variant
-from text_summarizer import enhance_policy
-from utils import load_config, generate_policy_id, save_json, log
-from report_generator import generate_report
-from diversity_summary import plot_diversity, save_diversity_summary
+import argparse
 import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from template_builder import template_json_variant, template_json_variants, coverage_directed_variants, CoverageTracker
+from text_summarizer import enhance_policy, enhance_policies
+from utils import (
+    load_config, generate_policy_id, load_json, save_json, log, set_seed, derive_seed, PolicyWriter, iter_policies,
+    ID_STRATEGIES, make_id_allocator, set_id_allocator, CHECKPOINT_KEY, recover_journal
+)
+from dedup import DEDUP_MODES, make_deduplicator, dedup_stream
+from report_generator import ReportPipeline
+from validation_cache import CACHE_PATH, ValidationCache
+from shapes_registry import INFERENCE_MODES, resolve_inference, set_default_inference
+from diversity_summary import DiversityAccumulator
 
 # ----------------------------------------------------------------------------
 # Configuration
 # ----------------------------------------------------------------------------
 
-config = load_config("config/config.yml")
-n = config.get("num_policies", 50)
+CONFIG_FILE = "config/config.yml"
+DEFAULT_SHARD_SIZE = 10000
+BATCH_SIZE = 1000  # Policies drawn per template_json_variants call in --vectorized mode
+
+# Per-shard generation switches, shared by the in-process and pooled paths
+DEFAULT_OPTIONS = {
+    "vectorized": False,
+    "id_strategy": "seeded"
+}
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
 
 # Structured output paths
 OUTPUT_DIR = "outputs"
 POLICIES_DIR = os.path.join(OUTPUT_DIR, "policies")
 REPORTS_DIR = os.path.join(OUTPUT_DIR, "reports")
 PLOTS_DIR = os.path.join(OUTPUT_DIR, "plots")
+SHARDS_DIR = os.path.join(POLICIES_DIR, "shards")
 
-os.makedirs(POLICIES_DIR, exist_ok=True)
-os.makedirs(REPORTS_DIR, exist_ok=True)
-os.makedirs(PLOTS_DIR, exist_ok=True)
+SHARD_PARAMS_FILE = os.path.join(SHARDS_DIR, "params.json")  # Run parameters of the shard files, for --resume
 
-POLICY_FILE = os.path.join(POLICIES_DIR, "template_based_policies.json")
+MANIFEST_FILE = os.path.join(POLICIES_DIR, "template_based_policies.manifest.json")
+JOURNAL_FILE = os.path.join(POLICIES_DIR, "template_based_policies.journal.jsonl")
 REPORT_FILE = os.path.join(REPORTS_DIR, "template_validation_report.md")
 DIVERSITY_FILE = os.path.join(REPORTS_DIR, "diversity_summary.md")
 
@@ -37,28 +71,316 @@ DIVERSITY_FILE = os.path.join(REPORTS_DIR, "diversity_summary.md")
 # Policy Generation
 # ----------------------------------------------------------------------------
 
-template_based_policies = []
-
-for _ in range(n):
+def generate_policy(config):
+    """Generate a single template-based policy enhanced with text."""
     policy_id = generate_policy_id()
     odrl = template_json_variant(policy_id, config)
     raw_policy = {
         "id": policy_id,
         "odrl": odrl
     }
-    enhanced_policy = enhance_policy(raw_policy)
-    template_based_policies.append(enhanced_policy)
+    return enhance_policy(raw_policy)
+
+def iter_shard(shard_index, count, seed, config, options=DEFAULT_OPTIONS):
+    """Yield the policies of one shard, seeded from the base seed and shard index."""
+    shard_seed = derive_seed(seed, shard_index)
+    set_seed(shard_seed)
+    set_id_allocator(make_id_allocator(options["id_strategy"], seed, shard_index))
+    if not options["vectorized"]:
+        for _ in range(count):
+            yield generate_policy(config)
+        return
+
+    rng = np.random.default_rng(shard_seed)
+    raw_policies = (
+        {"id": generate_policy_id(), "odrl": odrl}
+        for start in range(0, count, BATCH_SIZE)
+        for odrl in template_json_variants(min(BATCH_SIZE, count - start), config, rng)
+    )
+    yield from enhance_policies(raw_policies, np.random.default_rng(derive_seed(shard_seed, "text")))
+
+def generate_shard(shard_index, count, seed, config, shard_path, options=DEFAULT_OPTIONS):
+    """Stream one shard of policies to its own output file.
+
+    The shard is written under a temporary name and renamed when complete,
+    so an existing shard file is always a finished one. The temporary name
+    keeps the shard's suffixes, so it is compressed the same way.
+    """
+    partial_path = str(Path(shard_path).with_name("partial-" + Path(shard_path).name))
+    with PolicyWriter(partial_path) as writer:
+        for policy in iter_shard(shard_index, count, seed, config, options):
+            writer.write(policy)
+    os.replace(partial_path, shard_path)
+    return {
+        "shard": shard_index,
+        "path": shard_path,
+        "count": writer.count,
+        "seed": derive_seed(seed, shard_index)
+    }
+
+def plan_shards(n, shard_size):
+    """Split n policies into (shard_index, count) tasks of at most shard_size."""
+    return [(i, min(shard_size, n - start)) for i, start in enumerate(range(0, n, shard_size))]
+
+def merge_shards(shard_paths, output_path, deduplicator):
+    """Stream shards in order into one corpus file, dropping structural duplicates with a deduplicator."""
+    with PolicyWriter(output_path) as writer:
+        policies = (policy for path in shard_paths for policy in iter_policies(path))
+        for policy in dedup_stream(policies, deduplicator):
+            writer.write(policy)
+    for path in shard_paths:
+        os.remove(path)
+    return writer.count
+
+def run_pool(config, n, seed, output_path, workers, shard_size=DEFAULT_SHARD_SIZE,
+             options=DEFAULT_OPTIONS, deduplicator=None, resume=False):
+    """Generate shards in a process pool and return (shard records, output files).
+
+    Each shard is written to its own file under SHARDS_DIR, next to the run
+    parameters. When resuming, shards whose files already exist are kept
+    rather than regenerated (and counted from the files), provided they were
+    written with the same parameters. The shards are then merged in order into `output_path` (the path downstream
+    scripts read) and removed; with a deduplicator, duplicates are dropped
+    while merging, so the result is the same as a single-process run.
+    """
+    suffix = "".join(Path(output_path).suffixes)
+    tasks = [(index, count, os.path.join(SHARDS_DIR, f"shard-{index:05d}{suffix}"))
+             for index, count in plan_shards(n, shard_size)]
+    params = {"seed": seed, "num_policies": n, "shard_size": shard_size, **options}
+    if resume and any(os.path.exists(path) for _, _, path in tasks):
+        if not os.path.exists(SHARD_PARAMS_FILE):
+            raise ValueError(f"Cannot resume the shards in {SHARDS_DIR}: their run parameters were not recorded")
+        written_with = load_json(SHARD_PARAMS_FILE)
+        if written_with != params:
+            raise ValueError(f"Cannot resume the shards in {SHARDS_DIR}: they were written with {written_with}")
+    else:
+        resume = False
+    save_json(SHARD_PARAMS_FILE, params)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            None if resume and os.path.exists(path) else
+            pool.submit(generate_shard, index, count, seed, config, path, options)
+            for index, count, path in tasks
+        ]
+        shards = [
+            future.result() if future else
+            {"shard": index, "path": path, "count": sum(1 for _ in iter_policies(path)),
+             "seed": derive_seed(seed, index)}
+            for future, (index, count, path) in zip(futures, tasks)
+        ]
+    merge_shards([shard.pop("path") for shard in shards], output_path, deduplicator)
+    os.remove(SHARD_PARAMS_FILE)
+    return shards, [output_path]
+
+def run_journal(config, n, seed, journal_path, shard_size=DEFAULT_SHARD_SIZE, options=DEFAULT_OPTIONS,
+                deduplicator=None, diversity=None, resume=False, pipeline=None):
+    """Generate all shards in one process, appending to a checkpointed journal.
 
-save_json(POLICY_FILE, template_based_policies)
-log(f"[✔] {len(template_based_policies)} template-based policies saved to {POLICY_FILE}.")
+    A checkpoint record follows every shard with the run parameters, the
+    RNG position (the next shard and its derived seed; each shard reseeds
+    both `random` and the id allocator from it), the counts so far and the
+    partial diversity counters. On resume the journal is truncated to its
+    last checkpoint, the dedup filter is rebuilt by replaying the kept
+    policies and generation continues with the next shard.
+
+    With a ReportPipeline, every kept policy is also handed to it for
+    validation as it is written (the kept policies of a resumed journal
+    first); its diversity counters are the ones checkpointed.
+    """
+    tasks = plan_shards(n, shard_size)
+    if diversity is None:
+        diversity = pipeline.diversity if pipeline is not None else DiversityAccumulator()
+    params = {"seed": seed, "num_policies": n, "shard_size": shard_size, **options,
+              "dedup": type(deduplicator).__name__ if deduplicator else None}
+    shards, written, generated = [], 0, 0
+
+    state = recover_journal(journal_path) if resume else None
+    if state is not None:
+        if state["params"] != params:
+            raise ValueError(f"Cannot resume {journal_path}: it was written with {state['params']}")
+        shards, written, generated = state["shards"], state["written"], state["generated"]
+        diversity.merge(DiversityAccumulator.from_dict(state["diversity"]))
+        if deduplicator or pipeline:
+            for policy in iter_policies(journal_path):
+                if deduplicator:
+                    deduplicator.add(policy)
+                if pipeline:
+                    pipeline.validate(policy)
+        if deduplicator:
+            deduplicator.accepted, deduplicator.rejected = written, generated - written
+        log(f"[↻] Resuming {journal_path} at shard {len(shards)} ({written} policies kept).")
+
+    with PolicyWriter(journal_path, append=state is not None) as writer:
+        for index, count in tasks[len(shards):]:
+            for policy in dedup_stream(iter_shard(index, count, seed, config, options), deduplicator):
+                writer.write(policy)
+                diversity.add(policy)
+                if pipeline:
+                    pipeline.validate(policy)
+            generated += count
+            shards.append({"shard": index, "count": count, "seed": derive_seed(seed, index)})
+            writer.write_checkpoint({
+                "params": params,
+                "rng": {"next_shard": index + 1, "next_seed": derive_seed(seed, index + 1)},
+                "shards": shards,
+                "generated": generated,
+                "written": written + writer.count,
+                "diversity": diversity.to_dict()
+            })
+    return shards
+
+def finalize_journal(journal_path, output_path):
+    """Copy the journal's policies (without checkpoints) to the corpus file, then drop it."""
+    if output_path.endswith(".jsonl"):
+        marker = '{"' + CHECKPOINT_KEY + '"'
+        with open(journal_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as dst:
+            dst.writelines(line for line in src if not line.startswith(marker))
+    else:
+        with PolicyWriter(output_path) as writer:
+            for policy in iter_policies(journal_path):
+                writer.write(policy)
+    os.remove(journal_path)
+
+def run_coverage(config, max_policies, seed, output_path, target, bias=0.8,
+                 options=DEFAULT_OPTIONS, deduplicator=None, pipeline=None):
+    """Generate coverage-directed policies until `target` coverage or `max_policies`.
+
+    Coverage steering depends on every earlier policy, so this path always
+    runs in a single process (--workers then only applies to validation).
+    Returns the tracker with the final counts and the number of policies
+    generated (before de-duplication). Written policies are also handed to
+    the optional ReportPipeline.
+    """
+    set_seed(derive_seed(seed, "coverage"))
+    set_id_allocator(make_id_allocator(options["id_strategy"], seed, 0))
+    tracker = CoverageTracker(config)
+    policies = (
+        enhance_policy({"id": generate_policy_id(), "odrl": odrl})
+        for odrl in coverage_directed_variants(config, target, max_policies, bias, tracker)
+    )
+    with PolicyWriter(output_path) as writer:
+        for policy in dedup_stream(policies, deduplicator):
+            writer.write(policy)
+            if pipeline:
+                pipeline.add(policy)
+    return tracker, writer.count + (deduplicator.rejected if deduplicator else 0)
+
+def policy_file_path(output_format, compression):
+    """Resolve the corpus path for the chosen output format and compression."""
+    path = os.path.join(POLICIES_DIR, f"template_based_policies.{output_format}")
+    return path + COMPRESSION_SUFFIXES[compression]
 
 # ----------------------------------------------------------------------------
-# Reports and Visualizations
+# Main Entry
 # ----------------------------------------------------------------------------
 
-generate_report(POLICY_FILE, REPORT_FILE)
-save_diversity_summary(template_based_policies, DIVERSITY_FILE)
-plot_diversity(template_based_policies, save_dir=PLOTS_DIR)
+def main():
+    parser = argparse.ArgumentParser(description="Generate template-based ODRL policies.")
+    parser.add_argument("--config", type=str, default=CONFIG_FILE, help="Path to the generation config")
+    parser.add_argument("--num-policies", type=int, default=None, help="Override num_policies from the config")
+    parser.add_argument("--seed", type=int, default=None, help="Base seed; each shard derives its own seed from it")
+    parser.add_argument("--workers", type=int, default=1, help="Number of generator and validation processes")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Policies per output shard")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="Output format for the corpus")
+    parser.add_argument("--compress", choices=list(COMPRESSION_SUFFIXES), default="none",
+                        help="Compression for JSONL output")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="Draw policies in NumPy batches with template_json_variants")
+    parser.add_argument("--id-strategy", choices=ID_STRATEGIES, default="seeded",
+                        help="How policy ids/uids are allocated (seeded and counter are reproducible)")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="none",
+                        help="Reject structurally identical policies (bloom: fixed memory, tiny false-positive rate)")
+    parser.add_argument("--bloom-capacity", type=int, default=10_000_000, help="Expected unique policies for --dedup bloom")
+    parser.add_argument("--bloom-error-rate", type=float, default=0.001, help="False-positive rate for --dedup bloom")
+    parser.add_argument("--coverage-target", type=float, default=None,
+                        help="Steer sampling toward uncovered (asset type, action, operand, operator, kind) cells "
+                             "and stop once this fraction is covered; --num-policies becomes the upper bound")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its journal checkpoint (or finished shard files)")
+    parser.add_argument("--coverage-bias", type=float, default=0.8,
+                        help="Probability that a rule is retargeted onto an uncovered cell")
+    parser.add_argument("--validation-cache", type=str, default=CACHE_PATH,
+                        help="SQLite file caching validation results across runs")
+    parser.add_argument("--no-validation-cache", action="store_true", help="Validate every policy afresh")
+    parser.add_argument("--validation-details", type=str, default=None,
+                        help="JSONL file (optionally .gz/.zst) receiving every per-policy validation result")
+    parser.add_argument("--inference", choices=INFERENCE_MODES, default=resolve_inference(),
+                        help="Inference before SHACL validation (closure: precomputed, same results as rdfs)")
+    args = parser.parse_args()
+    set_default_inference(args.inference)
+    if args.compress != "none" and args.format != "jsonl":
+        parser.error("--compress requires --format jsonl")
+    if args.coverage_target is not None and args.resume:
+        parser.error("--coverage-target runs cannot be resumed")
+
+    config = load_config(args.config)
+    options = {"vectorized": args.vectorized, "id_strategy": args.id_strategy}
+    n = args.num_policies if args.num_policies is not None else config.get("num_policies", 50)
+    seed = args.seed if args.seed is not None else config.get("seed", random.randrange(2 ** 32))
+
+    os.makedirs(POLICIES_DIR, exist_ok=True)
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+
+    policy_file = policy_file_path(args.format, args.compress)
+    deduplicator = make_deduplicator(args.dedup, args.bloom_capacity, args.bloom_error_rate)
+    # Validation and diversity are fed straight from generation: the corpus is not read back to report on it
+    cache = None if args.no_validation_cache else ValidationCache(args.validation_cache)
+    pipeline = ReportPipeline(workers=args.workers, cache=cache, details_path=args.validation_details)
+    coverage = None
+    if args.coverage_target is not None:
+        tracker, n = run_coverage(config, n, seed, policy_file, args.coverage_target, args.coverage_bias,
+                                  options=options, deduplicator=deduplicator, pipeline=pipeline)
+        shards, files = [], [policy_file]
+        coverage = {"target": args.coverage_target, "bias": args.coverage_bias,
+                    "achieved": round(tracker.coverage, 4), "cells": len(tracker.universe)}
+    elif args.workers > 1:
+        shards, files = run_pool(config, n, seed, policy_file, args.workers, shard_size=args.shard_size,
+                                 options=options, deduplicator=deduplicator, resume=args.resume)
+        # Shards were generated in other processes, so the merged corpus is streamed back once
+        pipeline.update(iter_policies(policy_file))
+    else:
+        shards = run_journal(config, n, seed, JOURNAL_FILE, shard_size=args.shard_size, options=options,
+                             deduplicator=deduplicator, resume=args.resume, pipeline=pipeline)
+        finalize_journal(JOURNAL_FILE, policy_file)
+        files = [policy_file]
+    written = deduplicator.accepted if deduplicator else n
+    save_json(MANIFEST_FILE, {
+        "seed": seed,
+        "num_policies": n,
+        "shard_size": args.shard_size,
+        "workers": args.workers,
+        "format": args.format,
+        "compression": args.compress,
+        **options,
+        "dedup": args.dedup,
+        "written": written,
+        "duplicates_rejected": n - written,
+        "coverage": coverage,
+        "files": files,
+        "shards": shards
+    })
+    log(f"[✔] {written} template-based policies written to {len(files)} file(s), starting with {files[0]}.")
+    if deduplicator:
+        log(f"[✔] {deduplicator.rejected} structural duplicates rejected ({args.dedup}).")
+    if coverage:
+        log(f"[✔] Coverage {coverage['achieved']:.1%} of {coverage['cells']} cells (target {coverage['target']:.0%}).")
+    log(f"[✔] Manifest saved to {MANIFEST_FILE}.")
+
+    # ------------------------------------------------------------------------
+    # Reports and Visualizations
+    # ------------------------------------------------------------------------
+
+    # Every policy was validated and counted once; all reports share those results.
+    pipeline.finish(REPORT_FILE, DIVERSITY_FILE, PLOTS_DIR)
+    pipeline.close()
+    if cache is not None:
+        cache.close()
+
+    log(f"[✔] Diversity summary saved to {DIVERSITY_FILE}.")
+    log(f"[✔] Visualizations saved to {PLOTS_DIR}.")
+
 
-log(f"[✔] Diversity summary saved to {DIVERSITY_FILE}.")
-log(f"[✔] Visualizations saved to {PLOTS_DIR}.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# inference_benchmark.py
+# ----------------------------------------------------------------------------
+# Benchmarks the SHACL inference modes (rdfs, closure, none) on the policies
+# under outputs/, prepared as each validator prepares them, and checks that
+# every mode reaches the same conformance as full RDFS inference.
+#
+# --schema-variants adds copies of each document that carry RDFS schema
+# statements (subclass, domain and subproperty declarations), the only case
+# in which the modes can disagree: closure must still match rdfs, none is
+# expected not to.
+#
+# Usage: python src/templates/inference_benchmark.py [--schema-variants] [paths...]
+# Exits non-zero if the closure mode disagrees with rdfs.
+# ----------------------------------------------------------------------------
+
+import argparse
+import glob
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+
+from jsonld_loader import parse_jsonld
+from shapes_registry import INFERENCE_MODES, SHACL_PATH, get_closure, validate_against_shapes
+from shacl_differential import DEFAULT_CORPORA, PIPELINES, iter_corpus_policies
+
+ODRL = "http://www.w3.org/ns/odrl/2/"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+EX = "http://example.com/vocab/"
+
+# ----------------------------------------------------------------------------
+# Documents
+# ----------------------------------------------------------------------------
+
+def schema_variants(document: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Copies of a document whose conformance depends on RDFS entailment."""
+    uid = document.get("uid", "http://example.com/policy/x")
+    yield {**document, "@type": EX + "CustomPolicy",
+           EX + "meta": {"@id": EX + "CustomPolicy", RDFS + "subClassOf": {"@id": EX + "BasePolicy"},
+                         EX + "next": {"@id": EX + "BasePolicy", RDFS + "subClassOf": {"@id": ODRL + "Policy"}}}}
+    yield {**document, EX + "hasRule": "r1",
+           EX + "meta": {"@id": EX + "hasRule", RDFS + "domain": {"@id": ODRL + "Policy"}}}
+    yield {**document, "@type": ODRL + "Policy", EX + "identifier": {"@value": uid, "@type": "xsd:anyURI"},
+           EX + "meta": {"@id": EX + "identifier", RDFS + "subPropertyOf": {"@id": ODRL + "uid"}}}
+    yield {**document, EX + "grants": {EX + "what": "read"},
+           EX + "meta": {"@id": EX + "grants", RDFS + "range": {"@id": ODRL + "Permission"}}}
+
+def load_graphs(paths: List[str], with_schema: bool) -> List:
+    graphs = []
+    for _, policy in iter_corpus_policies(paths):
+        for build in PIPELINES.values():
+            try:
+                document = build(policy)
+            except Exception:
+                continue
+            documents = [document] + (list(schema_variants(document)) if with_schema else [])
+            graphs.extend(parse_jsonld(d) for d in documents)
+    return graphs
+
+# ----------------------------------------------------------------------------
+# Script Entry
+# ----------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SHACL inference modes.")
+    parser.add_argument("paths", nargs="*", help=f"Policy JSON files (default: {DEFAULT_CORPORA})")
+    parser.add_argument("--shapes", default=SHACL_PATH, help="SHACL shapes file")
+    parser.add_argument("--schema-variants", action="store_true",
+                        help="Also validate copies carrying RDFS schema statements")
+    args = parser.parse_args()
+
+    graphs = load_graphs(args.paths or sorted(glob.glob(DEFAULT_CORPORA, recursive=True)), args.schema_variants)
+    get_closure(args.shapes)  # one-off precomputation, excluded from the timings
+    results, timings = {}, {}
+    for mode in INFERENCE_MODES:
+        start = time.perf_counter()
+        results[mode] = [validate_against_shapes(g, args.shapes, mode)[0] for g in graphs]
+        timings[mode] = time.perf_counter() - start
+
+    baseline = results["rdfs"]
+    print(f"{len(graphs)} data graphs, {sum(baseline)} conforming under rdfs")
+    for mode in INFERENCE_MODES:
+        mismatches = sum(a != b for a, b in zip(results[mode], baseline))
+        print(f"{mode:8s} {timings[mode]:7.2f}s  {timings[mode] / len(graphs) * 1000:6.2f} ms/graph  "
+              f"x{timings['rdfs'] / timings[mode]:4.1f}  conformance mismatches vs rdfs: {mismatches}")
+    return 1 if results["closure"] != baseline else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
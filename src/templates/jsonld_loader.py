@@ -0,0 +1,99 @@
+# jsonld_loader.py
+# ----------------------------------------------------------------------------
+# Offline JSON-LD context loading.
+# Policies reference the ODRL context by URL ("http://www.w3.org/ns/odrl.jsonld"),
+# which rdflib would dereference over the network on every parse. Known
+# context URLs are instead resolved to bundled files (config/odrl_context.json),
+# each parsed once per process and inlined into the document before rdflib
+# sees it. All JSON-LD parsing in the repository goes through `parse_jsonld`.
+# ----------------------------------------------------------------------------
+
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Optional RDF support
+try:
+    from rdflib import Graph
+    RDF_AVAILABLE = True
+except ImportError:
+    RDF_AVAILABLE = False
+
+CONTEXT_PATH = "config/odrl_context.json"
+
+# Context URL -> bundled copy of the document it serves
+LOCAL_CONTEXTS: Dict[str, str] = {
+    "http://www.w3.org/ns/odrl.jsonld": CONTEXT_PATH,
+    "https://www.w3.org/ns/odrl.jsonld": CONTEXT_PATH,
+}
+
+# ----------------------------------------------------------------------------
+# Context Cache
+# ----------------------------------------------------------------------------
+
+_CONTEXTS: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+def load_local_context(path: str = CONTEXT_PATH) -> Any:
+    """The "@context" value of a bundled context file, parsed once (re-read if the file changes).
+
+    The returned object is shared between callers and must not be modified.
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _CONTEXTS.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        cached = _CONTEXTS[path] = (stamp, document["@context"] if isinstance(document, dict) else document)
+    return cached[1]
+
+def resolve_context(url: str) -> Optional[Any]:
+    """The bundled context for a known context URL, or None."""
+    path = LOCAL_CONTEXTS.get(url.rstrip("#"))
+    if path is None or not os.path.exists(path):
+        return None
+    return load_local_context(path)
+
+# ----------------------------------------------------------------------------
+# Document Rewriting
+# ----------------------------------------------------------------------------
+
+def _localize_context(context: Any) -> Any:
+    if isinstance(context, str):
+        local = resolve_context(context)
+        return context if local is None else local
+    if isinstance(context, list):
+        localized = [_localize_context(c) for c in context]
+        return context if all(a is b for a, b in zip(localized, context)) else localized
+    return context
+
+def localize_contexts(document: Any) -> Any:
+    """Return `document` with known remote @context URLs replaced by their bundled contexts.
+
+    Only objects on the path to a replaced context are copied; the input is
+    never modified and is returned as-is when nothing needed replacing.
+    """
+    if isinstance(document, list):
+        localized = [localize_contexts(item) for item in document]
+        return document if all(a is b for a, b in zip(localized, document)) else localized
+    if not isinstance(document, dict):
+        return document
+    changed = {}
+    for key, value in document.items():
+        new = _localize_context(value) if key == "@context" else localize_contexts(value)
+        if new is not value:
+            changed[key] = new
+    return {**document, **changed} if changed else document
+
+# ----------------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------------
+
+def parse_jsonld(document: Any, graph: Optional["Graph"] = None, **kwargs) -> "Graph":
+    """Parse a JSON-LD document (object or JSON text) into `graph` without fetching known contexts."""
+    if not RDF_AVAILABLE:
+        raise RuntimeError("JSON-LD parsing requires the 'rdflib' package")
+    if isinstance(document, (str, bytes)):
+        document = json.loads(document)
+    graph = graph if graph is not None else Graph()
+    return graph.parse(data=json.dumps(localize_contexts(document)), format="json-ld", **kwargs)
@@ -5,7 +5,9 @@
 # ----------------------------------------------------------------------------
 
 import random
-from utils import get_random_operand, get_random_operator, get_random_asset
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from utils import get_random_asset, AliasTable
 from value_factory import generate_right_operand
 
 # ----------------------------------------------------------------------------
@@ -34,37 +36,56 @@ ASSET_COMPATIBLE_OPERANDS = {
     "asset": ["dateTime", "elapsedTime", "percentage", "timeInterval", "absolutePosition", "version", "metering"]
 }
 
+# Ordered asset-type classifier: the first matching keyword wins
+ASSET_TYPE_KEYWORDS = [
+    ("photo", ["photo"]),
+    ("image", ["image", "img"]),
+    ("video", ["video", "clip"]),
+    ("movie", ["movie"]),
+    ("music", ["music", "track"]),
+    ("document", ["document"]),
+    ("text", ["text", "article"]),
+    ("data", ["data", "dataset"]),
+]
+
+# Operand data types; earlier groups take precedence for operands listed twice
+OPERAND_TYPE_GROUPS = [
+    ("string", ["language", "media", "purpose", "deliveryChannel", "systemDevice", "event", "fileFormat"]),
+    ("number", ["percentage", "count", "payAmount", "elapsedTime", "unitOfCount", "delayPeriod"]),
+    ("uri", ["recipient", "product", "industry", "virtualLocation", "absolutePosition", "relativePosition",
+             "absoluteSpatialPosition", "relativeSpatialPosition", "relativeTemporalPosition", "absoluteTemporalPosition"]),
+    ("datetime", ["dateTime", "timeInterval", "absoluteTemporalPosition"]),
+    ("boolean", ["metering"]),
+]
+OPERAND_TYPES = {
+    operand: dtype
+    for dtype, operands in reversed(OPERAND_TYPE_GROUPS)
+    for operand in operands
+}
+
 # ----------------------------------------------------------------------------
 # Operand Extraction and Type Inference
 # ----------------------------------------------------------------------------
 
-def extract_asset_type_from_constraint_context(target_asset):
-    """Extract asset type for constraint generation."""
-    if not target_asset:
+@lru_cache(maxsize=None)
+def classify_asset(asset_uri):
+    """Classify an asset URI into an asset type (cached per URI)."""
+    if not asset_uri:
         return "asset"
 
-    target_asset_lower = target_asset.lower()
-    if "photo" in target_asset_lower:
-        return "photo"
-    elif "image" in target_asset_lower or "img" in target_asset_lower:
-        return "image"
-    elif "video" in target_asset_lower or "clip" in target_asset_lower:
-        return "video"
-    elif "movie" in target_asset_lower:
-        return "movie"
-    elif "music" in target_asset_lower or "track" in target_asset_lower:
-        return "music"
-    elif "document" in target_asset_lower:
-        return "document"
-    elif "text" in target_asset_lower or "article" in target_asset_lower:
-        return "text"
-    elif "data" in target_asset_lower or "dataset" in target_asset_lower:
-        return "data"
+    asset_uri_lower = asset_uri.lower()
+    for asset_type, keywords in ASSET_TYPE_KEYWORDS:
+        if any(k in asset_uri_lower for k in keywords):
+            return asset_type
     return "asset"
 
+def extract_asset_type_from_constraint_context(target_asset):
+    """Extract asset type for constraint generation."""
+    return classify_asset(target_asset)
+
 def get_compatible_operand(target_asset, config):
     """Get semantically compatible operand for asset type."""
-    asset_type = extract_asset_type_from_constraint_context(target_asset)
+    asset_type = classify_asset(target_asset)
     compatible_operands = ASSET_COMPATIBLE_OPERANDS.get(asset_type, config["defaults"]["constraint_operands"])
 
     if not compatible_operands:
@@ -74,24 +95,53 @@ def get_compatible_operand(target_asset, config):
 
 def infer_operand_type(operand):
     """Infer the data type of an operand for semantic operator selection."""
-    string_like = ["language", "media", "purpose", "deliveryChannel", "systemDevice", "event", "fileFormat"]
-    numeric_like = ["percentage", "count", "payAmount", "elapsedTime", "unitOfCount", "delayPeriod"]
-    uri_like = ["recipient", "product", "industry", "virtualLocation", "absolutePosition", "relativePosition", 
-                "absoluteSpatialPosition", "relativeSpatialPosition", "relativeTemporalPosition", "absoluteTemporalPosition"]
-    datetime_like = ["dateTime", "timeInterval", "absoluteTemporalPosition"]
-    boolean_like = ["metering"]
-
-    if operand in string_like:
-        return "string"
-    elif operand in numeric_like:
-        return "number"
-    elif operand in uri_like:
-        return "uri"
-    elif operand in datetime_like:
-        return "datetime"
-    elif operand in boolean_like:
-        return "boolean"
-    return "string"
+    return OPERAND_TYPES.get(operand, "string")
+
+# ----------------------------------------------------------------------------
+# Compiled Generation Plan
+# ----------------------------------------------------------------------------
+
+class GenerationPlan:
+    """Sampling tables compiled once from the config.
+
+    For every asset type it holds the valid (operand, operator) pairs and an
+    alias table whose weights reproduce the original sampling scheme: a
+    uniform compatible operand, then a uniform configured operator, replaced
+    by a uniform semantically allowed one when incompatible.
+    """
+
+    def __init__(self, config: Dict):
+        defaults = config["defaults"]
+        operators = defaults["operators"]
+        self.pairs: Dict[str, List[Tuple[str, str]]] = {}
+        self.tables: Dict[str, AliasTable] = {}
+
+        for asset_type, operands in ASSET_COMPATIBLE_OPERANDS.items():
+            operands = operands or defaults["constraint_operands"]
+            weights: Dict[Tuple[str, str], float] = {}
+            for operand in operands:
+                allowed = SEMANTIC_OPERATORS.get(infer_operand_type(operand), ["eq"])
+                rejected = sum(op not in allowed for op in operators) / len(operators)
+                for op in allowed:
+                    p = operators.count(op) / len(operators) + rejected / len(allowed)
+                    if p > 0:
+                        weights[(operand, op)] = weights.get((operand, op), 0.0) + p / len(operands)
+            self.pairs[asset_type] = list(weights)
+            self.tables[asset_type] = AliasTable(list(weights.values()))
+
+    def sample_pair(self, target_asset=None, rand=random.random) -> Tuple[str, str]:
+        """Draw an (operand, operator) pair for the asset's type in O(1)."""
+        asset_type = classify_asset(target_asset)
+        return self.pairs[asset_type][self.tables[asset_type].sample(rand)]
+
+_PLAN_CACHE: Dict[int, Tuple[Dict, GenerationPlan]] = {}
+
+def get_generation_plan(config: Dict) -> GenerationPlan:
+    """Return the compiled plan for this config, building it on first use."""
+    cached = _PLAN_CACHE.get(id(config))
+    if cached is None or cached[0] is not config:
+        cached = _PLAN_CACHE[id(config)] = (config, GenerationPlan(config))
+    return cached[1]
 
 # ----------------------------------------------------------------------------
 # Constraint Generators
@@ -99,36 +149,12 @@ def infer_operand_type(operand):
 
 def random_constraint(config, target_asset=None):
     """Generate a semantically coherent constraint."""
-    for attempt in range(10):
-        try:
-            operand = get_compatible_operand(target_asset, config)
-            if not operand:
-                continue
-
-            inferred_type = infer_operand_type(operand)
-            allowed_ops = SEMANTIC_OPERATORS.get(inferred_type, ["eq"])
-
-            operator = get_random_operator(config)
-            if operator not in allowed_ops:
-                operator = random.choice(allowed_ops)
-
-            right = generate_right_operand(operand)
-
-            if operand and operator and right is not None:
-                return {
-                    "@type": "Constraint",
-                    "leftOperand": operand,
-                    "operator": operator,
-                    "rightOperand": right
-                }
-        except Exception:
-            continue
-
+    operand, operator = get_generation_plan(config).sample_pair(target_asset)
     return {
         "@type": "Constraint",
-        "leftOperand": "dateTime",
-        "operator": "eq",
-        "rightOperand": generate_right_operand("dateTime")
+        "leftOperand": operand,
+        "operator": operator,
+        "rightOperand": generate_right_operand(operand)
     }
 
 def random_logical_constraint(config, target_asset=None):
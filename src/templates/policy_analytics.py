@@ -0,0 +1,261 @@
+# policy_analytics.py
+# ----------------------------------------------------------------------------
+# Single-pass, visitor-based analytics over ODRL policies.
+# `walk` reads each policy once and feeds every registered collector (a
+# PolicyVisitor) the same normalized events: the policy, each rule with its
+# action(s), and every atomic constraint - the members of logical
+# (and / or / xone / andSequence) constraints and action refinements
+# included. Reports register the collectors they need instead of walking the
+# corpus themselves, so they all read the policy structure the same way.
+# ----------------------------------------------------------------------------
+
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+RULE_SECTIONS = ("permission", "prohibition", "obligation")
+LOGICAL_OPERATORS = ("and", "or", "xone", "andSequence")
+CONJUNCTIVE_OPERATORS = ("and", "andSequence")
+ODRL_PREFIXES = ("http://www.w3.org/ns/odrl/2/", "https://www.w3.org/ns/odrl/2/", "odrl:")
+
+# Bound operators, as used by the generators and LLM outputs
+LOWER_BOUNDS = {"gt": True, "gteq": False, "greaterThan": True}   # operator -> strict
+UPPER_BOUNDS = {"lt": True, "lteq": False, "lessThan": True}
+
+# ----------------------------------------------------------------------------
+# Normalization
+# ----------------------------------------------------------------------------
+
+def term(value: Any) -> Any:
+    """Hashable name of a term: objects by their @id / rdf:value / @value / uid, other
+    non-scalar values as canonical JSON, scalars (and None) as they are."""
+    if isinstance(value, dict):
+        for key in ("@id", "rdf:value", "@value", "uid"):
+            if key in value:
+                return term(value[key])
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, list):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+def local_name(value: Any) -> Any:
+    """An ODRL term without its namespace prefix (other values unchanged)."""
+    if isinstance(value, str):
+        for prefix in ODRL_PREFIXES:
+            if value.startswith(prefix):
+                return value[len(prefix):]
+    return value
+
+def as_list(value: Any) -> List[Any]:
+    """A JSON-LD value as a list of items: lists and {"@list": [...]} as-is, None as [], anything else wrapped."""
+    if value is None:
+        return []
+    if isinstance(value, dict) and "@list" in value:
+        value = value["@list"]
+    return value if isinstance(value, list) else [value]
+
+# ----------------------------------------------------------------------------
+# Events
+# ----------------------------------------------------------------------------
+
+class Constraint(NamedTuple):
+    """An atomic constraint (or refinement) as visited."""
+    left: Any                  # term() of leftOperand
+    operator: Any              # term() of operator
+    right: Any                 # rightOperand, with {"@value": v} unwrapped
+    scope: str                 # "constraint" or "refinement"
+    logical: Tuple[str, ...]   # Enclosing logical operators, outermost first
+    raw: Dict[str, Any]
+
+    @property
+    def conjunctive(self) -> bool:
+        """Whether the constraint must hold together with its rule's other conjunctive constraints."""
+        return all(op in CONJUNCTIVE_OPERATORS for op in self.logical)
+
+class Rule(NamedTuple):
+    """A rule as visited, with its actions normalized to names."""
+    section: str
+    index: int
+    actions: Tuple[Any, ...]
+    target: Any
+    assignee: Any
+    assigner: Any
+    raw: Dict[str, Any]
+
+    @property
+    def label(self) -> str:
+        return f"{self.section}[{self.index}]"
+
+class PolicyVisitor:
+    """Base collector; override the hooks a metric needs. Every hook is optional."""
+
+    def start_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        pass
+
+    def visit_rule(self, rule: Rule) -> None:
+        pass
+
+    def visit_constraint(self, rule: Rule, constraint: Constraint) -> None:
+        pass
+
+    def end_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        pass
+
+# ----------------------------------------------------------------------------
+# Walker
+# ----------------------------------------------------------------------------
+
+def iter_constraints(value: Any, scope: str = "constraint",
+                     logical: Tuple[str, ...] = ()) -> Iterator[Constraint]:
+    """Atomic constraints of a constraint value, descending into logical constraints."""
+    for c in as_list(value):
+        if not isinstance(c, dict):
+            continue
+        operators = [op for op in LOGICAL_OPERATORS if op in c]
+        for op in operators:
+            yield from iter_constraints(c[op], scope, logical + (op,))
+        if not operators:
+            right = c.get("rightOperand")
+            if isinstance(right, dict) and "@value" in right:
+                right = right["@value"]
+            yield Constraint(term(c.get("leftOperand")), term(c.get("operator")), right, scope, logical, c)
+
+def _rule(section: str, index: int, rule: Dict[str, Any]) -> Rule:
+    action = rule.get("action")
+    actions = tuple(term(a) for a in action) if isinstance(action, list) else (term(action),)
+    return Rule(section, index, actions, term(rule.get("target")),
+                term(rule.get("assignee", "public")), term(rule.get("assigner", "none")), rule)
+
+def walk_policy(index: int, entry: Dict[str, Any], visitors: Iterable[PolicyVisitor]) -> None:
+    """Feed one policy (or {"odrl": policy} envelope) to every visitor."""
+    visitors = list(visitors)
+    policy = entry.get("odrl", entry) if isinstance(entry, dict) else {}
+    policy = policy if isinstance(policy, dict) else {}
+    for visitor in visitors:
+        visitor.start_policy(index, policy)
+    for section in RULE_SECTIONS:
+        for i, raw in enumerate(as_list(policy.get(section))):
+            if not isinstance(raw, dict):
+                continue
+            rule = _rule(section, i, raw)
+            constraints = list(iter_constraints(raw.get("constraint")))
+            action = raw.get("action")
+            for a in action if isinstance(action, list) else [action]:
+                if isinstance(a, dict):
+                    constraints.extend(iter_constraints(a.get("refinement"), "refinement"))
+            for visitor in visitors:
+                visitor.visit_rule(rule)
+                for constraint in constraints:
+                    visitor.visit_constraint(rule, constraint)
+    for visitor in visitors:
+        visitor.end_policy(index, policy)
+
+def walk(policies: Iterable[Dict[str, Any]], *visitors: PolicyVisitor) -> Tuple[PolicyVisitor, ...]:
+    """Walk every policy once, feeding all `visitors`; returns them for convenience."""
+    for index, entry in enumerate(policies):
+        walk_policy(index, entry, visitors)
+    return visitors
+
+# ----------------------------------------------------------------------------
+# Shared Collectors
+# ----------------------------------------------------------------------------
+
+class DuplicateUidCollector(PolicyVisitor):
+    """Every repeated occurrence of a policy uid, in corpus order."""
+
+    def __init__(self):
+        self.seen = set()
+        self.duplicates: List[Any] = []
+
+    def start_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        uid = term(policy.get("uid"))
+        if uid in self.seen:
+            self.duplicates.append(uid)
+        else:
+            self.seen.add(uid)
+
+def bound_value(value: Any) -> Optional[Tuple[int, Any]]:
+    """A sortable form of a bound (number or ISO date/time), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        try:
+            return (0, float(value))
+        except ValueError:
+            pass
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return (1, (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp())
+    return None
+
+def _contradicts(lower: Tuple[str, Any], upper: Tuple[str, Any]) -> bool:
+    """Whether a lower and an upper bound leave no value. Bounds that cannot be compared (durations,
+    free text, a number against a date) are not known to contradict, so they never do."""
+    low, high = bound_value(lower[1]), bound_value(upper[1])
+    if low is None or high is None or low[0] != high[0]:
+        return False
+    strict = LOWER_BOUNDS[lower[0]] or UPPER_BOUNDS[upper[0]]
+    return low[1] > high[1] or (strict and low[1] == high[1])
+
+class ContradictionCollector(PolicyVisitor):
+    """Rules whose conjunctive constraints (refinements included) bound an operand from both sides with no value in between.
+
+    Members of "or"/"xone" constraints are alternatives and never combined.
+    Each finding is (policy index, rule label, operand, [(operator, value), ...]).
+    """
+
+    def __init__(self):
+        self.findings: List[Tuple[int, str, Any, List[Tuple[Any, str]]]] = []
+        self._index = 0
+        self._rule: Optional[Rule] = None
+        self._bounds: Dict[Any, List[Tuple[Any, Any]]] = defaultdict(list)
+
+    def start_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        self._index = index
+        self._rule = None
+
+    def visit_rule(self, rule: Rule) -> None:
+        self._flush()
+        self._rule = rule
+
+    def visit_constraint(self, rule: Rule, constraint: Constraint) -> None:
+        if constraint.conjunctive and constraint.left and constraint.operator:
+            self._bounds[constraint.left].append((local_name(constraint.operator), constraint.right))
+
+    def end_policy(self, index: int, policy: Dict[str, Any]) -> None:
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._rule is not None:
+            for operand, bounds in self._bounds.items():
+                lower = [b for b in bounds if b[0] in LOWER_BOUNDS]
+                upper = [b for b in bounds if b[0] in UPPER_BOUNDS]
+                if any(_contradicts(lo, up) for lo in lower for up in upper):
+                    self.findings.append((self._index, self._rule.label, operand,
+                                          [(op, str(value)) for op, value in bounds]))
+        self._bounds = defaultdict(list)
+        self._rule = None
+
+class TermCounter(PolicyVisitor):
+    """Frequency of actions, targets, parties, left operands and operators across the corpus."""
+
+    FIELDS = ["actions", "targets", "assignees", "assigners", "left_operands", "operators"]
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, Counter())
+
+    def visit_rule(self, rule: Rule) -> None:
+        self.actions.update(rule.actions)
+        self.targets[rule.target] += 1
+        self.assignees[rule.assignee] += 1
+        self.assigners[rule.assigner] += 1
+
+    def visit_constraint(self, rule: Rule, constraint: Constraint) -> None:
+        self.left_operands[constraint.left] += 1
+        self.operators[constraint.operator] += 1
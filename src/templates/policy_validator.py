@@ -7,39 +7,55 @@
 import json
 import os
 import jsonschema
-from copy import deepcopy
-from typing import Tuple, Dict, Any, Optional
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Tuple, Dict, Any, Iterable, Iterator, List, Optional, Union
+from utils import PolicyWriter, iter_policies
+from shapes_registry import RDF_AVAILABLE, SHACL_PATH, DEFAULT_CHUNK_SIZE, get_shapes, resolve_inference
+from validation_cache import ValidationCache, file_digest
+from jsonld_loader import load_local_context, parse_jsonld
+from validation_engine import (
+    Candidate, TierStats, ValidationEngine, check_shacl, init_shacl_worker, per_policy_tier, shacl_tier,
+    shacl_unavailable, structure_tier, vocabulary_tier, validate_chunk
+)
 
 # Optional RDF support
-try:
+if RDF_AVAILABLE:
     from rdflib import Graph
-    from pyshacl import validate as shacl_validate
-    RDF_AVAILABLE = True
-except ImportError:
-    RDF_AVAILABLE = False
 
 # Constants for SHACL and context
-SHACL_PATH = "config/shacl_shapes.ttl"
 SCHEMA_PATH = "config/odrl_policy_schema.json"
 CONTEXT_PATH = "config/odrl_context.json"
+SHACL_CONTEXT = {
+    "odrl": "http://www.w3.org/ns/odrl/2/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#"
+}
 
 # ----------------------------------------------------------------------------
 # Loaders and Preprocessors
 # ----------------------------------------------------------------------------
 
+_SCHEMA_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
 def load_schema(path: str = SCHEMA_PATH) -> Dict[str, Any]:
+    """Load a JSON Schema, re-reading the file only when it changes."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _SCHEMA_CACHE.get(path)
+        if cached is None or cached[0] != stamp:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = _SCHEMA_CACHE[path] = (stamp, json.load(f))
+        return cached[1]
     except Exception as e:
         raise RuntimeError(f"Failed to load schema: {e}")
 
-def load_context(path: str = CONTEXT_PATH) -> str:
+def load_context(path: str = CONTEXT_PATH) -> Any:
+    """The bundled ODRL context (parsed once per process; do not modify), or its URL if unavailable."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            context_data = json.load(f)
-            return context_data.get("@context", "http://www.w3.org/ns/odrl.jsonld")
-    except FileNotFoundError:
+        return load_local_context(path)
+    except (FileNotFoundError, KeyError, TypeError):
         return "http://www.w3.org/ns/odrl.jsonld"
 
 def inject_context(policy: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,123 +73,411 @@ def flatten_constraints(policy: Dict[str, Any]) -> Dict[str, Any]:
                         c["rightOperand"] = val
     return policy
 
+def _flatten_constraint(constraint: Dict[str, Any]) -> Dict[str, Any]:
+    right = constraint.get("rightOperand")
+    if isinstance(right, dict) and right.get("@value"):
+        return {**constraint, "rightOperand": right["@value"]}
+    return constraint
+
+def _prepare_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    constraints = rule.get("constraint", [])
+    flattened = [_flatten_constraint(c) for c in constraints]
+    if all(a is b for a, b in zip(flattened, constraints)):
+        return rule
+    return {**rule, "constraint": flattened}
+
 def prepare_for_validation(policy: Dict[str, Any]) -> Dict[str, Any]:
-    policy = deepcopy(policy)
-    policy = inject_context(policy)
-    policy = flatten_constraints(policy)
-    return policy
+    """`inject_context` and `flatten_constraints` in one pass, without modifying `policy`.
+
+    Only the rules and constraints holding a flattened value are copied; the
+    rest is shared with the input, so the result must not be modified.
+    """
+    prepared = dict(policy)
+    if "@context" not in prepared:
+        prepared["@context"] = load_context()
+    for section in ["permission", "prohibition", "obligation"]:
+        if section in policy:
+            prepared[section] = [_prepare_rule(rule) for rule in policy[section]]
+    return prepared
 
 # ----------------------------------------------------------------------------
 # Validation Engines
 # ----------------------------------------------------------------------------
 
-def validate_json_schema(policy: Dict[str, Any], schema: Optional[Dict[str, Any]] = None) -> Tuple[bool, Optional[str]]:
+_VALIDATOR_CACHE: Dict[int, Tuple[Dict[str, Any], Any]] = {}
+
+def get_schema_validator(schema: Optional[Dict[str, Any]] = None) -> Any:
+    """Return a compiled validator for `schema` (default: the ODRL policy schema).
+
+    The schema is checked against its metaschema once and the validator
+    object reused, instead of both happening on every `jsonschema.validate`.
+    """
     if schema is None:
         schema = load_schema()
+    cached = _VALIDATOR_CACHE.get(id(schema))
+    if cached is None or cached[0] is not schema:
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        cached = _VALIDATOR_CACHE[id(schema)] = (schema, cls(schema))
+    return cached[1]
+
+def _format_schema_error(policy: Dict[str, Any], e: "jsonschema.exceptions.ValidationError") -> str:
+    return f"[SCHEMA] UID: {policy.get('uid', 'unknown')} | Path: {'/'.join(map(str, e.absolute_path))} | {e.message}"
+
+def iter_schema_errors(policy: Dict[str, Any], schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Yield every JSON Schema violation of a policy in one pass."""
+    for error in get_schema_validator(schema).iter_errors(policy):
+        yield _format_schema_error(policy, error)
+
+def validate_json_schema(policy: Dict[str, Any], schema: Optional[Dict[str, Any]] = None,
+                         all_errors: bool = False) -> Tuple[bool, Optional[str]]:
+    """Check a policy against the schema; reports the most relevant error,
+    or every violation (one per line) with `all_errors`."""
     try:
-        jsonschema.validate(instance=policy, schema=schema)
-        return True, None
-    except jsonschema.exceptions.ValidationError as e:
-        return False, f"[SCHEMA] UID: {policy.get('uid', 'unknown')} | Path: {'/'.join(map(str, e.absolute_path))} | {e.message}"
+        if all_errors:
+            errors = list(iter_schema_errors(policy, schema))
+            return (False, "\n".join(errors)) if errors else (True, None)
+        error = jsonschema.exceptions.best_match(get_schema_validator(schema).iter_errors(policy))
+        if error is None:
+            return True, None
+        return False, _format_schema_error(policy, error)
     except Exception as e:
         return False, f"[SCHEMA] Validation error: {str(e)}"
 
+def shacl_document(policy: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON-LD document SHACL validation runs on: the prepared policy under the ODRL/XSD prefixes.
+
+    A shallow copy; everything below the top level is shared with `policy`.
+    """
+    return {**policy, "@context": SHACL_CONTEXT}
+
+def shacl_data_graph(policy: Dict[str, Any]) -> "Graph":
+    """Parse a prepared policy into the data graph SHACL validation runs on."""
+    return parse_jsonld(shacl_document(policy))
+
+def _shacl_error(e: Exception) -> Tuple[bool, str]:
+    return False, f"SHACL validation error: {str(e)}"
+
 def validate_shacl(policy: Dict[str, Any], shapes_file: str = SHACL_PATH) -> Tuple[bool, str]:
-    if not RDF_AVAILABLE:
-        return True, "SHACL validation skipped - RDF libraries not available"
-    if not os.path.exists(shapes_file):
-        return True, "SHACL validation skipped - shapes file not found"
+    return validate_shacl_batch([policy], shapes_file)[0]
 
-    try:
-        expanded = deepcopy(policy)
-        expanded["@context"] = {
-            "odrl": "http://www.w3.org/ns/odrl/2/",
-            "xsd": "http://www.w3.org/2001/XMLSchema#"
-        }
-        data_graph = Graph().parse(data=json.dumps(expanded), format='json-ld')
-        shapes_graph = Graph().parse(shapes_file, format='turtle')
-        conforms, _, results_text = shacl_validate(
-            data_graph=data_graph,
-            shacl_graph=shapes_graph,
-            inference='rdfs',
-            debug=False
-        )
-        return conforms, results_text
-    except Exception as e:
-        return False, f"SHACL validation error: {str(e)}"
+def validate_shacl_batch(policies: List[Dict[str, Any]], shapes_file: str = SHACL_PATH) -> List[Tuple[bool, str]]:
+    """`validate_shacl` for many prepared policies with a single pyshacl run (see `check_shacl`)."""
+    skipped = shacl_unavailable(shapes_file)
+    if skipped:
+        return [(True, skipped)] * len(policies)
+    return check_shacl([shacl_document(p) for p in policies], shapes_file, on_error=_shacl_error)
 
 # ----------------------------------------------------------------------------
 # Comprehensive Validator
 # ----------------------------------------------------------------------------
 
-def validate_policy_comprehensive(policy: Dict[str, Any], enable_shacl: bool = True) -> Dict[str, Any]:
-    results = {
-        "valid": True,
-        "errors": [],
-        "json_schema_valid": False,
-        "shacl_valid": not enable_shacl,
+def _schema_check(candidate: Candidate, all_schema_errors: bool = False) -> List[str]:
+    """Prepare a policy (kept on the candidate for SHACL) and check it against the JSON Schema."""
+    try:
+        candidate.prepared = prepare_for_validation(candidate.policy)
+    except Exception as e:
+        return [f"Preparation error: {str(e)}"]
+    json_valid, json_error = validate_json_schema(candidate.prepared, all_errors=all_schema_errors)
+    if json_valid:
+        return []
+    return json_error.split("\n") if all_schema_errors else [json_error]
+
+_ENGINES: Dict[Tuple[bool, bool], ValidationEngine] = {}
+
+def get_validation_engine(enable_shacl: bool = True, all_schema_errors: bool = False) -> ValidationEngine:
+    """The tiers a template policy goes through: structure, vocabulary, JSON Schema, then SHACL."""
+    engine = _ENGINES.get((enable_shacl, all_schema_errors))
+    if engine is None:
+        tiers = [structure_tier(), vocabulary_tier(),
+                 per_policy_tier("schema", lambda c: _schema_check(c, all_schema_errors))]
+        if enable_shacl:
+            # Skipped validation is not an error
+            tiers.append(shacl_tier(lambda c: shacl_document(c.prepared), SHACL_PATH, error_prefix="[SHACL] ",
+                                    on_error=_shacl_error, skip_unavailable=True))
+        engine = _ENGINES[(enable_shacl, all_schema_errors)] = ValidationEngine(tiers)
+    return engine
+
+def _policy_result(candidate: Candidate, enable_shacl: bool) -> Dict[str, Any]:
+    policy = candidate.policy if isinstance(candidate.policy, dict) else {}
+    return {
+        "valid": candidate.valid,
+        "errors": candidate.errors,
+        "json_schema_valid": "schema" in candidate.passed,
+        "shacl_valid": "shacl" in candidate.passed if enable_shacl else True,
         "policy_uid": policy.get("uid", "unknown"),
         "policy_type": policy.get("@type", "unknown")
     }
 
-    try:
-        prepared = prepare_for_validation(policy)
-    except Exception as e:
-        results["valid"] = False
-        results["errors"].append(f"Preparation error: {str(e)}")
-        return results
+def validate_policy_comprehensive(policy: Dict[str, Any], enable_shacl: bool = True,
+                                  all_schema_errors: bool = False,
+                                  tier_stats: Optional[TierStats] = None) -> Dict[str, Any]:
+    candidate = get_validation_engine(enable_shacl, all_schema_errors).run([policy], tier_stats)[0]
+    return _policy_result(candidate, enable_shacl)
+
+def validate_policies_batch(policies: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            enable_shacl: bool = True,
+                            tier_stats: Optional[TierStats] = None) -> Iterator[Dict[str, Any]]:
+    """Yield `validate_policy_comprehensive` results, running each tier once per chunk of policies."""
+    engine = get_validation_engine(enable_shacl)
+    policies = iter(policies)
+    while True:
+        chunk = list(islice(policies, chunk_size))
+        if not chunk:
+            return
+        for candidate in engine.run(chunk, tier_stats):
+            yield _policy_result(candidate, enable_shacl)
 
-    json_valid, json_error = validate_json_schema(prepared)
-    results["json_schema_valid"] = json_valid
-    if not json_valid:
-        results["valid"] = False
-        results["errors"].append(json_error)
+# ----------------------------------------------------------------------------
+# Parallel Validation
+# ----------------------------------------------------------------------------
 
+def _init_validation_worker(shapes_file: str = SHACL_PATH) -> None:
+    """Load the schema and shapes once per worker process."""
+    get_schema_validator()
+    init_shacl_worker(shapes_file)
+
+def _validate_chunk(chunk: List[Dict[str, Any]],
+                    enable_shacl: bool = True) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]:
+    """Results for a chunk and the tier counts they took (picklable, for the parent to merge)."""
+    return validate_chunk(get_validation_engine(enable_shacl), chunk, lambda c: _policy_result(c, enable_shacl))
+
+def validation_key(policy: Dict[str, Any], enable_shacl: bool = True,
+                   shapes_file: str = SHACL_PATH) -> Optional[str]:
+    """Cache key of a policy's validation result, or None if the policy cannot be prepared."""
+    try:
+        prepared = prepare_for_validation(policy)
+    except Exception:
+        return None
+    shapes = "disabled"
     if enable_shacl:
-        shacl_valid, shacl_result = validate_shacl(prepared)
-        results["shacl_valid"] = shacl_valid
-        if not shacl_valid and "skipped" not in shacl_result:
-            results["valid"] = False
-            results["errors"].append(f"[SHACL] {shacl_result}")
+        shapes = shacl_unavailable(shapes_file) or f"{get_shapes(shapes_file).digest}:{resolve_inference()}"
+    return ValidationCache.key("templates", prepared, file_digest(SCHEMA_PATH), shapes)
 
-    return results
+def _lookup_chunk(chunk: List[Dict[str, Any]], cache: Optional[ValidationCache],
+                  enable_shacl: bool) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+    """Cached results for a chunk (None where validation is still needed) and their keys."""
+    if cache is None:
+        return [None] * len(chunk), [None] * len(chunk)
+    keys = [validation_key(policy, enable_shacl) for policy in chunk]
+    found = cache.get_many(k for k in keys if k is not None)
+    return [found.get(k) for k in keys], keys
+
+def _merge_chunk(cached: List[Optional[Dict[str, Any]]], keys: List[Optional[str]],
+                 validated: Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]],
+                 cache: Optional[ValidationCache], tier_stats: Optional[TierStats]) -> List[Dict[str, Any]]:
+    """Fill a chunk's cache misses with fresh results, storing them in the cache."""
+    validated, counts = validated
+    if tier_stats is not None:
+        tier_stats.merge(counts)
+    missing = [i for i, result in enumerate(cached) if result is None]
+    for i, result in zip(missing, validated):
+        cached[i] = result
+    if cache is not None:
+        cache.put_many((keys[i], cached[i]) for i in missing if keys[i] is not None)
+    return cached
 
 # ----------------------------------------------------------------------------
 # Batch Template Validation
 # ----------------------------------------------------------------------------
 
-def validate_template_policies(file_path):
-    with open(file_path, 'r') as f:
-        policies = json.load(f)
-
-    schema = load_schema()
-    results = {
-        "total_policies": len(policies),
-        "valid_policies": 0,
-        "json_schema_valid": 0,
-        "shacl_valid": 0,
-        "validation_results": [],
-        "error_summary": {},
-        "policy_types": {}
-    }
+class ValidationAccumulator:
+    """Running validation counters, fed one per-policy result at a time.
 
-    for policy_envelope in policies:
-        policy = policy_envelope.get("odrl", policy_envelope)
-        result = validate_policy_comprehensive(policy)
-        results["validation_results"].append(result)
+    Partial states are mergeable and JSON-serializable, so chunks validated
+    by different workers (or shards validated separately) can be combined
+    without keeping any per-policy result.
+    """
 
-        if result["valid"]:
-            results["valid_policies"] += 1
-        if result["json_schema_valid"]:
-            results["json_schema_valid"] += 1
-        if result["shacl_valid"]:
-            results["shacl_valid"] += 1
+    COUNTS = ["total_policies", "valid_policies", "json_schema_valid", "shacl_valid"]
+    FIELDS = ["error_summary", "policy_types"]
 
+    def __init__(self):
+        self.counts = Counter({field: 0 for field in self.COUNTS})
+        self.error_summary = Counter()
+        self.policy_types = Counter()
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.counts["total_policies"] += 1
+        for field in ["valid_policies", "json_schema_valid", "shacl_valid"]:
+            self.counts[field] += bool(result["valid" if field == "valid_policies" else field])
+
+        # A list-valued @type counts under its JSON form
         policy_type = result["policy_type"]
-        results["policy_types"][policy_type] = results["policy_types"].get(policy_type, 0) + 1
+        self.policy_types[policy_type if isinstance(policy_type, str) else json.dumps(policy_type)] += 1
 
         for err in result["errors"]:
-            etype = err.split("]")[0] + "]" if "]" in err else "OTHER"
-            results["error_summary"][etype] = results["error_summary"].get(etype, 0) + 1
+            self.error_summary[err.split("]")[0] + "]" if "]" in err else "OTHER"] += 1
+
+    def update(self, results: Iterable[Dict[str, Any]]) -> "ValidationAccumulator":
+        for result in results:
+            self.add(result)
+        return self
+
+    def merge(self, other: Union["ValidationAccumulator", Dict[str, Any]]) -> "ValidationAccumulator":
+        if isinstance(other, dict):
+            other = ValidationAccumulator.from_dict(other)
+        self.counts.update(other.counts)
+        for field in self.FIELDS:
+            getattr(self, field).update(getattr(other, field))
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = {field: self.counts[field] for field in self.COUNTS}
+        state.update({field: dict(getattr(self, field)) for field in self.FIELDS})
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "ValidationAccumulator":
+        acc = cls()
+        acc.counts.update({field: state.get(field, 0) for field in cls.COUNTS})
+        for field in cls.FIELDS:
+            getattr(acc, field).update(state.get(field, {}))
+        return acc
+
+def _aggregate_chunk(chunk: List[Dict[str, Any]],
+                     enable_shacl: bool = True) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """Worker task: the accumulator state of a validated chunk and its tier counts."""
+    results, counts = _validate_chunk(chunk, enable_shacl)
+    return ValidationAccumulator().update(results).to_dict(), counts
+
+def aggregate_validation(policies: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         workers: int = 1, enable_shacl: bool = True,
+                         tier_stats: Optional[TierStats] = None) -> ValidationAccumulator:
+    """Validate policies into a ValidationAccumulator.
+
+    With workers > 1 each worker aggregates its chunk and only the partial
+    state comes back to be merged; no per-policy result crosses processes.
+    """
+    with StreamingValidator(chunk_size, workers, enable_shacl) as validator:
+        validator.update(policies).flush()
+    if tier_stats is not None:
+        tier_stats.merge(validator.tier_stats)
+    return validator.acc
+
+class StreamingValidator:
+    """Push-based validation: policies are added one at a time as they are produced.
+
+    Policies are buffered into chunks; each chunk is looked up in the
+    optional cache and its misses validated, in a process pool with
+    workers > 1 (at most two chunks per worker in flight, results folded
+    in input order). Every result goes into a ValidationAccumulator and,
+    with `details_path`, to a JSONL sink; nothing else is kept. Without a
+    cache or sink, chunks are aggregated where they are validated and only
+    their accumulator states are folded in.
+    """
 
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1, enable_shacl: bool = True,
+                 cache: Optional[ValidationCache] = None, details_path: Optional[str] = None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.enable_shacl = enable_shacl
+        self.cache = cache
+        self.details_path = details_path
+        self.acc = ValidationAccumulator()
+        self.tier_stats = TierStats()
+        self._cache_start = (cache.hits, cache.misses) if cache is not None else None
+        self._sink = PolicyWriter(details_path) if details_path else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: deque = deque()
+        self._buffer: List[Dict[str, Any]] = []
+
+    def add(self, policy: Dict[str, Any]) -> None:
+        self._buffer.append(policy)
+        if len(self._buffer) >= self.chunk_size:
+            self._submit()
+
+    def update(self, policies: Iterable[Dict[str, Any]]) -> "StreamingValidator":
+        for policy in policies:
+            self.add(policy)
+        return self
+
+    def _submit(self) -> None:
+        chunk, self._buffer = self._buffer, []
+        if self.cache is None and self._sink is None:
+            self._run(_aggregate_chunk, chunk, self._fold_state)
+            return
+        cached, keys = _lookup_chunk(chunk, self.cache, self.enable_shacl)
+        misses = [policy for policy, result in zip(chunk, cached) if result is None]
+        self._run(_validate_chunk, misses, lambda validated: self._collect(cached, keys, validated))
+
+    def _run(self, task: Callable, chunk: List[Dict[str, Any]], fold: Callable[[Any], None]) -> None:
+        """Run a chunk task here or in the pool; `fold` receives its output, in submission order."""
+        if self.workers <= 1:
+            fold(task(chunk, self.enable_shacl))
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_validation_worker)
+        self._pending.append((fold, self._pool.submit(task, chunk, self.enable_shacl)))
+        while len(self._pending) >= 2 * self.workers:
+            self._collect_next()
+
+    def _collect_next(self) -> None:
+        fold, future = self._pending.popleft()
+        fold(future.result())
+
+    def _fold_state(self, aggregated: Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]) -> None:
+        state, counts = aggregated
+        self.acc.merge(state)
+        self.tier_stats.merge(counts)
+
+    def _collect(self, cached: List[Optional[Dict[str, Any]]], keys: List[Optional[str]],
+                 validated: Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]) -> None:
+        for result in _merge_chunk(cached, keys, validated, self.cache, self.tier_stats):
+            self.acc.add(result)
+            if self._sink is not None:
+                self._sink.write(result)
+
+    def flush(self) -> None:
+        """Validate everything added so far."""
+        if self._buffer:
+            self._submit()
+        while self._pending:
+            self._collect_next()
+
+    def results(self) -> Dict[str, Any]:
+        """Flush, then return the `validate_template_policies` summary of everything added."""
+        self.flush()
+        return _summary(self.acc, self.tier_stats, self.cache, self._cache_start, self.details_path)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def __enter__(self) -> "StreamingValidator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _summary(acc: ValidationAccumulator, tier_stats: TierStats, cache: Optional[ValidationCache],
+             cache_start: Optional[Tuple[int, int]], details_path: Optional[str]) -> Dict[str, Any]:
+    results = {**acc.to_dict(), "cache": None, "details": details_path, "tiers": tier_stats.to_dict()}
+    if cache is not None:
+        hits, misses = cache.hits - cache_start[0], cache.misses - cache_start[1]
+        results["cache"] = {"path": cache.path, "hits": hits, "misses": misses,
+                            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0}
     return results
+
+def validate_template_policies(source: Union[str, Iterable[Dict[str, Any]]],
+                               chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                               cache: Optional[ValidationCache] = None,
+                               details_path: Optional[str] = None) -> Dict[str, Any]:
+    """Validate policies from a file, manifest or iterable, streaming them in SHACL batches.
+
+    Only aggregate counters are kept in memory; with `details_path` every
+    per-policy result is streamed to that JSONL file (optionally .gz/.zst).
+    With workers > 1 the chunks are validated in a process pool; partial
+    states are merged in input order, so the outcome does not depend on
+    `workers`. With a `cache`, previously validated policies are answered
+    from it and the run's hit/miss counts are returned under "cache".
+    Per-tier checked and rejected counts and timings are returned under "tiers".
+    """
+    load_schema()
+    policies = (envelope.get("odrl", envelope) for envelope in iter_policies(source))
+    with StreamingValidator(chunk_size, workers, cache=cache, details_path=details_path) as validator:
+        return validator.update(policies).results()
@@ -0,0 +1,127 @@
+# prep_benchmark.py
+# ----------------------------------------------------------------------------
+# Measures the cost of preparing policies for validation - the step that
+# turns a policy into the JSON-LD document SHACL runs on - for each of the
+# three validators: time per policy, memory allocated while preparing, and
+# whether the caller's policy was modified.
+#
+# Runs on the policies under outputs/ and on synthetic large policies
+# (--rules rules with --constraints constraints each).
+#
+# Usage: python src/templates/prep_benchmark.py [--repeat N] [--rules R] [--constraints C] [paths...]
+# ----------------------------------------------------------------------------
+
+import argparse
+import glob
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from typing import Any, Callable, Dict, List
+
+from shacl_differential import DEFAULT_CORPORA, iter_corpus_policies, models_validator, filter_validator
+from policy_validator import prepare_for_validation, shacl_document
+from validation_cache import canonical_digest
+
+# Validator name -> its preparation step, called exactly as the validator calls it
+BUILDERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "templates": lambda p: shacl_document(prepare_for_validation(p)),
+    "models": lambda p: models_validator._policy_document(p),
+    "filter": lambda p: filter_validator._expand_for_validation(filter_validator.inject_context_and_flatten(p)),
+}
+
+# ----------------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------------
+
+def large_policy(rules: int, constraints: int) -> Dict[str, Any]:
+    """A synthetic policy with many rules and constraints, in the shape the generators produce."""
+    def constraint(j: int) -> Dict[str, Any]:
+        return {"leftOperand": "count", "operator": "lteq",
+                "rightOperand": {"@value": str(j + 1), "@type": "xsd:integer"}}
+    return {
+        "@context": "http://www.w3.org/ns/odrl.jsonld",
+        "@type": "Set",
+        "uid": "http://example.com/policy/large",
+        "permission": [{"target": f"http://example.com/asset/{i}", "action": "use",
+                        "assigner": "http://example.com/party/a",
+                        "constraint": [constraint(j) for j in range(constraints)]}
+                       for i in range(rules)],
+    }
+
+def preparable(policy: Dict[str, Any]) -> bool:
+    """Whether every validator can prepare the policy (the others are rejected before this step)."""
+    try:
+        for build in BUILDERS.values():
+            build(deepcopy(policy))
+    except Exception:
+        return False
+    return True
+
+# ----------------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------------
+
+def _walk(value: Any):
+    yield value
+    children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+    for child in children:
+        yield from _walk(child)
+
+def measure(build: Callable[[Dict[str, Any]], Any], policies: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """Time, allocation and mutation figures for preparing every policy `repeat` times.
+
+    Allocation is what one preparation leaves allocated (its document) and its
+    peak above the starting point, with the input's objects kept alive.
+    """
+    inputs = [[deepcopy(p) for p in policies] for _ in range(repeat)]
+    digests = [canonical_digest(p) for p in policies]
+
+    start = time.perf_counter()
+    for batch in inputs:
+        for policy in batch:
+            build(policy)
+    elapsed = time.perf_counter() - start
+    mutated = sum(canonical_digest(p) != d for p, d in zip(inputs[-1], digests))
+
+    tracemalloc.start()
+    allocated, peak = 0, 0
+    for policy in [deepcopy(p) for p in policies]:
+        keep = list(_walk(policy))  # Objects a mutating step drops must not count as freed
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        document = build(policy)
+        current, top = tracemalloc.get_traced_memory()
+        allocated += current - before
+        peak = max(peak, top - before)
+        del document, keep
+    tracemalloc.stop()
+
+    return {"us": elapsed / (len(policies) * repeat) * 1e6, "kib": allocated / len(policies) / 1024,
+            "peak_kib": peak / 1024, "mutated": mutated}
+
+# ----------------------------------------------------------------------------
+# Script Entry
+# ----------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure policy preparation cost per validator.")
+    parser.add_argument("paths", nargs="*", help=f"Policy JSON files (default: {DEFAULT_CORPORA})")
+    parser.add_argument("--repeat", type=int, default=20, help="Preparations per policy for the timing")
+    parser.add_argument("--rules", type=int, default=200, help="Rules in the synthetic large policy")
+    parser.add_argument("--constraints", type=int, default=10, help="Constraints per rule in the large policy")
+    args = parser.parse_args()
+
+    corpus = [p for _, p in iter_corpus_policies(args.paths or sorted(glob.glob(DEFAULT_CORPORA, recursive=True)))]
+    corpus = [p for p in corpus if preparable(p)]
+    inputs = {"corpus": corpus, "large": [large_policy(args.rules, args.constraints)]}
+    for label, policies in inputs.items():
+        print(f"{label}: {len(policies)} policies")
+        for name, build in BUILDERS.items():
+            m = measure(build, policies, args.repeat if label == "corpus" else max(1, args.repeat // 4))
+            print(f"  {name:10s} {m['us']:9.1f} us/policy  {m['kib']:8.1f} KiB allocated/policy  "
+                  f"peak {m['peak_kib']:8.1f} KiB  inputs modified: {m['mutated']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,39 @@
 # report_generator.py
 # ----------------------------------------------------------------------------
 # Generates a Markdown summary report based on policy validation results.
+# ReportPipeline produces it together with the diversity summary and plots
+# from one pass over the policies.
 # ----------------------------------------------------------------------------
 
 import json
 from datetime import datetime
-from policy_validator import validate_template_policies
+from policy_validator import StreamingValidator, validate_template_policies
+from diversity_summary import DiversityAccumulator, plot_diversity, save_diversity_summary
+from utils import iter_policies
+from validation_cache import CACHE_PATH, ValidationCache
 
 # ----------------------------------------------------------------------------
 # Report Generator
 # ----------------------------------------------------------------------------
 
-def generate_report(input_path: str, output_path: str = "outputs/report.md"):
-    """Generate a validation report and write it to a markdown file."""
-    results = validate_template_policies(input_path)
+def generate_report(source, output_path: str = "outputs/report.md", workers: int = 1, cache=None,
+                    details_path=None):
+    """Generate a validation report and write it to a markdown file.
 
+    `source` may be a policy file (JSON/JSONL), a shard manifest, or an
+    iterable of policies; it is consumed as a stream. `workers` > 1
+    validates in a process pool. An optional ValidationCache skips policies
+    validated by earlier runs; its hit/miss counts appear in the report,
+    as do the per-tier rejection counts and timings of the validation engine.
+    Only aggregate counts are kept; `details_path` names an optional JSONL
+    file that receives every per-policy result.
+    """
+    results = validate_template_policies(source, workers=workers, cache=cache, details_path=details_path)
+    write_report(results, output_path)
+    return results
+
+def write_report(results, output_path: str = "outputs/report.md"):
+    """Write the Markdown report for a `validate_template_policies` summary."""
     total = results["total_policies"]
     valid = results["valid_policies"]
     json_valid = results["json_schema_valid"]
@@ -31,6 +50,12 @@ def generate_report(input_path: str, output_path: str = "outputs/report.md"):
     report += f"Overall Valid: {valid} ({valid/total*100:.1f}%)\n"
     report += f"JSON Schema Valid: {json_valid} ({json_valid/total*100:.1f}%)\n"
     report += f"SHACL Valid: {shacl_valid} ({shacl_valid/total*100:.1f}%)\n"
+    if results["cache"]:
+        cache_stats = results["cache"]
+        report += (f"Validation Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']*100:.1f}% hit rate)\n")
+    if results["details"]:
+        report += f"Per-Policy Results: {results['details']}\n"
     report += "\n"
 
     if policy_types:
@@ -39,6 +64,13 @@ def generate_report(input_path: str, output_path: str = "outputs/report.md"):
             report += f"  - {ptype}: {count}\n"
         report += "\n"
 
+    if results["tiers"]:
+        report += "Validation Tiers:\n"
+        for tier, counts in results["tiers"].items():
+            report += (f"  - {tier}: {counts['checked']} checked, {counts['rejected']} rejected, "
+                       f"{counts['mean_us']:.1f} us/policy\n")
+        report += "\n"
+
     if error_summary:
         report += "Error Summary:\n"
         for error_type, count in error_summary.items():
@@ -52,9 +84,59 @@ def generate_report(input_path: str, output_path: str = "outputs/report.md"):
 
     print(report)
 
+# ----------------------------------------------------------------------------
+# Report Pipeline
+# ----------------------------------------------------------------------------
+
+class ReportPipeline:
+    """Validation report, diversity summary and plots from a single pass over the policies.
+
+    Policies are pushed in as they are generated (or read from any source
+    with `update`), so the corpus is never serialized and parsed back just
+    to be reported on. Each policy is validated once and counted once;
+    `finish` writes every report from those shared results.
+    """
+
+    def __init__(self, workers: int = 1, cache=None, details_path=None, diversity=None):
+        self.validator = StreamingValidator(workers=workers, cache=cache, details_path=details_path)
+        self.diversity = diversity if diversity is not None else DiversityAccumulator()
+
+    def validate(self, policy) -> None:
+        """Validate a policy whose diversity is already counted (e.g. by a journal checkpoint)."""
+        self.validator.add(policy.get("odrl", policy))
+
+    def add(self, policy) -> None:
+        self.validate(policy)
+        self.diversity.add(policy)
+
+    def update(self, source) -> "ReportPipeline":
+        for policy in iter_policies(source):
+            self.add(policy)
+        return self
+
+    def finish(self, report_path: str = "outputs/report.md", diversity_path=None, plots_dir=None):
+        """Write the validation report and, if paths are given, the diversity summary and plots."""
+        results = self.validator.results()
+        write_report(results, report_path)
+        if diversity_path:
+            save_diversity_summary(self.diversity, diversity_path)
+        if plots_dir:
+            plot_diversity(self.diversity, save_dir=plots_dir)
+        return results
+
+    def close(self) -> None:
+        self.validator.close()
+
+    def __enter__(self) -> "ReportPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 # ----------------------------------------------------------------------------
 # Script Entry
 # ----------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    generate_report("outputs/template_based_policies.json")
+    with ValidationCache(CACHE_PATH) as cache:
+        generate_report("outputs/template_based_policies.json", cache=cache)
@@ -0,0 +1,179 @@
+# shacl_differential.py
+# ----------------------------------------------------------------------------
+# Differential check of the native SHACL engine (shacl_native.py) against
+# pyshacl. Every policy found under outputs/ is prepared the way each
+# validator prepares it - the template validator, src/models/validator.py
+# and src/models/validate_and_filter_policies.py - and validated by both
+# engines; conformance and the violation list must agree.
+#
+# Usage: python src/templates/shacl_differential.py [--mutations N] [paths...]
+# Exits non-zero on any disagreement.
+# ----------------------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import random
+import sys
+from collections import Counter
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "models"))
+
+from rdflib import BNode, Literal
+from jsonld_loader import parse_jsonld
+from shapes_registry import INFERENCE_MODES, SH, SHACL_PATH, validate_against_shapes
+from shacl_native import validate_native
+from policy_validator import prepare_for_validation, shacl_document
+import validator as models_validator
+import validate_and_filter_policies as filter_validator
+
+DEFAULT_CORPORA = "outputs/**/*.json"
+
+# Validator name -> function building the JSON-LD document it validates
+PIPELINES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "templates": lambda p: shacl_document(prepare_for_validation(p)),
+    "models": models_validator._policy_document,
+    "filter": lambda p: filter_validator._expand_for_validation(
+        filter_validator.inject_context_and_flatten(deepcopy(p))),
+}
+
+# ----------------------------------------------------------------------------
+# Corpora
+# ----------------------------------------------------------------------------
+
+def iter_corpus_policies(paths: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (label, policy) for every policy-like object in the given JSON files."""
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, list):
+            continue
+        for i, entry in enumerate(data):
+            policy = entry.get("odrl", entry) if isinstance(entry, dict) else None
+            if isinstance(policy, dict) and ("uid" in policy or "@type" in policy):
+                yield f"{path}#{i}", policy
+
+# Perturbations that make the (otherwise mostly vacuous) documents exercise the shapes
+def _mutations(policy: Dict[str, Any], rng: random.Random) -> Iterator[Dict[str, Any]]:
+    uid = policy.get("uid", "http://example.com/policy/x")
+    yield {**policy, "@type": "odrl:Policy"}
+    yield {**policy, "@type": "odrl:Policy", "odrl:uid": uid}
+    yield {**policy, "@type": ["odrl:Set", "odrl:Policy"], "odrl:uid": {"@value": uid, "@type": "xsd:anyURI"}}
+    yield {**policy, "@id": "http://example.com/p/" + str(rng.randrange(3)), "@type": "odrl:Policy",
+           "odrl:uid": [{"@value": uid, "@type": "xsd:anyURI"}, {"@id": uid}]}
+    rule = dict(rng.choice(policy.get("permission") or [{}]))
+    yield {**policy, "odrl:permission": {
+        "@type": rng.choice(["odrl:Permission", "odrl:Prohibition", "odrl:Obligation"]),
+        "odrl:action": rule.get("action"), "odrl:target": rule.get("target"),
+        "odrl:constraint": {"odrl:leftOperand": "odrl:count", "odrl:operator": {"@id": "odrl:lt"},
+                            "odrl:rightOperand": rng.choice([5, 2.5, None, "x"])}}}
+    yield {**policy, "odrl:obligation": {"@list": [{"@type": "odrl:Obligation", "odrl:action": "use"},
+                                                   {"odrl:constraint": True}]}}
+
+# ----------------------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------------------
+
+def _node_key(kind: str, value: Any) -> Any:
+    # Blank node labels and the base of relative IRIs differ between engines
+    if kind == "bnode":
+        return "bnode"
+    if kind == "iri":
+        return "relative" if value.startswith("file:") else value
+    return value
+
+def _rdflib_key(term) -> Any:
+    if term is None:
+        return None
+    if isinstance(term, BNode):
+        return "bnode"
+    if isinstance(term, Literal):
+        return ("literal", str(term), str(term.datatype) if term.datatype else None, term.language)
+    return _node_key("iri", str(term))
+
+def _native_key(term) -> Any:
+    if term is None:
+        return None
+    return tuple(term) if term[0] == "literal" else _node_key(*term)
+
+def pyshacl_violations(report_graph) -> Counter:
+    found = Counter()
+    for result in report_graph.objects(None, SH.result):
+        component = str(report_graph.value(result, SH.sourceConstraintComponent))
+        value = report_graph.value(result, SH.value) if component.endswith("DatatypeConstraintComponent") else None
+        focus = report_graph.value(result, SH.focusNode)
+        focus = str(focus) if isinstance(focus, Literal) else _rdflib_key(focus)
+        found[(focus, str(report_graph.value(result, SH.resultPath)), component, _rdflib_key(value))] += 1
+    return found
+
+def native_violations(violations) -> Counter:
+    found = Counter()
+    for v in violations:
+        focus = "bnode" if v.focus is None else _node_key("iri", v.focus)
+        found[(focus, v.path, v.component, _native_key(v.value))] += 1
+    return found
+
+def compare(document: Dict[str, Any], shapes_file: str, inference: str = "rdfs") -> Tuple[str, str]:
+    """Return (status, detail) with status one of 'agree', 'fallback', 'disagree'."""
+    native = validate_native(document, shapes_file, inference=inference)
+    if native is None:
+        return "fallback", ""
+    graph = parse_jsonld(document)
+    conforms, report_graph, _ = validate_against_shapes(graph, shapes_file, inference=inference)
+    expected = pyshacl_violations(report_graph)
+    actual = native_violations(native[1])
+    if conforms == native[0] and expected == actual:
+        return "agree", ""
+    return "disagree", f"pyshacl={conforms} {dict(expected)} native={native[0]} {dict(actual)}"
+
+# ----------------------------------------------------------------------------
+# Script Entry
+# ----------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the native SHACL engine with pyshacl.")
+    parser.add_argument("paths", nargs="*", help=f"Policy JSON files (default: {DEFAULT_CORPORA})")
+    parser.add_argument("--shapes", default=SHACL_PATH, help="SHACL shapes file")
+    parser.add_argument("--mutations", type=int, default=0,
+                        help="Perturbed variants to check per policy (0 = corpus only)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the perturbations")
+    parser.add_argument("--inference", choices=INFERENCE_MODES, default="rdfs", help="Inference mode pyshacl runs with")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(DEFAULT_CORPORA, recursive=True))
+    rng = random.Random(args.seed)
+    stats = {name: Counter() for name in PIPELINES}
+    disagreements = []
+
+    for label, policy in iter_corpus_policies(paths):
+        variants = [policy] + list(_mutations(policy, rng))[:args.mutations]
+        for n, variant in enumerate(variants):
+            for name, build in PIPELINES.items():
+                try:
+                    document = build(variant)
+                except Exception:
+                    stats[name]["unprepared"] += 1
+                    continue
+                status, detail = compare(document, args.shapes, args.inference)
+                stats[name][status] += 1
+                if status == "disagree":
+                    disagreements.append(f"{label} variant {n} [{name}]: {detail}")
+
+    for name, counts in stats.items():
+        print(f"{name:10s} " + "  ".join(f"{k}={counts[k]}" for k in ("agree", "fallback", "disagree", "unprepared")))
+    for line in disagreements[:20]:
+        print("  " + line)
+    if disagreements:
+        print(f"{len(disagreements)} disagreement(s)")
+        return 1
+    print("native engine agrees with pyshacl")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+# shacl_native.py
+# ----------------------------------------------------------------------------
+# Native fast path for the project's SHACL shapes.
+# Compiles a shapes graph (node shapes with class / subjects-of / objects-of
+# / node targets and property shapes with sh:path, sh:minCount, sh:maxCount
+# and sh:datatype) into Python predicates, and evaluates them directly on
+# the JSON-LD documents the validators would otherwise parse with rdflib.
+#
+# Anything outside that subset - other SHACL constraints, nested or remote
+# contexts, RDFS schema statements, IRIs rdflib would resolve differently -
+# makes `validate_native` return None and the caller falls back to pyshacl.
+# Agreement with pyshacl is checked by shacl_differential.py.
+# ----------------------------------------------------------------------------
+
+import os
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+from shapes_registry import RDF_AVAILABLE, SHACL_PATH, get_shapes, resolve_inference
+
+if RDF_AVAILABLE:
+    from rdflib import Literal, URIRef
+    from rdflib.namespace import RDF
+    from shapes_registry import SH
+
+# "pyshacl" disables the fast path, e.g. to compare timings
+NATIVE_ENABLED = os.getenv("SHACL_ENGINE", "native") != "pyshacl"
+
+# Inference modes whose results the native engine reproduces (see expand_document)
+NATIVE_INFERENCE = {"none", "rdfs", "closure"}
+
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDF_TYPE = RDF_NS + "type"
+RDF_FIRST = RDF_NS + "first"
+RDF_REST = RDF_NS + "rest"
+RDF_NIL = RDF_NS + "nil"
+XSD_NS = "http://www.w3.org/2001/XMLSchema#"
+SH_NS = "http://www.w3.org/ns/shacl#"
+
+# Statements that let RDFS inference derive new types or property values
+SCHEMA_PROPERTIES = {
+    "http://www.w3.org/2000/01/rdf-schema#" + name
+    for name in ("subClassOf", "subPropertyOf", "domain", "range")
+}
+
+class UnsupportedShapes(Exception):
+    """The shapes graph uses SHACL features the native engine does not compile."""
+
+class UnsupportedDocument(Exception):
+    """The document uses JSON-LD features the native engine does not expand."""
+
+# ----------------------------------------------------------------------------
+# Terms
+# ----------------------------------------------------------------------------
+
+# Nodes are ("iri", iri) or ("bnode", label); literals are ("literal", lexical, datatype, language)
+Term = Tuple
+
+class Violation(NamedTuple):
+    focus: Optional[str]   # IRI (or literal lexical form) of the focus node, None for blank nodes
+    path: str
+    component: str         # e.g. sh:MinCountConstraintComponent (full IRI)
+    value: Optional[Term]  # offending value node, for value-level constraints
+
+SCHEME = re.compile(r"^[A-Za-z][A-Za-z0-9+.\-]*$")
+IRI_UNSAFE = re.compile(r"[\s<>\"{}|\\^`]")
+RELATIVE_SAFE = re.compile(r"^[A-Za-z0-9_~\-][A-Za-z0-9._~\-]*$")
+RELATIVE_BASE = "file:///__base__/"  # rdflib resolves against the working directory; only identity matters
+
+def _checked_iri(iri: str) -> str:
+    if IRI_UNSAFE.search(iri):
+        raise UnsupportedDocument(f"IRI rdflib may reject: {iri!r}")
+    return iri
+
+# ----------------------------------------------------------------------------
+# Shape Compiler
+# ----------------------------------------------------------------------------
+
+def _literal_check(datatype: str) -> Callable[[Term], bool]:
+    def check(value: Term) -> bool:
+        return value[0] == "literal" and value[2] == datatype and value[3] is None
+    return check
+
+# sh:datatype values the engine can decide without a lexical-space check
+DATATYPE_CHECKS = {
+    XSD_NS + "anyURI": _literal_check(XSD_NS + "anyURI"),
+}
+
+class PropertyCheck(NamedTuple):
+    path: str
+    min_count: Optional[int]
+    max_count: Optional[int]
+    datatype: Optional[str]
+
+class CompiledShape(NamedTuple):
+    target_classes: Tuple[str, ...]
+    subjects_of: Tuple[str, ...]
+    objects_of: Tuple[str, ...]
+    target_nodes: Tuple[str, ...]
+    properties: Tuple[PropertyCheck, ...]
+
+NODE_SHAPE_KEYS = {"targetClass", "targetSubjectsOf", "targetObjectsOf", "targetNode", "property"}
+PROPERTY_SHAPE_KEYS = {"path", "minCount", "maxCount", "datatype"}
+ANNOTATION_KEYS = {"name", "description", "message", "severity", "order", "group"}
+
+def _sh_local(predicate) -> Optional[str]:
+    return predicate[len(SH_NS):] if str(predicate).startswith(SH_NS) else None
+
+def _shape_triples(graph, shape, allowed: Set[str], shape_type) -> Dict[str, List]:
+    """Group a shape's triples by sh: local name, rejecting anything not in `allowed`."""
+    grouped: Dict[str, List] = {}
+    for p, o in graph.predicate_objects(shape):
+        if p == RDF.type and o == shape_type:
+            continue
+        local = _sh_local(p)
+        if local in ANNOTATION_KEYS:
+            continue
+        if local not in allowed:
+            raise UnsupportedShapes(f"unsupported shape triple: {p} {o}")
+        grouped.setdefault(local, []).append(o)
+    return grouped
+
+def _count(values) -> Optional[int]:
+    if not values:
+        return None
+    if len(values) > 1 or not isinstance(values[0], Literal) or not isinstance(values[0].toPython(), int):
+        raise UnsupportedShapes("cardinality must be a single integer")
+    return values[0].toPython()
+
+def _compile_property(graph, node) -> PropertyCheck:
+    spec = _shape_triples(graph, node, PROPERTY_SHAPE_KEYS, SH.PropertyShape)
+    paths = spec.get("path", [])
+    if len(paths) != 1 or not isinstance(paths[0], URIRef):
+        raise UnsupportedShapes("only single predicate paths are supported")
+    datatypes = spec.get("datatype", [])
+    if len(datatypes) > 1 or (datatypes and str(datatypes[0]) not in DATATYPE_CHECKS):
+        raise UnsupportedShapes(f"unsupported sh:datatype {datatypes}")
+    return PropertyCheck(
+        path=str(paths[0]),
+        min_count=_count(spec.get("minCount")),
+        max_count=_count(spec.get("maxCount")),
+        datatype=str(datatypes[0]) if datatypes else None
+    )
+
+def compile_shapes(graph) -> Tuple[CompiledShape, ...]:
+    """Compile a shapes graph, raising UnsupportedShapes for features outside the native subset."""
+    targets = {SH.targetClass, SH.targetSubjectsOf, SH.targetObjectsOf, SH.targetNode}
+    node_shapes = set(graph.subjects(RDF.type, SH.NodeShape))
+    node_shapes |= {s for p in targets for s in graph.subjects(p, None)}
+    property_shapes = set(graph.objects(None, SH.property))
+
+    for s, p, o in graph:
+        if s in node_shapes or s in property_shapes:
+            continue
+        if str(p).startswith(SH_NS) or (p == RDF.type and str(o).startswith(SH_NS)):
+            raise UnsupportedShapes(f"unsupported shapes triple: {s} {p} {o}")
+    if node_shapes & property_shapes:
+        raise UnsupportedShapes("property shapes with their own targets are not supported")
+
+    compiled = []
+    for shape in node_shapes:
+        spec = _shape_triples(graph, shape, NODE_SHAPE_KEYS, SH.NodeShape)
+        nodes = spec.get("targetNode", [])
+        if not all(isinstance(n, URIRef) for n in nodes):
+            raise UnsupportedShapes("only IRI sh:targetNode values are supported")
+        checks = tuple(_compile_property(graph, p) for p in spec.get("property", []))
+        compiled.append(CompiledShape(
+            target_classes=tuple(map(str, spec.get("targetClass", []))),
+            subjects_of=tuple(map(str, spec.get("targetSubjectsOf", []))),
+            objects_of=tuple(map(str, spec.get("targetObjectsOf", []))),
+            target_nodes=tuple(map(str, nodes)),
+            properties=tuple(c for c in checks if c.min_count or c.max_count is not None or c.datatype)
+        ))
+    return tuple(compiled)
+
+_COMPILED: Dict[str, Optional[Tuple[CompiledShape, ...]]] = {}
+
+def get_compiled_shapes(shapes_file: str = SHACL_PATH) -> Optional[Tuple[CompiledShape, ...]]:
+    """Compiled shapes for a file (None if it needs pyshacl), cached by the shapes digest."""
+    loaded = get_shapes(shapes_file)
+    if loaded.digest not in _COMPILED:
+        try:
+            _COMPILED[loaded.digest] = compile_shapes(loaded.graph)
+        except UnsupportedShapes:
+            _COMPILED[loaded.digest] = None
+    return _COMPILED[loaded.digest]
+
+# ----------------------------------------------------------------------------
+# JSON-LD Expansion
+# ----------------------------------------------------------------------------
+
+VALUE_KEYS = {"@value", "@type", "@language", "@index"}
+NODE_KEYWORDS = {"@id", "@type", "@index"}
+
+class DocumentGraph:
+    """The triples rdflib's JSON-LD parser would produce, indexed for shape evaluation."""
+
+    def __init__(self):
+        self.props: Dict[Term, Dict[str, Set[Term]]] = {}
+        self._blank = 0
+
+    def new_blank(self) -> Term:
+        self._blank += 1
+        return ("bnode", f"#{self._blank}")
+
+    def add(self, subject: Term, predicate: str, value: Term) -> None:
+        if predicate in SCHEMA_PROPERTIES:
+            raise UnsupportedDocument("RDFS schema statements change inferred types")
+        self.props.setdefault(subject, {}).setdefault(predicate, set()).add(value)
+
+    def values(self, node: Term, predicate: str) -> Set[Term]:
+        return self.props.get(node, {}).get(predicate, set())
+
+    def instances(self, cls: str) -> Set[Term]:
+        target = ("iri", cls)
+        return {s for s, props in self.props.items() if target in props.get(RDF_TYPE, ())}
+
+    def subjects_of(self, predicate: str) -> Set[Term]:
+        return {s for s, props in self.props.items() if predicate in props}
+
+    def objects_of(self, predicate: str) -> Set[Term]:
+        return {o for props in self.props.values() for o in props.get(predicate, ())}
+
+class _Expander:
+    def __init__(self, context: Any):
+        if not isinstance(context, dict):
+            raise UnsupportedDocument("only inline object contexts are supported")
+        self.terms: Dict[str, str] = {}
+        for term, iri in context.items():
+            if term.startswith("@") or not isinstance(iri, str) or ":" not in iri or iri[-1] not in ":/?#[]@":
+                raise UnsupportedDocument(f"unsupported term definition {term!r}")
+            self.terms[term] = _checked_iri(iri)
+        self.graph = DocumentGraph()
+        self.labels: Dict[str, Term] = {}
+
+    # IRI expansion --------------------------------------------------------
+
+    def _compact(self, value: str) -> Optional[str]:
+        prefix, _, suffix = value.partition(":")
+        if prefix in self.terms and not suffix.startswith("//"):
+            return _checked_iri(self.terms[prefix] + suffix)
+        if SCHEME.match(prefix):
+            return _checked_iri(value)
+        raise UnsupportedDocument(f"unsupported IRI {value!r}")
+
+    def property_iri(self, key: str) -> Optional[str]:
+        if key in self.terms:
+            return self.terms[key]
+        if ":" not in key:
+            return None  # undefined terms are dropped
+        if key.startswith("_:"):
+            return None  # blank node properties are dropped
+        return self._compact(key)
+
+    def node_ref(self, value: Any, vocab: bool = False) -> Term:
+        if not isinstance(value, str):
+            raise UnsupportedDocument(f"unsupported node reference {value!r}")
+        if value.startswith("_:"):
+            return self.labels.setdefault(value, self.graph.new_blank())
+        if vocab and value in self.terms:
+            return ("iri", self.terms[value])
+        if ":" in value:
+            return ("iri", self._compact(value))
+        if not RELATIVE_SAFE.match(value) or value in (".", ".."):
+            raise UnsupportedDocument(f"relative IRI {value!r}")
+        return ("iri", urljoin(RELATIVE_BASE, value))
+
+    # Values ---------------------------------------------------------------
+
+    def literal(self, value: Any) -> Term:
+        if isinstance(value, bool):
+            return ("literal", "true" if value else "false", XSD_NS + "boolean", None)
+        if isinstance(value, int):
+            if abs(value) >= 10 ** 21:
+                raise UnsupportedDocument("integer outside the JSON-LD integer range")
+            return ("literal", str(value), XSD_NS + "integer", None)
+        if isinstance(value, float):
+            if value != value or value in (float("inf"), float("-inf")):
+                raise UnsupportedDocument("non-finite number")
+            return ("literal", repr(value), XSD_NS + "double", None)
+        if isinstance(value, str):
+            return ("literal", value, None, None)
+        raise UnsupportedDocument(f"unsupported value {value!r}")
+
+    def values(self, value: Any) -> List[Term]:
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return [v for item in value for v in self.values(item)]
+        if not isinstance(value, dict):
+            return [self.literal(value)]
+        if "@value" in value:
+            return self.value_object(value)
+        if "@list" in value:
+            if not set(value) <= {"@list", "@index"}:
+                raise UnsupportedDocument("unsupported list object")
+            return [self.list_object(value["@list"])]
+        if "@set" in value:
+            if not set(value) <= {"@set", "@index"}:
+                raise UnsupportedDocument("unsupported set object")
+            return self.values(value["@set"])
+        return [self.node(value)]
+
+    def value_object(self, value: Dict[str, Any]) -> List[Term]:
+        if not set(value) <= VALUE_KEYS or ("@type" in value and "@language" in value):
+            raise UnsupportedDocument("unsupported value object")
+        raw = value["@value"]
+        if raw is None:
+            return []
+        if "@type" in value:
+            if not isinstance(raw, str):
+                raise UnsupportedDocument("typed non-string value")
+            return [("literal", raw, self.node_ref(value["@type"], vocab=True)[1], None)]
+        if "@language" in value:
+            if not isinstance(raw, str) or not isinstance(value["@language"], str):
+                raise UnsupportedDocument("unsupported language value")
+            return [("literal", raw, None, value["@language"])]
+        return [self.literal(raw)]
+
+    def list_object(self, items: Any) -> Term:
+        if not isinstance(items, list):
+            items = [items]
+        members = []
+        for item in items:
+            if isinstance(item, list) or (isinstance(item, dict) and "@list" in item):
+                raise UnsupportedDocument("lists of lists")
+            members.extend(self.values(item))
+        head: Term = ("iri", RDF_NIL)
+        for member in reversed(members):
+            cell = self.graph.new_blank()
+            self.graph.add(cell, RDF_FIRST, member)
+            self.graph.add(cell, RDF_REST, head)
+            head = cell
+        return head
+
+    def node(self, obj: Dict[str, Any]) -> Term:
+        subject = self.node_ref(obj["@id"]) if "@id" in obj else self.graph.new_blank()
+        for key, value in obj.items():
+            if not isinstance(key, str):
+                raise UnsupportedDocument("non-string key")
+            if key.startswith("@"):
+                if key not in NODE_KEYWORDS:
+                    raise UnsupportedDocument(f"unsupported keyword {key}")
+                if key == "@type":
+                    for t in value if isinstance(value, list) else [value]:
+                        self.graph.add(subject, RDF_TYPE, self.node_ref(t, vocab=True))
+                continue
+            predicate = self.property_iri(key)
+            if predicate is None:
+                continue
+            for v in self.values(value):
+                self.graph.add(subject, predicate, v)
+        return subject
+
+def expand_document(document: Any) -> DocumentGraph:
+    """Expand a JSON-LD document carrying its own inline context into a DocumentGraph.
+
+    Raises UnsupportedDocument for anything whose RDF rdflib might produce
+    differently. Documents with RDFS schema statements are rejected, so the
+    graph is already closed under the project's inference modes as far as
+    types and property values are concerned.
+    """
+    if not isinstance(document, dict) or "@context" not in document:
+        raise UnsupportedDocument("document must be an object with an inline @context")
+    expander = _Expander(document["@context"])
+    body = {k: v for k, v in document.items() if k != "@context"}
+    expander.node(body)
+    return expander.graph
+
+# ----------------------------------------------------------------------------
+# Shape Evaluation
+# ----------------------------------------------------------------------------
+
+MIN_COUNT = SH_NS + "MinCountConstraintComponent"
+MAX_COUNT = SH_NS + "MaxCountConstraintComponent"
+DATATYPE = SH_NS + "DatatypeConstraintComponent"
+
+def _focus_nodes(shape: CompiledShape, graph: DocumentGraph) -> Set[Term]:
+    focus = {("iri", n) for n in shape.target_nodes}
+    for cls in shape.target_classes:
+        focus |= graph.instances(cls)
+    for predicate in shape.subjects_of:
+        focus |= graph.subjects_of(predicate)
+    for predicate in shape.objects_of:
+        focus |= graph.objects_of(predicate)
+    return focus
+
+def evaluate(shapes: Tuple[CompiledShape, ...], graph: DocumentGraph) -> Tuple[bool, List[Violation]]:
+    """Run compiled shapes over a document graph; returns (conforms, violations)."""
+    violations = []
+    for shape in shapes:
+        for node in _focus_nodes(shape, graph):
+            focus = None if node[0] == "bnode" else node[1]
+            for check in shape.properties:
+                found = graph.values(node, check.path)  # empty for literal focus nodes
+                if check.min_count is not None and len(found) < check.min_count:
+                    violations.append(Violation(focus, check.path, MIN_COUNT, None))
+                if check.max_count is not None and len(found) > check.max_count:
+                    violations.append(Violation(focus, check.path, MAX_COUNT, None))
+                if check.datatype is not None:
+                    accepts = DATATYPE_CHECKS[check.datatype]
+                    violations.extend(Violation(focus, check.path, DATATYPE, v) for v in found if not accepts(v))
+    return not violations, violations
+
+def validate_native(document: Any, shapes_file: str = SHACL_PATH,
+                    inference: Optional[str] = None) -> Optional[Tuple[bool, List[Violation]]]:
+    """(conforms, violations) for a JSON-LD document, or None if pyshacl must decide."""
+    if not NATIVE_ENABLED or not RDF_AVAILABLE or resolve_inference(inference) not in NATIVE_INFERENCE:
+        return None
+    shapes = get_compiled_shapes(shapes_file)
+    if shapes is None:
+        return None
+    try:
+        graph = expand_document(document)
+    except UnsupportedDocument:
+        return None
+    return evaluate(shapes, graph)
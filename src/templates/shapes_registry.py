@@ -0,0 +1,293 @@
+# shapes_registry.py
+# ----------------------------------------------------------------------------
+# Process-wide registry of parsed SHACL shapes graphs.
+# Shapes files are parsed once per process and re-read only when their
+# modification time or size changes. Shared by the template validator and
+# the LLM pipeline validators (src/models).
+# ----------------------------------------------------------------------------
+
+import hashlib
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Optional RDF support
+try:
+    from rdflib import BNode, Graph, Literal, Namespace, URIRef
+    from rdflib.namespace import OWL, RDF, RDFS
+    from pyshacl import validate as shacl_validate
+    RDF_AVAILABLE = True
+    SH = Namespace("http://www.w3.org/ns/shacl#")
+except ImportError:
+    RDF_AVAILABLE = False
+
+SHACL_PATH = "config/shacl_shapes.ttl"
+
+# Inference before SHACL validation:
+#   rdfs    - pyshacl computes the full RDFS closure of every data graph
+#   closure - only the RDFS entailments the shapes can observe are added
+#             (see VocabularyClosure); same conformance as rdfs
+#   none    - no inference; fastest, ignores RDFS schema statements in the data
+INFERENCE_MODES = ("rdfs", "closure", "none")
+DEFAULT_INFERENCE = os.getenv("SHACL_INFERENCE", "rdfs")
+
+# ----------------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------------
+
+class LoadedShapes(NamedTuple):
+    graph: "Graph"
+    digest: str       # sha256 of the shapes file, for cache keys
+    stamp: Tuple[int, int]  # (mtime_ns, size) the graph was parsed from
+    batchable: bool   # False if shapes distinguish blank nodes from IRIs (see validate_graphs_batch)
+
+class ShapesRegistry:
+    """Parse each shapes file once and hand out the shared graph."""
+
+    def __init__(self):
+        self._entries: Dict[str, LoadedShapes] = {}
+
+    def get(self, path: str = SHACL_PATH) -> LoadedShapes:
+        if not RDF_AVAILABLE:
+            raise RuntimeError("SHACL shapes require the 'rdflib' and 'pyshacl' packages")
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(key)
+        if entry is None or entry.stamp != stamp:
+            with open(key, "rb") as f:
+                data = f.read()
+            graph = Graph().parse(data=data, format="turtle")
+            batchable = (None, SH.nodeKind, None) not in graph
+            entry = self._entries[key] = LoadedShapes(graph, hashlib.sha256(data).hexdigest(), stamp, batchable)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+_registry = ShapesRegistry()
+
+def get_shapes(path: str = SHACL_PATH) -> LoadedShapes:
+    """Return the parsed shapes graph for `path`, reloading it if the file changed."""
+    return _registry.get(path)
+
+def get_shapes_graph(path: str = SHACL_PATH) -> "Graph":
+    return _registry.get(path).graph
+
+# ----------------------------------------------------------------------------
+# Inference
+# ----------------------------------------------------------------------------
+
+def set_default_inference(mode: str) -> None:
+    """Set the inference mode used when callers pass inference=None (inherited by worker processes)."""
+    global DEFAULT_INFERENCE
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode {mode!r}; expected one of {INFERENCE_MODES}")
+    DEFAULT_INFERENCE = os.environ["SHACL_INFERENCE"] = mode
+
+def resolve_inference(mode: Optional[str] = None) -> str:
+    return DEFAULT_INFERENCE if mode is None else mode
+
+# Schema statements in a data graph would leak into every merged neighbour
+# under RDFS inference, so graphs that carry them are validated on their own.
+SCHEMA_PREDICATES = {RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range} if RDF_AVAILABLE else set()
+
+# Vocabularies whose RDFS axioms the closure does not reproduce
+BUILTIN_NAMESPACES = (str(RDF), str(RDFS), str(OWL)) if RDF_AVAILABLE else ()
+
+def _builtin(term) -> bool:
+    return isinstance(term, URIRef) and term.startswith(BUILTIN_NAMESPACES)
+
+def _transitive(pairs) -> Dict:
+    """Reflexive-transitive closure of a relation given as (sub, super) pairs."""
+    direct: Dict = {}
+    for sub, sup in pairs:
+        direct.setdefault(sub, set()).add(sup)
+    closure = {}
+    for start in direct:
+        seen, stack = {start}, [start]
+        while stack:
+            for sup in direct.get(stack.pop(), ()):
+                if sup not in seen:
+                    seen.add(sup)
+                    stack.append(sup)
+        closure[start] = seen
+    return closure
+
+class VocabularyClosure:
+    """RDFS entailments restricted to the classes and properties a shapes graph observes.
+
+    The relevant vocabulary - target and sh:class classes, paths and target
+    predicates - is collected once per shapes graph. For a data graph
+    without RDFS schema statements the RDFS closure adds nothing those
+    shapes can see (the axiomatic triples only concern rdf:/rdfs: terms),
+    so the graph is validated as-is. Otherwise subclass, subproperty,
+    domain and range entailments are computed and only the triples about
+    relevant terms are added. `apply` returns None when that would not be
+    exact (shapes about built-in vocabulary, SPARQL constraints, complex
+    paths, schema statements about built-in terms), and the caller falls
+    back to full RDFS inference.
+    """
+
+    def __init__(self, shapes_graph: "Graph"):
+        self.classes = set(shapes_graph.objects(None, SH.targetClass)) | set(shapes_graph.objects(None, SH["class"]))
+        self.classes |= {s for c in (RDFS.Class, OWL.Class) for s in shapes_graph.subjects(RDF.type, c)}
+        self.properties = set()
+        for p in (SH.path, SH.targetSubjectsOf, SH.targetObjectsOf, SH.equals, SH.disjoint,
+                  SH.lessThan, SH.lessThanOrEquals):
+            self.properties |= set(shapes_graph.objects(None, p))
+        self.exact = (
+            all(isinstance(t, URIRef) and not _builtin(t) for t in self.classes | self.properties)
+            and (None, SH.sparql, None) not in shapes_graph
+        )
+
+    def apply(self, data_graph: "Graph") -> Optional["Graph"]:
+        """`data_graph` plus the relevant RDFS entailments, or None if only full inference is exact."""
+        if not self.exact:
+            return None
+        schema = [(s, p, o) for p in SCHEMA_PREDICATES for s, o in data_graph.subject_objects(p)]
+        if not schema:
+            return data_graph
+        if any(_builtin(s) or _builtin(o) or isinstance(o, Literal) for s, _, o in schema):
+            return None
+
+        subclass = _transitive((s, o) for s, p, o in schema if p == RDFS.subClassOf)
+        subproperty = _transitive((s, o) for s, p, o in schema if p == RDFS.subPropertyOf)
+        domains, ranges = {}, {}
+        for s, p, o in schema:
+            if p == RDFS.domain:
+                domains.setdefault(s, set()).add(o)
+            elif p == RDFS.range:
+                ranges.setdefault(s, set()).add(o)
+
+        inferred, typed = set(), set()
+        for s, p, o in data_graph:
+            if p == RDF.type:
+                typed.add((s, o))
+                continue
+            for q in subproperty.get(p, (p,)):
+                if q != p and q in self.properties:
+                    inferred.add((s, q, o))
+                typed.update((s, c) for c in domains.get(q, ()))
+                for c in ranges.get(q, ()):
+                    if isinstance(o, Literal):
+                        if any(d in self.classes for d in subclass.get(c, (c,))):
+                            return None
+                    else:
+                        typed.add((o, c))
+        for node, cls in typed:
+            inferred.update((node, RDF.type, c) for c in subclass.get(cls, (cls,)) if c in self.classes)
+
+        inferred = {t for t in inferred if t not in data_graph}
+        if not inferred:
+            return data_graph
+        closed = Graph()
+        for t in data_graph:
+            closed.add(t)
+        for t in inferred:
+            closed.add(t)
+        return closed
+
+_CLOSURES: Dict[str, VocabularyClosure] = {}
+
+def get_closure(path: str = SHACL_PATH) -> VocabularyClosure:
+    """The VocabularyClosure of a shapes file, computed once per shapes digest."""
+    shapes = get_shapes(path)
+    if shapes.digest not in _CLOSURES:
+        _CLOSURES[shapes.digest] = VocabularyClosure(shapes.graph)
+    return _CLOSURES[shapes.digest]
+
+# ----------------------------------------------------------------------------
+# Validation
+# ----------------------------------------------------------------------------
+
+def validate_against_shapes(data_graph, shapes_file: str = SHACL_PATH, inference: Optional[str] = None, **kwargs):
+    """Run pyshacl against the registry's shapes graph; returns (conforms, report_graph, report_text).
+
+    `inference` is one of INFERENCE_MODES (None: DEFAULT_INFERENCE).
+    """
+    inference = resolve_inference(inference)
+    if inference not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode {inference!r}; expected one of {INFERENCE_MODES}")
+    if inference == "closure":
+        closed = get_closure(shapes_file).apply(data_graph)
+        data_graph, inference = (data_graph, "rdfs") if closed is None else (closed, "none")
+    return shacl_validate(
+        data_graph=data_graph,
+        shacl_graph=get_shapes_graph(shapes_file),
+        inference=inference,
+        debug=False,
+        **kwargs
+    )
+
+_CONFORMING_REPORTS: Dict[str, Tuple] = {}
+
+def conforming_report(shapes_file: str = SHACL_PATH, inference: Optional[str] = None) -> Tuple:
+    """The (report_graph, report_text) pyshacl returns for a conforming graph."""
+    inference = resolve_inference(inference)
+    key = f"{get_shapes(shapes_file).digest}:{inference}"
+    if key not in _CONFORMING_REPORTS:
+        _CONFORMING_REPORTS[key] = validate_against_shapes(Graph(), shapes_file, inference)[1:]
+    return _CONFORMING_REPORTS[key]
+
+# ----------------------------------------------------------------------------
+# Batch Validation
+# ----------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 256  # Policies merged into one data graph per pyshacl run
+
+BATCH_NS = "urn:x-shacl-batch:"
+
+def _owner(node, iri_owners) -> Optional[int]:
+    if isinstance(node, URIRef):
+        if node.startswith(BATCH_NS):
+            return int(node[len(BATCH_NS):].split("/", 1)[0])
+        return iri_owners.get(node)
+    return None
+
+def validate_graphs_batch(graphs: Sequence["Graph"], shapes_file: str = SHACL_PATH,
+                          inference: Optional[str] = None) -> List[bool]:
+    """Return per-graph conformance from a single pyshacl run over all graphs.
+
+    Blank nodes are skolemized into per-graph IRIs so that every result's
+    sh:focusNode can be traced to its graph and graphs cannot share nodes.
+    Graphs that share an IRI node with an earlier graph or carry RDFS schema
+    statements, and all graphs when the shapes test node kinds, fall back to
+    one pyshacl run each, so the answer always equals per-graph validation.
+    """
+    if not get_shapes(shapes_file).batchable:
+        return [validate_against_shapes(g, shapes_file, inference)[0] for g in graphs]
+
+    merged = Graph()
+    iri_owners: Dict = {}   # IRI subject -> graph index
+    iri_values = set()      # IRIs used as (non-rdf:type) values by merged graphs
+    isolated = []
+    for i, g in enumerate(graphs):
+        iri_subjects = {s for s in g.subjects() if isinstance(s, URIRef)}
+        iri_objects = {o for _, p, o in g if isinstance(o, URIRef) and p != RDF.type}
+        if (not iri_subjects.isdisjoint(iri_owners) or not iri_subjects.isdisjoint(iri_values)
+                or not iri_objects.isdisjoint(iri_owners)
+                or any((None, p, None) in g for p in SCHEMA_PREDICATES)):
+            isolated.append(i)
+            continue
+        prefix = f"{BATCH_NS}{i}/"
+        for s, p, o in g:
+            merged.add((
+                URIRef(prefix + s) if isinstance(s, BNode) else s,
+                p,
+                URIRef(prefix + o) if isinstance(o, BNode) else o
+            ))
+        iri_owners.update(dict.fromkeys(iri_subjects, i))
+        iri_values |= iri_objects
+
+    conforms = [True] * len(graphs)
+    batch_conforms, report_graph, _ = validate_against_shapes(merged, shapes_file, inference)
+    if not batch_conforms:
+        for result in report_graph.objects(None, SH.result):
+            owner = _owner(report_graph.value(result, SH.focusNode), iri_owners)
+            if owner is None:
+                # Unattributable result: fall back to validating every graph alone
+                return [validate_against_shapes(g, shapes_file, inference)[0] for g in graphs]
+            conforms[owner] = False
+    for i in isolated:
+        conforms[i] = validate_against_shapes(graphs[i], shapes_file, inference)[0]
+    return conforms
@@ -6,14 +6,19 @@
 
 import random
 import uuid
-from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from utils import generate_policy_id
 from logic_factory import (
     random_constraint,
     random_and_constraint,
     random_or_constraint,
     random_logical_constraint,
+    classify_asset,
+    get_generation_plan,
 )
+from value_factory import generate_right_operand, generate_right_operands
 
 # ----------------------------------------------------------------------------
 # Constants
@@ -52,24 +57,7 @@ ASSET_ACTION_COMPATIBILITY = {
 # ----------------------------------------------------------------------------
 
 def extract_asset_type(asset_uri):
-    asset_uri_lower = asset_uri.lower()
-    if "photo" in asset_uri_lower:
-        return "photo"
-    elif "image" in asset_uri_lower or "img" in asset_uri_lower:
-        return "image"
-    elif "video" in asset_uri_lower or "clip" in asset_uri_lower:
-        return "video"
-    elif "movie" in asset_uri_lower:
-        return "movie"
-    elif "music" in asset_uri_lower or "track" in asset_uri_lower:
-        return "music"
-    elif "document" in asset_uri_lower:
-        return "document"
-    elif "text" in asset_uri_lower or "article" in asset_uri_lower:
-        return "text"
-    elif "data" in asset_uri_lower or "dataset" in asset_uri_lower:
-        return "data"
-    return "asset"
+    return classify_asset(asset_uri)
 
 def get_compatible_action(asset_uri, config):
     asset_type = extract_asset_type(asset_uri)
@@ -183,3 +171,247 @@ def template_json_variant(policy_id, config):
         policy["permission"] = [generate_permission(config, assigner, assignee)]
 
     return policy
+
+# ----------------------------------------------------------------------------
+# Batch Template Generator
+# ----------------------------------------------------------------------------
+
+RULE_SECTIONS = ["permission", "prohibition", "obligation"]
+RULE_TYPES = {"permission": "Permission", "prohibition": "Prohibition", "obligation": "Duty"}
+
+def _flatten_table(rows):
+    """Flatten a list of lists into (flat values, row offsets, row lengths)."""
+    lengths = np.array([len(r) for r in rows])
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return [v for r in rows for v in r], offsets, lengths
+
+def _pick(draws, offsets, lengths, rows):
+    """Map uniform draws to flat-table ids, choosing uniformly within each row."""
+    return offsets[rows] + (draws * lengths[rows]).astype(int)
+
+def template_json_variants(n, config, rng=None):
+    """Generate n policies at once, drawing every categorical choice as NumPy arrays.
+
+    Follows the same distributions as `template_json_variant`, but policy
+    types, party/rule coin flips, targets, actions, constraint kinds and
+    (operand, operator) pairs from the compiled generation plan are all
+    resolved with array operations up front; the Python loop at the end only
+    assembles the dicts, and rightOperand values are filled in per operand
+    with `generate_right_operands`.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    defaults = config["defaults"]
+    policy_types = defaults["policy_types"]
+    parties = defaults["example_party_uris"]
+    assets = defaults["example_asset_uris"]
+
+    # Lookup tables: per-asset actions and compiled (operand, operator) alias tables
+    plan = get_generation_plan(config)
+    asset_types = [classify_asset(a) for a in assets]
+    action_flat, action_offsets, action_lengths = _flatten_table(
+        [ASSET_ACTION_COMPATIBILITY.get(t, defaults["actions"]) for t in asset_types])
+    pair_flat, pair_offsets, pair_lengths = _flatten_table([plan.pairs[t] for t in asset_types])
+    pair_prob = np.array([p for t in asset_types for p in plan.tables[t].prob])
+    pair_alias = np.array([a for t in asset_types for a in plan.tables[t].alias])
+
+    # Draws beyond the cumulative probabilities fall back to "simple", as in maybe_complex_constraint
+    kinds = list(COMPLEX_CONSTRAINT_PROBABILITIES) + ["simple"]
+    kind_bounds = np.cumsum(list(COMPLEX_CONSTRAINT_PROBABILITIES.values()))
+
+    # Policy level: type, parties and which rule sections are present
+    type_idx = rng.integers(len(policy_types), size=n)
+    assigner_idx, assignee_idx = rng.integers(len(parties), size=(2, n))
+    party_coins = rng.random((2, n))
+    rule_coins = rng.random((3, n))
+
+    names = np.array(policy_types, dtype=object)[type_idx]
+    is_agreement = names == "Agreement"
+    is_open = (names == "Set") | (names == "Policy")
+    has_assigner = is_agreement | (names == "Offer") | (is_open & (party_coins[0] < 0.5))
+    has_assignee = is_agreement | (is_open & (party_coins[1] < 0.5))
+
+    present = np.stack([rule_coins[0] < 0.9, rule_coins[1] < 0.5,
+                        has_assigner & has_assignee & (rule_coins[2] < 0.5)], axis=1)
+    present[:, 0] |= ~present.any(axis=1)
+
+    # Rule level: one slot per (policy, section)
+    target_idx = rng.integers(len(assets), size=(n, 3))
+    action_ids = _pick(rng.random((n, 3)), action_offsets, action_lengths, target_idx)
+    rule_assigner_idx, rule_assignee_idx = rng.integers(len(parties), size=(2, n, 3))
+    kind_idx = np.searchsorted(kind_bounds, rng.random((n, 3)), side="right")
+    simple = np.array([k == "simple" for k in kinds])[kind_idx]
+    constraint_counts = np.where(simple, rng.integers(0, 3, size=(n, 3)), 2)
+
+    # Constraint level: at most two constraints per rule, one alias draw each
+    scaled = rng.random((n, 3, 2)) * pair_lengths[target_idx][..., None]
+    columns = pair_offsets[target_idx][..., None] + scaled.astype(int)
+    pair_ids = np.where(scaled % 1.0 < pair_prob[columns], columns,
+                        pair_offsets[target_idx][..., None] + pair_alias[columns])
+
+    # Plain lists index far faster than NumPy scalars in the assembly loop
+    names, present = names.tolist(), present.tolist()
+    has_assigner, has_assignee = has_assigner.tolist(), has_assignee.tolist()
+    assigner_idx, assignee_idx = assigner_idx.tolist(), assignee_idx.tolist()
+    target_idx, action_ids = target_idx.tolist(), action_ids.tolist()
+    rule_assigner_idx, rule_assignee_idx = rule_assigner_idx.tolist(), rule_assignee_idx.tolist()
+    kind_idx, constraint_counts = kind_idx.tolist(), constraint_counts.tolist()
+    pair_ids = pair_ids.tolist()
+
+    # Constraints are grouped by operand so their values are drawn in bulk
+    pending: Dict[str, List[Dict[str, Any]]] = {}
+    policies = []
+    for i in range(n):
+        assigner = parties[assigner_idx[i]] if has_assigner[i] else None
+        assignee = parties[assignee_idx[i]] if has_assignee[i] else None
+        policy = {
+            "@context": ODRL_CONTEXT,
+            "@type": names[i],
+            "uid": generate_uid()
+        }
+
+        for s, section in enumerate(RULE_SECTIONS):
+            if not present[i][s]:
+                continue
+            rule = {
+                "@type": RULE_TYPES[section],
+                "target": assets[target_idx[i][s]],
+                "action": action_flat[action_ids[i][s]],
+                "assigner": assigner or parties[rule_assigner_idx[i][s]]
+            }
+            if section == "obligation":
+                rule["assignee"] = assignee or parties[rule_assignee_idx[i][s]]
+            elif assignee:
+                rule["assignee"] = assignee
+
+            constraints = []
+            for k in range(constraint_counts[i][s]):
+                operand, operator = pair_flat[pair_ids[i][s][k]]
+                constraint = {
+                    "@type": "Constraint",
+                    "leftOperand": operand,
+                    "operator": operator,
+                    "rightOperand": None
+                }
+                pending.setdefault(operand, []).append(constraint)
+                constraints.append(constraint)
+            kind = kinds[kind_idx[i][s]]
+            if kind != "simple":
+                constraints = [{kind: {"@list": constraints}}]
+            if constraints:
+                rule["constraint"] = constraints
+            policy[section] = [rule]
+
+        policies.append(policy)
+
+    for operand, constraints in pending.items():
+        for constraint, value in zip(constraints, generate_right_operands(operand, len(constraints), rng)):
+            constraint["rightOperand"] = value
+
+    return policies
+
+# ----------------------------------------------------------------------------
+# Coverage-Directed Generator
+# ----------------------------------------------------------------------------
+
+CONSTRAINT_KINDS = ["simple", "and", "or", "xone"]
+
+# A coverage cell: (asset type, action, leftOperand, operator, constraint kind)
+Cell = Tuple[str, str, str, str, str]
+
+def _constraint_cells(constraint, asset_type, action):
+    for kind in CONSTRAINT_KINDS[1:]:
+        if kind in constraint:
+            return [(asset_type, action, c.get("leftOperand"), c.get("operator"), kind)
+                    for c in constraint[kind].get("@list", [])]
+    return [(asset_type, action, constraint.get("leftOperand"), constraint.get("operator"), "simple")]
+
+def rule_cells(rule) -> List[Cell]:
+    """Coverage cells touched by one rule's constraints."""
+    asset_type = extract_asset_type(rule.get("target", ""))
+    return [cell for constraint in rule.get("constraint", [])
+            for cell in _constraint_cells(constraint, asset_type, rule.get("action"))]
+
+def policy_cells(policy) -> List[Cell]:
+    """All coverage cells touched by a policy's constrained rules."""
+    return [cell for section in RULE_SECTIONS for rule in policy.get(section, []) for cell in rule_cells(rule)]
+
+class CoverageTracker:
+    """Running counts over every reachable (asset type, action, operand, operator, kind) cell."""
+
+    def __init__(self, config):
+        plan = get_generation_plan(config)
+        self.assets_by_type: Dict[str, List[str]] = {}
+        for asset in config["defaults"]["example_asset_uris"]:
+            self.assets_by_type.setdefault(extract_asset_type(asset), []).append(asset)
+
+        self.universe = {
+            (asset_type, action, operand, operator, kind)
+            for asset_type in self.assets_by_type
+            for action in ASSET_ACTION_COMPATIBILITY.get(asset_type, config["defaults"]["actions"])
+            for operand, operator in plan.pairs[asset_type]
+            for kind in CONSTRAINT_KINDS
+        }
+        self.counts: Counter = Counter()
+        # Swap-remove list of uncovered cells for O(1) random picks
+        self._uncovered = sorted(self.universe)
+        self._position = {cell: i for i, cell in enumerate(self._uncovered)}
+
+    @property
+    def coverage(self) -> float:
+        return 1.0 - len(self._uncovered) / len(self.universe) if self.universe else 1.0
+
+    def update(self, cells: List[Cell]) -> int:
+        """Count observed cells and return how many were newly covered."""
+        new = 0
+        for cell in cells:
+            self.counts[cell] += 1
+            i = self._position.pop(cell, None)
+            if i is not None:
+                last = self._uncovered.pop()
+                if i < len(self._uncovered):
+                    self._uncovered[i] = last
+                    self._position[last] = i
+                new += 1
+        return new
+
+    def pick_uncovered(self) -> Optional[Cell]:
+        return random.choice(self._uncovered) if self._uncovered else None
+
+def _directed_rule(rule, cell, config, assets_by_type):
+    """Retarget a rule so its constraint lands on the given cell."""
+    asset_type, action, operand, operator, kind = cell
+    target = random.choice(assets_by_type[asset_type])
+    constraint = {
+        "@type": "Constraint",
+        "leftOperand": operand,
+        "operator": operator,
+        "rightOperand": generate_right_operand(operand)
+    }
+    if kind != "simple":
+        constraint = {kind: {"@list": [constraint, random_constraint(config, target)]}}
+    rule["target"] = target
+    rule["action"] = action
+    rule["constraint"] = [constraint]
+    return rule
+
+def coverage_directed_variants(config, target_coverage=0.9, max_policies=None, bias=0.8, tracker=None) -> Iterator[Dict[str, Any]]:
+    """Yield policies biased toward uncovered cells until target_coverage is reached.
+
+    Each policy starts from `template_json_variant`; each of its rules is
+    retargeted, with probability `bias`, onto a randomly chosen uncovered
+    cell, so rare (action, operand, operator, kind) combinations appear after
+    far fewer policies than uniform sampling needs. Pass a `tracker` to read
+    the final coverage and per-cell counts.
+    """
+    tracker = tracker or CoverageTracker(config)
+    generated = 0
+    while tracker.coverage < target_coverage and (max_policies is None or generated < max_policies):
+        policy = template_json_variant(None, config)
+        for section in RULE_SECTIONS:
+            for rule in policy.get(section, []):
+                cell = tracker.pick_uncovered() if random.random() < bias else None
+                if cell is not None:
+                    _directed_rule(rule, cell, config, tracker.assets_by_type)
+                tracker.update(rule_cells(rule))
+        generated += 1
+        yield policy
@@ -2,9 +2,48 @@
 # ----------------------------------------------------------------------------
 # Converts ODRL policy structures into human-readable text and keyword summaries.
 # Useful for interpretability, debugging, or presenting policies in natural language.
+#
+# Phrase tables are built once at import; `enhance_policies` streams a whole
+# corpus through the same renderer, drawing verb choices in bulk from a
+# seeded NumPy generator instead of one `random.choice` per rule.
 # ----------------------------------------------------------------------------
 
 import random
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# ----------------------------------------------------------------------------
+# Phrase Tables
+# ----------------------------------------------------------------------------
+
+OPERATOR_PHRASES = {
+    "lt": "is less than",
+    "lteq": "is less than or equal to",
+    "eq": "is equal to",
+    "neq": "is not equal to",
+    "gt": "is greater than",
+    "gteq": "is greater than or equal to",
+    "isA": "is a",
+    "isAnyOf": "is any of",
+    "isNoneOf": "is none of",
+    "hasPart": "has part",
+    "isPartOf": "is part of"
+}
+
+# Rule sections in rendering order, with the verbs each one draws from
+RULE_VERBS = [
+    ("permission", ["allows", "permits", "grants permission to", "authorizes", "enables"]),
+    ("prohibition", ["prohibits", "disallows", "denies", "restricts"]),
+    ("obligation", ["requires", "obligates", "mandates", "expects"]),
+]
+
+LOGICAL_PHRASES = {
+    "or": "at least one of the following applies: ({})",
+    "xone": "exactly one of the following applies: ({})"
+}
+
+VERB_BLOCK_SIZE = 4096  # Uniform draws fetched per refill in batch mode
 
 # ----------------------------------------------------------------------------
 # Operator Translation
@@ -12,19 +51,7 @@ import random
 
 def translate_operator(op: str) -> str:
     """Translate symbolic operators into natural language phrases."""
-    return {
-        "lt": "is less than",
-        "lteq": "is less than or equal to",
-        "eq": "is equal to",
-        "neq": "is not equal to",
-        "gt": "is greater than",
-        "gteq": "is greater than or equal to",
-        "isA": "is a",
-        "isAnyOf": "is any of",
-        "isNoneOf": "is none of",
-        "hasPart": "has part",
-        "isPartOf": "is part of"
-    }.get(op, op)
+    return OPERATOR_PHRASES.get(op, op)
 
 # ----------------------------------------------------------------------------
 # Text Extraction Helpers
@@ -38,72 +65,77 @@ def extract_asset_name(uri):
 # Constraint Description
 # ----------------------------------------------------------------------------
 
+def describe_constraint(c: Dict[str, Any]) -> str:
+    """Render one (possibly logical) constraint."""
+    if "@type" in c:
+        return f"{c['leftOperand']} {OPERATOR_PHRASES.get(c['operator'], c['operator'])} {c['rightOperand']}"
+    if "and" in c or "or" in c or "xone" in c:
+        k = next(iter(c))
+        members = c[k]["@list"]
+        if k == "and":
+            return " and ".join([describe_constraint(x) for x in members])
+        if k in LOGICAL_PHRASES:
+            return LOGICAL_PHRASES[k].format("; or ".join([describe_constraint(x) for x in members]))
+    return ""
+
 def describe_constraints(constraints):
     """Convert a list of ODRL constraints into a readable sentence."""
     if not constraints:
         return ""
-
-    def flatten(c):
-        if "@type" in c:
-            left = c["leftOperand"]
-            op = translate_operator(c["operator"])
-            right = c["rightOperand"]
-            return f"{left} {op} {right}"
-        elif any(k in c for k in ["and", "or", "xone"]):
-            k = next(iter(c))
-            inner = "; or ".join(flatten(x) for x in c[k]['@list'])
-            if k == "and":
-                return " and ".join(flatten(x) for x in c[k]['@list'])
-            elif k == "or":
-                return f"at least one of the following applies: ({inner})"
-            elif k == "xone":
-                return f"exactly one of the following applies: ({inner})"
-        return ""
-
-    parts = [flatten(c) for c in constraints]
-    return "only if " + " and ".join(parts)
+    return "only if " + " and ".join([describe_constraint(c) for c in constraints])
 
 # ----------------------------------------------------------------------------
 # Policy Text Enhancement
 # ----------------------------------------------------------------------------
 
-def enhance_policy(policy):
-    """Add human-readable text and keywords to a policy dictionary."""
+def _render(policy: Dict[str, Any], pick_verb: Callable[[List[str]], str]) -> Dict[str, Any]:
+    """Attach text and keywords to a policy, choosing each rule's verb with pick_verb."""
     odrl = policy.get("odrl", {})
-    permission_texts = []
-    prohibition_texts = []
-    obligation_texts = []
+    texts = []
     keywords = set()
 
-    def describe_rule(rule, verbs):
-        action = rule.get("action")
-        target = extract_asset_name(rule.get("target", "an asset"))
-        assignee = extract_asset_name(rule.get("assignee", "a party"))
-        verb = random.choice(verbs)
-        constraint_desc = describe_constraints(rule.get("constraint", []))
-        base = f"{verb} {assignee} to {action} the asset {target}"
-        return f"{base} {constraint_desc}".strip(), action
-
-    if "permission" in odrl:
-        for perm in odrl["permission"]:
-            t, a = describe_rule(perm, ["allows", "permits", "grants permission to", "authorizes", "enables"])
-            permission_texts.append(t)
-            keywords.add(a)
-
-    if "prohibition" in odrl:
-        for prob in odrl["prohibition"]:
-            t, a = describe_rule(prob, ["prohibits", "disallows", "denies", "restricts"])
-            prohibition_texts.append(t)
-            keywords.add(a)
-
-    if "obligation" in odrl:
-        for obl in odrl["obligation"]:
-            t, a = describe_rule(obl, ["requires", "obligates", "mandates", "expects"])
-            obligation_texts.append(t)
-            keywords.add(a)
-
-    all_text = ". ".join(permission_texts + prohibition_texts + obligation_texts)
-    policy["text"] = all_text.strip(". ") + "."
+    for section, verbs in RULE_VERBS:
+        for rule in odrl.get(section, ()):
+            action = rule.get("action")
+            target = extract_asset_name(rule.get("target", "an asset"))
+            assignee = extract_asset_name(rule.get("assignee", "a party"))
+            verb = pick_verb(verbs)
+            constraint_desc = describe_constraints(rule.get("constraint", []))
+            base = f"{verb} {assignee} to {action} the asset {target}"
+            texts.append(f"{base} {constraint_desc}".strip())
+            keywords.add(action)
+
+    policy["text"] = ". ".join(texts).strip(". ") + "."
     policy["keywords"] = list(sorted(keywords))
-
     return policy
+
+def enhance_policy(policy):
+    """Add human-readable text and keywords to a policy dictionary."""
+    return _render(policy, random.choice)
+
+class VerbSampler:
+    """Uniform verb picks served from blocks of pre-drawn uniforms."""
+
+    def __init__(self, rng: np.random.Generator, block_size: int = VERB_BLOCK_SIZE):
+        self.rng = rng
+        self.block_size = block_size
+        self._draws: List[float] = []
+        self._next = 0
+
+    def __call__(self, verbs: List[str]) -> str:
+        if self._next == len(self._draws):
+            self._draws = self.rng.random(self.block_size).tolist()
+            self._next = 0
+        u = self._draws[self._next]
+        self._next += 1
+        return verbs[int(u * len(verbs))]
+
+def enhance_policies(policies: Iterable[Dict[str, Any]], rng: Optional[np.random.Generator] = None) -> Iterator[Dict[str, Any]]:
+    """Stream-enhance policies, drawing verbs in bulk from a (seeded) NumPy generator.
+
+    Produces the same text format as `enhance_policy`; only the source of
+    the verb choices differs.
+    """
+    pick_verb = VerbSampler(rng if rng is not None else np.random.default_rng())
+    for policy in policies:
+        yield _render(policy, pick_verb)
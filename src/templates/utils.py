@@ -4,12 +4,22 @@
 # and logging. Used across the ODRL policy generation pipeline.
 # ----------------------------------------------------------------------------
 
+import os
 import random
 import uuid
+import hashlib
+import gzip
 import json
 import yaml
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Optional zstd support for compressed policy streams
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # ----------------------------------------------------------------------------
 # Reproducibility
@@ -19,13 +29,89 @@ def set_seed(seed: int) -> None:
     """Seed the random generator for reproducibility."""
     random.seed(seed)
 
+def derive_seed(seed: int, index: Union[int, str]) -> int:
+    """Derive a stable, independent sub-seed (e.g. per shard) from a base seed."""
+    digest = hashlib.blake2b(f"{seed}:{index}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
 # ----------------------------------------------------------------------------
 # ID Generation
 # ----------------------------------------------------------------------------
 
+class IdAllocator(ABC):
+    """Hands out identifiers; swap strategies with `set_id_allocator`."""
+
+    @abstractmethod
+    def new_id(self) -> str:
+        """The next identifier."""
+
+class Uuid4Allocator(IdAllocator):
+    """Random UUID4s from the OS entropy source (not reproducible).
+
+    `hex=True` gives the 32-character form without dashes.
+    """
+
+    def __init__(self, hex: bool = False):
+        self.hex = hex
+
+    def new_id(self) -> str:
+        value = uuid.uuid4()
+        return value.hex if self.hex else str(value)
+
+class SeededUuidAllocator(IdAllocator):
+    """UUID4-shaped identifiers from a private, seeded RNG (reproducible)."""
+
+    def __init__(self, seed: int, hex: bool = False):
+        self._rng = random.Random(seed)
+        self.hex = hex
+
+    def new_id(self) -> str:
+        value = uuid.UUID(int=self._rng.getrandbits(128), version=4)
+        return value.hex if self.hex else str(value)
+
+class CounterAllocator(IdAllocator):
+    """Sequential identifiers under a prefix, e.g. one prefix per shard."""
+
+    def __init__(self, prefix: str = "", start: int = 0):
+        self.prefix = prefix
+        self.counter = start
+
+    def new_id(self) -> str:
+        self.counter += 1
+        return f"{self.prefix}-{self.counter:012d}" if self.prefix else f"{self.counter:012d}"
+
+ID_STRATEGIES = ["seeded", "counter", "uuid4"]
+
+def make_id_allocator(strategy: str, seed: int = 0, shard: Union[int, str] = 0, hex: bool = False) -> IdAllocator:
+    """Build the allocator for one generator (shard) under the given strategy.
+
+    Seeded and counter identifiers are collision-free across the shards of
+    one run: the former draw from a seed derived per shard, the latter carry
+    the shard as a prefix. They are only unique within a run - another run
+    with the same seed (or shard names, for counters) repeats them. `hex`
+    drops the dashes from UUID-shaped identifiers.
+    """
+    if strategy == "seeded":
+        return SeededUuidAllocator(derive_seed(seed, f"ids:{shard}"), hex)
+    if strategy == "counter":
+        return CounterAllocator(f"{shard:05d}" if isinstance(shard, int) else str(shard))
+    if strategy == "uuid4":
+        return Uuid4Allocator(hex)
+    raise ValueError(f"Unknown ID strategy: {strategy}")
+
+_id_allocator: IdAllocator = Uuid4Allocator()
+
+def set_id_allocator(allocator: IdAllocator) -> None:
+    """Install the allocator used by `generate_policy_id`."""
+    global _id_allocator
+    _id_allocator = allocator
+
+def get_id_allocator() -> IdAllocator:
+    return _id_allocator
+
 def generate_policy_id() -> str:
-    """Generate a UUID-based policy identifier."""
-    return str(uuid.uuid4())
+    """Generate a policy identifier from the active allocator (UUID4 by default)."""
+    return _id_allocator.new_id()
 
 # ----------------------------------------------------------------------------
 # Config and File I/O
@@ -42,10 +128,117 @@ def save_json(output_path: str, data: Any) -> None:
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
+def load_json(input_path: str) -> Any:
+    """Load a JSON document from the given path."""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def get_num_policies(config: Dict) -> int:
     """Retrieve the number of policies to generate from config."""
     return config.get("num_policies", 50)
 
+# ----------------------------------------------------------------------------
+# Streaming Policy I/O
+# ----------------------------------------------------------------------------
+
+MANIFEST_SUFFIX = ".manifest.json"
+CHECKPOINT_KEY = "@checkpoint"  # Marks journal checkpoint records in a JSONL stream
+
+def open_text(path: str, mode: str = "r"):
+    """Open a text file, transparently handling .gz and .zst compression."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class PolicyWriter:
+    """Write policies to disk one at a time, keeping memory use constant.
+
+    `.jsonl` paths (optionally `.gz`/`.zst` compressed) get one policy per
+    line; `.json` paths get the same indented array `save_json` produces.
+    With `append=True` an existing JSONL journal is extended in place.
+    """
+
+    def __init__(self, output_path: str, append: bool = False):
+        self.path = output_path
+        self.jsonl = ".jsonl" in Path(output_path).name
+        self.count = 0
+        if append and not self.jsonl:
+            raise ValueError("Only JSONL files can be appended to")
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open_text(output_path, "a" if append else "w")
+        if not self.jsonl:
+            self._file.write("[")
+
+    def write(self, policy: Dict) -> None:
+        if self.jsonl:
+            self._file.write(json.dumps(policy, ensure_ascii=False) + "\n")
+        else:
+            text = json.dumps(policy, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            self._file.write(("," if self.count else "") + "\n  " + text)
+        self.count += 1
+
+    def write_checkpoint(self, state: Dict) -> None:
+        """Append a checkpoint record and flush it to disk."""
+        self._file.write(json.dumps({CHECKPOINT_KEY: state}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self.jsonl:
+            self._file.write("\n]" if self.count else "]")
+        self._file.close()
+
+    def __enter__(self) -> "PolicyWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def iter_policies(source: Union[str, Iterable[Dict]]) -> Iterator[Dict]:
+    """Iterate policies from a JSON/JSONL file, a shard manifest, or an iterable."""
+    if not isinstance(source, str):
+        yield from source
+        return
+    if source.endswith(MANIFEST_SUFFIX):
+        for path in load_json(source)["files"]:
+            yield from iter_policies(path)
+        return
+    if ".jsonl" in Path(source).name:
+        with open_text(source) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if CHECKPOINT_KEY not in record:
+                        yield record
+        return
+    yield from load_json(source)
+
+def recover_journal(journal_path: str) -> Optional[Dict]:
+    """Return the last checkpoint of a JSONL journal, truncating anything after it.
+
+    Policies written after the last checkpoint (including a torn final line
+    from a crash) are discarded so generation can resume exactly there.
+    Returns None, leaving the file untouched, if there is no checkpoint.
+    """
+    if not os.path.exists(journal_path):
+        return None
+    state, end = None, 0
+    marker = ('{"' + CHECKPOINT_KEY + '"').encode("utf-8")
+    with open(journal_path, "rb") as f:
+        offset = 0
+        for line in f:
+            offset += len(line)
+            if line.startswith(marker) and line.endswith(b"\n"):
+                state, end = json.loads(line)[CHECKPOINT_KEY], offset
+    if state is not None:
+        with open(journal_path, "r+b") as f:
+            f.truncate(end)
+    return state
+
 # ----------------------------------------------------------------------------
 # Random Value Generators (with config)
 # ----------------------------------------------------------------------------
@@ -80,6 +273,32 @@ def get_random_operator(config: Dict) -> str:
 def get_random_operand(config: Dict) -> str:
     return select_random(config, "constraint_operands")
 
+class AliasTable:
+    """Walker/Vose alias table: O(1) sampling from a fixed discrete distribution."""
+
+    def __init__(self, weights: List[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s], self.alias[s] = scaled[s], l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rand=random.random) -> int:
+        """Draw one index using a single uniform number."""
+        u = rand() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
 # ----------------------------------------------------------------------------
 # File System & Logging Utilities
 # ----------------------------------------------------------------------------
@@ -0,0 +1,104 @@
+# validation_cache.py
+# ----------------------------------------------------------------------------
+# Content-addressed, on-disk cache of validation results (SQLite).
+# A result is keyed by the canonical hash of the document a validator
+# actually checks (the prepared / expanded policy) together with the hashes
+# of the schema and shapes files it was checked against, so unchanged
+# policies are never re-validated across runs, and editing the schema or
+# shapes invalidates every affected entry automatically.
+# ----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+CACHE_PATH = "outputs/cache/validation_cache.sqlite"
+CACHE_VERSION = "2"  # Bump when validator output changes for the same inputs
+QUERY_BATCH = 500    # Keys per SELECT ... IN (...)
+
+# ----------------------------------------------------------------------------
+# Hashing
+# ----------------------------------------------------------------------------
+
+def canonical_digest(document: Any) -> str:
+    """sha256 of a JSON document with sorted keys and no insignificant whitespace."""
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+_FILE_DIGESTS: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+def file_digest(path: str) -> str:
+    """sha256 of a file, recomputed only when its mtime or size changes; "missing" if absent."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _FILE_DIGESTS.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "rb") as f:
+            cached = _FILE_DIGESTS[path] = (stamp, hashlib.sha256(f.read()).hexdigest())
+    return cached[1]
+
+# ----------------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------------
+
+class ValidationCache:
+    """Persistent map from (validator, document, schema/shapes digests) to a JSON result."""
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(validator: str, document: Any, *digests: str) -> str:
+        """Cache key for `document` as checked by `validator` against files with the given digests."""
+        return ":".join((CACHE_VERSION, validator, canonical_digest(document)) + digests)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the cached results among `keys`, counting hits and misses."""
+        keys = list(keys)
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        for start in range(0, len(unique), QUERY_BATCH):
+            batch = unique[start:start + QUERY_BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(batch))})", batch)
+            found.update((k, json.loads(v)) for k, v in rows)
+        hits = sum(k in found for k in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self._conn.executemany("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                               ((k, json.dumps(v)) for k, v in items))
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ValidationCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,365 @@
+# validation_engine.py
+# ----------------------------------------------------------------------------
+# Tiered, early-exit validation shared by the three validators
+# (templates/policy_validator.py, models/validator.py and
+# models/validate_and_filter_policies.py).
+# Policies pass through ordered tiers - cheap structural checks, closed ODRL
+# vocabulary checks, then whatever expensive tiers a validator adds (compiled
+# JSON Schema, SHACL). A policy rejected by a fatal tier never reaches the
+# later ones, so a malformed LLM output is turned away in microseconds rather
+# than after a full RDF parse. Every run records, per tier, how many policies
+# were checked and rejected and the time spent.
+# The SHACL tier and the process-pool chunk worker are shared as well; each
+# validator only supplies the JSON-LD document its policies are checked as.
+# ----------------------------------------------------------------------------
+
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from policy_analytics import LOGICAL_OPERATORS, ODRL_PREFIXES, RULE_SECTIONS
+from shapes_registry import (
+    RDF_AVAILABLE, SHACL_PATH, conforming_report, get_shapes, resolve_inference, validate_against_shapes,
+    validate_graphs_batch
+)
+from shacl_native import get_compiled_shapes, validate_native
+from jsonld_loader import parse_jsonld
+from validation_cache import ValidationCache
+
+# Closed ODRL 2.2 vocabularies. Actions and left operands are open to profiles
+# (and LLM outputs routinely use terms such as "copy" or "notify"), so they are
+# left to the schema and shapes.
+POLICY_TYPES = frozenset({
+    "Policy", "Set", "Offer", "Agreement", "Privacy", "Request", "Ticket", "Assertion"
+})
+OPERATORS = frozenset({
+    "eq", "gt", "gteq", "lt", "lteq", "neq", "isA", "hasPart", "isPartOf", "isAllOf", "isAnyOf", "isNoneOf"
+})
+
+# ----------------------------------------------------------------------------
+# Candidates and Tiers
+# ----------------------------------------------------------------------------
+
+class Candidate:
+    """A policy on its way through the tiers, with what the tiers found out about it."""
+    __slots__ = ("policy", "prepared", "detail", "errors", "passed", "failed")
+
+    def __init__(self, policy: Any):
+        self.policy = policy
+        self.prepared: Any = None        # Form produced by a preparation tier
+        self.detail: Any = None          # Tier-specific outcome, e.g. a SHACL report
+        self.errors: List[str] = []
+        self.passed: List[str] = []      # Names of the tiers the policy passed
+        self.failed: List[str] = []      # Names of the tiers that rejected it
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+class Tier(NamedTuple):
+    """A validation stage: `check` returns the errors of each candidate ([] = passed)."""
+    name: str
+    check: Callable[[List[Candidate]], List[List[str]]]
+    fatal: bool = True
+
+def per_policy_tier(name: str, check: Callable[[Candidate], List[str]], fatal: bool = True) -> Tier:
+    """A tier from a function checking one candidate at a time."""
+    return Tier(name, lambda candidates: [check(c) for c in candidates], fatal)
+
+# ----------------------------------------------------------------------------
+# Statistics
+# ----------------------------------------------------------------------------
+
+class TierStats:
+    """Checked/rejected counts and time per tier; mergeable across chunks and processes."""
+
+    def __init__(self, counts: Optional[Dict[str, Dict[str, float]]] = None):
+        self.counts: Dict[str, Dict[str, float]] = {}
+        if counts:
+            self.merge(counts)
+
+    def record(self, name: str, checked: int, rejected: int, seconds: float) -> None:
+        entry = self.counts.setdefault(name, {"checked": 0, "rejected": 0, "seconds": 0.0})
+        entry["checked"] += checked
+        entry["rejected"] += rejected
+        entry["seconds"] += seconds
+
+    def merge(self, other: Union["TierStats", Dict[str, Dict[str, float]]]) -> "TierStats":
+        counts = other.counts if isinstance(other, TierStats) else other
+        for name, entry in counts.items():
+            self.record(name, entry["checked"], entry["rejected"], entry["seconds"])
+        return self
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Per-tier counts in tier order, with total seconds and mean microseconds per policy."""
+        return {
+            name: {"checked": entry["checked"], "rejected": entry["rejected"],
+                   "seconds": round(entry["seconds"], 6),
+                   "mean_us": round(entry["seconds"] / entry["checked"] * 1e6, 2) if entry["checked"] else 0.0}
+            for name, entry in self.counts.items()
+        }
+
+    def summary_lines(self) -> List[str]:
+        return [f"{name}: {entry['checked']} checked, {entry['rejected']} rejected, "
+                f"{entry['mean_us']:.1f} us/policy"
+                for name, entry in self.to_dict().items()]
+
+# ----------------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------------
+
+class ValidationEngine:
+    """Runs policies through ordered tiers, dropping them at the first fatal rejection."""
+
+    def __init__(self, tiers: Sequence[Tier]):
+        self.tiers = list(tiers)
+
+    def run(self, policies: Iterable[Any], stats: Optional[TierStats] = None) -> List[Candidate]:
+        """Validate a batch; returns one Candidate per policy, in input order."""
+        candidates = [Candidate(policy) for policy in policies]
+        alive = candidates
+        for tier in self.tiers:
+            if not alive:
+                break
+            start = time.perf_counter()
+            outcomes = tier.check(alive)
+            elapsed = time.perf_counter() - start
+
+            survivors, rejected = [], 0
+            for candidate, errors in zip(alive, outcomes):
+                if errors:
+                    rejected += 1
+                    candidate.errors.extend(errors)
+                    candidate.failed.append(tier.name)
+                    if tier.fatal:
+                        continue
+                else:
+                    candidate.passed.append(tier.name)
+                survivors.append(candidate)
+            if stats is not None:
+                stats.record(tier.name, len(alive), rejected, elapsed)
+            alive = survivors
+        return candidates
+
+# ----------------------------------------------------------------------------
+# Structural Tier
+# ----------------------------------------------------------------------------
+
+def _prefix(policy: Dict[str, Any], tag: str) -> str:
+    return f"[{tag}] UID: {policy.get('uid', 'unknown')} |"
+
+def _constraints_ok(constraint: Any) -> bool:
+    return isinstance(constraint, dict) or (
+        isinstance(constraint, list) and all(isinstance(c, dict) for c in constraint))
+
+def check_structure(policy: Any) -> List[str]:
+    """Errors that leave nothing to validate: no rules, rules without an action, malformed containers."""
+    if not isinstance(policy, dict):
+        return ["[STRUCTURE] Policy is not a JSON object"]
+    prefix = _prefix(policy, "STRUCTURE")
+    errors, rules = [], 0
+    for section in RULE_SECTIONS:
+        if section not in policy:
+            continue
+        if not isinstance(policy[section], list):
+            errors.append(f"{prefix} {section} is not a list of rules")
+            continue
+        for i, rule in enumerate(policy[section]):
+            if not isinstance(rule, dict):
+                errors.append(f"{prefix} {section}[{i}] is not an object")
+                continue
+            rules += 1
+            if not rule.get("action"):
+                errors.append(f"{prefix} {section}[{i}] has no action")
+            if rule.get("constraint") is not None and not _constraints_ok(rule["constraint"]):
+                errors.append(f"{prefix} {section}[{i}].constraint is not an object or a list of objects")
+    if not rules and not errors:
+        errors.append(f"{prefix} Policy has no permission, prohibition or obligation")
+    return errors
+
+# ----------------------------------------------------------------------------
+# Vocabulary Tier
+# ----------------------------------------------------------------------------
+
+def _odrl_term(value: Any) -> Optional[str]:
+    """Local name of a bare or ODRL-namespaced term; None for other IRIs and non-strings."""
+    if isinstance(value, dict):
+        value = value.get("@id")
+    if not isinstance(value, str):
+        return None
+    for prefix in ODRL_PREFIXES:
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    return None if ":" in value else value
+
+def _iter_constraints(constraint: Any) -> Iterable[Dict[str, Any]]:
+    """Atomic constraints, descending into logical (and/or/xone/andSequence) constraints."""
+    for c in constraint if isinstance(constraint, list) else [constraint]:
+        if not isinstance(c, dict):
+            continue
+        logical = [c[op] for op in LOGICAL_OPERATORS if op in c]
+        if not logical:
+            yield c
+        for operands in logical:
+            if isinstance(operands, dict):
+                operands = operands.get("@list", [])
+            yield from _iter_constraints(operands)
+
+def check_vocabulary(policy: Dict[str, Any]) -> List[str]:
+    """Errors for ODRL policy types and constraint operators that ODRL does not define."""
+    prefix = _prefix(policy, "VOCABULARY")
+    errors = []
+    types = policy.get("@type")
+    for value in types if isinstance(types, list) else [types]:
+        term = _odrl_term(value)
+        if term is not None and term not in POLICY_TYPES:
+            errors.append(f"{prefix} Unknown policy type '{value}'")
+    for section in RULE_SECTIONS:
+        for i, rule in enumerate(policy.get(section, [])):
+            for c in _iter_constraints(rule.get("constraint") or []):
+                term = _odrl_term(c.get("operator"))
+                if term is not None and term not in OPERATORS:
+                    errors.append(f"{prefix} {section}[{i}] Unknown operator '{c.get('operator')}'")
+    return errors
+
+def structure_tier() -> Tier:
+    return per_policy_tier("structure", lambda c: check_structure(c.policy))
+
+def vocabulary_tier() -> Tier:
+    return per_policy_tier("vocabulary", lambda c: check_vocabulary(c.policy))
+
+# ----------------------------------------------------------------------------
+# SHACL Tier
+# ----------------------------------------------------------------------------
+
+REPORT_FORMATS = ("text", "turtle")
+
+def shacl_unavailable(shapes_file: str = SHACL_PATH) -> Optional[str]:
+    """Why SHACL validation cannot run here, or None if it can."""
+    if not RDF_AVAILABLE:
+        return "SHACL validation skipped - RDF libraries not available"
+    if not os.path.exists(shapes_file):
+        return "SHACL validation skipped - shapes file not found"
+    return None
+
+def shacl_cache_key(validator: str, document: Any, shapes_file: str = SHACL_PATH) -> str:
+    """ValidationCache key of a SHACL outcome: the document, the shapes and the inference mode."""
+    return ValidationCache.key(validator, document, get_shapes(shapes_file).digest, resolve_inference())
+
+def _report(report: Tuple, report_format: str) -> str:
+    graph, text = report
+    return text if report_format == "text" else graph.serialize(format="turtle")
+
+def shacl_report(document: Any, shapes_file: str = SHACL_PATH, report_format: str = "text") -> Tuple[bool, str]:
+    """Full pyshacl run on one JSON-LD document: (conforms, report as text or Turtle)."""
+    conforms, report_graph, report_text = validate_against_shapes(parse_jsonld(document), shapes_file)
+    return conforms, _report((report_graph, report_text), report_format)
+
+def check_shacl(documents: Sequence[Any], shapes_file: str = SHACL_PATH, report_format: str = "text",
+                on_error: Optional[Callable[[Exception], Tuple[bool, str]]] = None) -> List[Tuple[bool, str]]:
+    """(conforms, report) per document, exactly as `shacl_report` on each would give.
+
+    The native engine answers where it can, one pyshacl run over the merged
+    graphs covers the rest, and non-conforming documents are re-validated
+    alone for their exact report. Errors are raised, or with `on_error`
+    turned into that document's outcome.
+    """
+    conforming = _report(conforming_report(shapes_file), report_format)
+    decided: Dict[int, Tuple[bool, str]] = {}
+    graphs = {}
+
+    def guarded(i: int, check: Callable[[], Optional[Tuple[bool, str]]]) -> None:
+        try:
+            outcome = check()
+        except Exception as e:
+            if on_error is None:
+                raise
+            outcome = on_error(e)
+        if outcome is not None:
+            decided[i] = outcome
+
+    def triage(i: int, document: Any) -> Optional[Tuple[bool, str]]:
+        native = validate_native(document, shapes_file)
+        if native is None:
+            graphs[i] = parse_jsonld(document)
+        return (True, conforming) if native is not None and native[0] else None
+
+    for i, document in enumerate(documents):
+        guarded(i, lambda: triage(i, document))
+    if len(graphs) > 1:
+        try:
+            batch = validate_graphs_batch(list(graphs.values()), shapes_file)
+        except Exception:
+            if on_error is None:
+                raise
+            batch = [False] * len(graphs)
+        for i, conforms in zip(graphs, batch):
+            if conforms:
+                decided[i] = (True, conforming)
+    for i, document in enumerate(documents):
+        if i not in decided:
+            guarded(i, lambda: shacl_report(document, shapes_file, report_format))
+    return [decided[i] for i in range(len(documents))]
+
+def shacl_tier(document: Callable[[Candidate], Any], shapes_file: str = SHACL_PATH, report_format: str = "text",
+               error_prefix: str = "", on_error: Optional[Callable[[Exception], Tuple[bool, str]]] = None,
+               skip_unavailable: bool = False, cache: Optional[ValidationCache] = None,
+               cache_name: str = "shacl") -> Tier:
+    """SHACL over the documents `document` builds from the candidates; the report is kept as their detail.
+
+    With `skip_unavailable`, missing RDF libraries or shapes pass every policy
+    with a note instead of failing. With a `cache`, documents validated
+    before (under `cache_name`) are not re-run.
+    """
+    def check(candidates: List[Candidate]) -> List[List[str]]:
+        skipped = shacl_unavailable(shapes_file) if skip_unavailable else None
+        if skipped:
+            outcomes = [(True, skipped)] * len(candidates)
+        else:
+            documents = [document(c) for c in candidates]
+            keys = [shacl_cache_key(cache_name, d, shapes_file) for d in documents] if cache else []
+            found = cache.get_many(keys) if cache else {}
+            missing = [i for i in range(len(documents)) if not cache or keys[i] not in found]
+            fresh = dict(zip(missing, check_shacl([documents[i] for i in missing], shapes_file,
+                                                  report_format, on_error)))
+            if cache:
+                cache.put_many((keys[i], outcome) for i, outcome in fresh.items())
+            outcomes = [fresh[i] if i in fresh else tuple(found[keys[i]]) for i in range(len(documents))]
+        errors = []
+        for candidate, (conforms, report) in zip(candidates, outcomes):
+            candidate.detail = report
+            errors.append([] if conforms else [error_prefix + report])
+        return errors
+    return Tier("shacl", check)
+
+# ----------------------------------------------------------------------------
+# Parallel Validation
+# ----------------------------------------------------------------------------
+
+def init_shacl_worker(shapes_file: str = SHACL_PATH) -> None:
+    """Pool initializer: parse and compile the shapes and their conforming report once per worker process."""
+    if RDF_AVAILABLE and os.path.exists(shapes_file):
+        get_shapes(shapes_file)
+        get_compiled_shapes(shapes_file)
+        conforming_report(shapes_file)
+
+def validate_chunk(engine: ValidationEngine, policies: Sequence[Any], outcome: Callable[[Candidate], Any],
+                   isolate_errors: bool = False) -> Tuple[List[Any], Dict[str, Dict[str, float]]]:
+    """Chunk task: `outcome` of every policy and the tier counts they took (picklable, for the parent to merge).
+
+    With `isolate_errors`, a chunk that fails is re-run one policy at a time
+    and a policy that still fails gets its error message as outcome.
+    """
+    stats = TierStats()
+    try:
+        return [outcome(c) for c in engine.run(policies, stats)], stats.counts
+    except Exception:
+        if not isolate_errors:
+            raise
+    stats, outcomes = TierStats(), []
+    for policy in policies:
+        try:
+            outcomes.append(outcome(engine.run([policy], stats)[0]))
+        except Exception as e:
+            outcomes.append(str(e))
+    return outcomes, stats.counts
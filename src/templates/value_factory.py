@@ -2,129 +2,189 @@
 # ----------------------------------------------------------------------------
 # Generator for semantically appropriate rightOperand values based on operand type.
 # This script enriches constraints in synthetic ODRL policies.
+#
+# Each operand maps to a (scalar, batch) generator pair built once from
+# static value tables. The scalar side draws from the seeded `random`
+# module; the batch side draws whole vectors from a NumPy Generator.
 # ----------------------------------------------------------------------------
 
 import random
 from datetime import datetime, timedelta
-import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple
 
-def generate_right_operand(operand):
-    """Generate semantically appropriate right operand values."""
-    fallback_uri = f"http://example.com/value/{operand}/{uuid.uuid4().hex[:8]}"
+import numpy as np
 
-    # Spatial and location operands
-    if operand in ["absoluteSpatialPosition"]:
-        wikidata_entities = ["Q30", "Q142", "Q183", "Q145", "Q55", "Q38", "Q96", "Q668", "Q258", "Q205", "Q262", "Q927", "Q449", "Q358"]
-        return f"http://www.wikidata.org/entity/{random.choice(wikidata_entities)}"
+# ----------------------------------------------------------------------------
+# Value Tables
+# ----------------------------------------------------------------------------
 
-    elif operand == "relativeSpatialPosition":
-        return random.choice(["left", "right", "above", "below", "inside", "outside"])
+BASE_DATE = datetime(2025, 5, 23, 12, 32, 20)
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Every date a dateTime/timeInterval value can take, formatted once
+DATE_VALUES = [(BASE_DATE + timedelta(days=d)).strftime(DATE_FORMAT) for d in range(-365, 366)]
+INTERVAL_VALUES = [
+    f"{BASE_DATE.strftime(DATE_FORMAT)}/{(BASE_DATE + timedelta(days=d)).strftime(DATE_FORMAT)}"
+    for d in range(1, 31)
+]
+
+WIKIDATA_ENTITIES = ["Q30", "Q142", "Q183", "Q145", "Q55", "Q38", "Q96", "Q668", "Q258", "Q205", "Q262", "Q927", "Q449", "Q358"]
+FILE_FORMATS = [
+    "application/pdf", "text/html", "text/plain", "text/csv",
+    "image/jpeg", "image/png", "image/gif", "image/bmp",
+    "video/mp4", "video/avi", "video/mkv", "video/webm",
+    "audio/mpeg", "audio/wav", "audio/flac", "audio/ogg"
+]
+CATEGORY_OPTIONS = {
+    "deliveryChannel": ["mobile", "web", "print", "broadcast", "email", "sms"],
+    "media": ["digital", "physical", "online", "offline", "streaming", "download"],
+    "language": ["en", "de", "fr", "es", "zh", "ja", "ar", "hi", "pt", "ru"],
+    "purpose": ["research", "commercial", "educational", "personal", "non-commercial"],
+    "systemDevice": ["mobile", "desktop", "server", "iot", "sensor", "tablet"]
+}
+INDUSTRIES = ['music', 'film', 'software', 'literature', 'data', 'gaming', 'education', 'healthcare']
+EVENTS = ["odrl:policyUsage", "odrl:offer", "odrl:agreement", "odrl:request", "odrl:permission"]
+VERSIONS = [f"{major}.{minor}.{patch}" for major in range(1, 6) for minor in range(10) for patch in range(10)]
+
+# delayPeriod picks a unit uniformly, then a count within that unit's range
+DURATION_GROUPS = [
+    [f"P{i}D" for i in range(1, 31)],
+    [f"P{i}M" for i in range(1, 13)],
+    [f"P{i}Y" for i in range(1, 6)],
+    [f"PT{i}H" for i in range(1, 25)],
+    [f"PT{i}M" for i in range(1, 61)],
+]
 
-    elif operand == "virtualLocation":
-        return f"http://example.com/virtual/location/{uuid.uuid4().hex[:8]}"
+# ----------------------------------------------------------------------------
+# Generator Builders
+# ----------------------------------------------------------------------------
 
-    elif operand == "recipient":
-        recipient_type = random.choice(['user', 'org', 'group'])
-        return f"http://example.com/recipient/{recipient_type}/{uuid.uuid4().hex[:8]}"
+class ValueGenerator(NamedTuple):
+    scalar: Callable[[], Any]
+    batch: Callable[[int, np.random.Generator], List[Any]]
+
+def _hex_suffixes(n, rng):
+    return [f"{v:08x}" for v in rng.integers(0, 2 ** 32, size=n).tolist()]
+
+def _choice(options, template="{}"):
+    values = [template.format(o) for o in options]
+    return ValueGenerator(
+        lambda: random.choice(values),
+        lambda n, rng: [values[i] for i in rng.integers(len(values), size=n).tolist()]
+    )
+
+def _grouped_choice(groups):
+    def batch(n, rng):
+        group_idx = rng.integers(len(groups), size=n).tolist()
+        draws = rng.random(n).tolist()
+        return [groups[g][int(u * len(groups[g]))] for g, u in zip(group_idx, draws)]
+    return ValueGenerator(lambda: random.choice(random.choice(groups)), batch)
+
+def _int_range(low, high):
+    return ValueGenerator(
+        lambda: random.randint(low, high),
+        lambda n, rng: rng.integers(low, high + 1, size=n).tolist()
+    )
+
+def _amount(low, high):
+    return ValueGenerator(
+        lambda: round(random.uniform(low, high), 2),
+        lambda n, rng: [round(v, 2) for v in rng.uniform(low, high, size=n).tolist()]
+    )
+
+def _hex_uri(prefix):
+    return ValueGenerator(
+        lambda: f"{prefix}{random.getrandbits(32):08x}",
+        lambda n, rng: [prefix + h for h in _hex_suffixes(n, rng)]
+    )
+
+def _typed_hex_uri(prefix, kinds):
+    return ValueGenerator(
+        lambda: f"{prefix}{random.choice(kinds)}/{random.getrandbits(32):08x}",
+        lambda n, rng: [f"{prefix}{kinds[k]}/{h}" for k, h in
+                        zip(rng.integers(len(kinds), size=n).tolist(), _hex_suffixes(n, rng))]
+    )
+
+def _relative_dates(days):
+    def batch(n, rng):
+        base = datetime.utcnow()
+        values = [(base + timedelta(days=d)).strftime(DATE_FORMAT) for d in range(-days, days + 1)]
+        return [values[i] for i in rng.integers(len(values), size=n).tolist()]
+    return ValueGenerator(
+        lambda: (datetime.utcnow() + timedelta(days=random.randint(-days, days))).strftime(DATE_FORMAT),
+        batch
+    )
 
-    elif operand in ["absolutePosition", "relativePosition"]:
-        return f"http://example.com/value/{operand}/{uuid.uuid4().hex[:8]}"
+# ----------------------------------------------------------------------------
+# Operand Registry
+# ----------------------------------------------------------------------------
 
-    elif operand == "relativeTemporalPosition":
-        return f"http://example.com/value/relativeTemporalPosition/{uuid.uuid4().hex[:8]}"
+RIGHT_OPERAND_GENERATORS: Dict[str, ValueGenerator] = {
+    # Spatial and location operands
+    "absoluteSpatialPosition": _choice(WIKIDATA_ENTITIES, "http://www.wikidata.org/entity/{}"),
+    "relativeSpatialPosition": _choice(["left", "right", "above", "below", "inside", "outside"]),
+    "virtualLocation": _hex_uri("http://example.com/virtual/location/"),
+    "recipient": _typed_hex_uri("http://example.com/recipient/", ['user', 'org', 'group']),
+    "absolutePosition": _hex_uri("http://example.com/value/absolutePosition/"),
+    "relativePosition": _hex_uri("http://example.com/value/relativePosition/"),
+    "relativeTemporalPosition": _hex_uri("http://example.com/value/relativeTemporalPosition/"),
 
     # Numeric operands
-    elif operand == "percentage":
-        return random.randint(1, 100)
-
-    elif operand in ["count", "unitOfCount"]:
-        return random.randint(1, 1000)
-
-    elif operand == "payAmount":
-        return round(random.uniform(5.0, 500.0), 2)
-
-    elif operand == "elapsedTime":
-        return random.randint(10, 3600)  # seconds
+    "percentage": _int_range(1, 100),
+    "count": _int_range(1, 1000),
+    "unitOfCount": _int_range(1, 1000),
+    "payAmount": _amount(5.0, 500.0),
+    "elapsedTime": _int_range(10, 3600),  # seconds
 
     # Temporal operands
-    elif operand in ["dateTime", "absoluteTemporalPosition"]:
-        base_date = datetime(2025, 5, 23, 12, 32, 20)
-        random_offset = timedelta(days=random.randint(-365, 365))
-        return (base_date + random_offset).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-    elif operand == "timeInterval":
-        start_date = datetime(2025, 5, 23, 12, 32, 20)
-        end_date = start_date + timedelta(days=random.randint(1, 30))
-        return f"{start_date.strftime('%Y-%m-%dT%H:%M:%SZ')}/{end_date.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-
-    elif operand == "delayPeriod":
-        duration_units = [
-            f"P{random.randint(1, 30)}D",
-            f"P{random.randint(1, 12)}M",
-            f"P{random.randint(1, 5)}Y",
-            f"PT{random.randint(1, 24)}H",
-            f"PT{random.randint(1, 60)}M"
-        ]
-        return random.choice(duration_units)
+    "dateTime": _choice(DATE_VALUES),
+    "absoluteTemporalPosition": _choice(DATE_VALUES),
+    "timeInterval": _choice(INTERVAL_VALUES),
+    "delayPeriod": _grouped_choice(DURATION_GROUPS),
 
     # Format and media operands
-    elif operand == "fileFormat":
-        formats = [
-            "application/pdf", "text/html", "text/plain", "text/csv",
-            "image/jpeg", "image/png", "image/gif", "image/bmp",
-            "video/mp4", "video/avi", "video/mkv", "video/webm",
-            "audio/mpeg", "audio/wav", "audio/flac", "audio/ogg"
-        ]
-        return random.choice(formats)
-
-    elif operand == "resolution":
-        return random.choice(["480p", "720p", "1080p", "2K", "4K", "8K"])
-
-    elif operand in ["deliveryChannel", "media", "language", "purpose", "systemDevice"]:
-        options = {
-            "deliveryChannel": ["mobile", "web", "print", "broadcast", "email", "sms"],
-            "media": ["digital", "physical", "online", "offline", "streaming", "download"],
-            "language": ["en", "de", "fr", "es", "zh", "ja", "ar", "hi", "pt", "ru"],
-            "purpose": ["research", "commercial", "educational", "personal", "non-commercial"],
-            "systemDevice": ["mobile", "desktop", "server", "iot", "sensor", "tablet"]
-        }
-        return random.choice(options.get(operand, ["default"]))
+    "fileFormat": _choice(FILE_FORMATS),
+    "resolution": _choice(["480p", "720p", "1080p", "2K", "4K", "8K"]),
+    **{operand: _choice(options) for operand, options in CATEGORY_OPTIONS.items()},
 
     # Business and product operands
-    elif operand == "product":
-        return f"http://example.com/product/{uuid.uuid4().hex[:8]}"
-
-    elif operand == "industry":
-        industries = ['music', 'film', 'software', 'literature', 'data', 'gaming', 'education', 'healthcare']
-        return f"http://example.com/industry/{random.choice(industries)}"
+    "product": _hex_uri("http://example.com/product/"),
+    "industry": _choice(INDUSTRIES, "http://example.com/industry/{}"),
 
     # Technical operands
-    elif operand == "metering":
-        return random.choice(["enabled", "disabled"])
+    "metering": _choice(["enabled", "disabled"]),
+    "version": _choice(VERSIONS),
+    "event": _choice(EVENTS),
+
+    # Spatial descriptors
+    "spatial": _hex_uri("http://example.com/value/spatial/"),
+}
+
+@lru_cache(maxsize=None)
+def get_value_generator(operand: str) -> ValueGenerator:
+    """Look up the generator for an operand, deriving a fallback for unknown ones."""
+    if operand in RIGHT_OPERAND_GENERATORS:
+        return RIGHT_OPERAND_GENERATORS[operand]
+    if "Amount" in operand or "Price" in operand:
+        return _amount(1.0, 1000.0)
+    elif "Count" in operand or "Number" in operand:
+        return _int_range(1, 100)
+    elif "Time" in operand or "Date" in operand:
+        return _relative_dates(30)
+    elif "Position" in operand or "Location" in operand:
+        return _hex_uri(f"http://example.com/value/{operand.lower()}/")
+    return _hex_uri(f"http://example.com/value/{operand}/")
 
-    elif operand == "version":
-        major = random.randint(1, 5)
-        minor = random.randint(0, 9)
-        patch = random.randint(0, 9)
-        return f"{major}.{minor}.{patch}"
+# ----------------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------------
 
-    elif operand == "event":
-        events = ["odrl:policyUsage", "odrl:offer", "odrl:agreement", "odrl:request", "odrl:permission"]
-        return random.choice(events)
+def generate_right_operand(operand):
+    """Generate semantically appropriate right operand values."""
+    return get_value_generator(operand).scalar()
 
-    # Spatial descriptors
-    elif operand == "spatial":
-        return f"http://example.com/value/spatial/{uuid.uuid4().hex[:8]}"
-
-    # Fallback for unknown operands
-    else:
-        if "Amount" in operand or "Price" in operand:
-            return round(random.uniform(1.0, 1000.0), 2)
-        elif "Count" in operand or "Number" in operand:
-            return random.randint(1, 100)
-        elif "Time" in operand or "Date" in operand:
-            return (datetime.utcnow() + timedelta(days=random.randint(-30, 30))).strftime("%Y-%m-%dT%H:%M:%SZ")
-        elif "Position" in operand or "Location" in operand:
-            return f"http://example.com/value/{operand.lower()}/{uuid.uuid4().hex[:8]}"
-        else:
-            return fallback_uri
+def generate_right_operands(operand, n, rng=None):
+    """Generate n right operand values for one operand in a single vectorized draw."""
+    rng = rng if rng is not None else np.random.default_rng()
+    return get_value_generator(operand).batch(n, rng)